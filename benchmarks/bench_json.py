@@ -0,0 +1,85 @@
+"""
+JSON response encoding benchmark
+
+Encodes a 10k-row /api/music page three ways: the old path (walk the rows
+converting datetimes, then json.dumps with a JSONEncoder subclass), the
+serializer's stdlib encoder and, when installed, its orjson encoder.
+Run from the project root:
+
+    python benchmarks/bench_json.py
+"""
+import datetime
+import json
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'server'))
+
+from serving import serialization
+
+
+class DateTimeEncoder(json.JSONEncoder):
+    def default(self, obj):
+        if isinstance(obj, (datetime.date, datetime.datetime)):
+            return obj.isoformat()
+        return super().default(obj)
+
+
+def serialize_datetime(obj):
+    if isinstance(obj, dict):
+        for key, value in obj.items():
+            if isinstance(value, (datetime.date, datetime.datetime)):
+                obj[key] = value.isoformat()
+    elif isinstance(obj, list):
+        for item in obj:
+            serialize_datetime(item)
+    return obj
+
+
+def build_page(rows=10000):
+    now = datetime.datetime(2024, 5, 1, 12, 30, 0)
+    genres = ['rnb', 'country', 'classic', 'jazz']
+    return {
+        'music': [
+            {
+                'id': index,
+                'artist_id': index % 500,
+                'title': f'Song number {index}',
+                'album_name': f'Album {index % 40}',
+                'genre': genres[index % 4],
+                'created_at': now,
+                'updated_at': now,
+                'artist_name': f'Artist {index % 500}'
+            }
+            for index in range(rows)
+        ],
+        'pagination': {'page': 1, 'per_page': rows, 'total': rows, 'total_pages': 1}
+    }
+
+
+def old_path(page):
+    # The old path mutated rows, so work on a copy each run
+    rows = [dict(row) for row in page['music']]
+    serialize_datetime(rows)
+    body = {'music': rows, 'pagination': page['pagination']}
+    return json.dumps(body, cls=DateTimeEncoder).encode('utf-8')
+
+
+def main():
+    page = build_page()
+    number = 20
+
+    candidates = [('walk + json.dumps(cls=DateTimeEncoder)', lambda: old_path(page))]
+    for name in serialization.ENCODERS:
+        encoder = serialization.ENCODERS[name]
+        candidates.append((f'serialization ({name})', lambda encoder=encoder: encoder(page)))
+
+    print(f"Encoding a {len(page['music'])}-row music page, best of 3 x {number} runs")
+    for label, func in candidates:
+        best = min(timeit.repeat(func, number=number, repeat=3)) / number
+        print(f"{label:>42}: {best * 1000:8.2f} ms  ({len(func())} bytes)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+"""
+Route dispatch micro-benchmark
+
+Compares the old linear regex scan with the compiled Router as the number
+of registered routes grows. Run from the project root:
+
+    python benchmarks/bench_router.py
+"""
+import os
+import re
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'server'))
+
+from routing.router import Router
+
+
+def handler(request):
+    return None
+
+
+def build_paths(count):
+    """Resource-style routes similar to the real API, padded out to count entries"""
+    paths = []
+    index = 0
+    while len(paths) < count:
+        paths.append((f'/api/resource{index}', 'GET'))
+        paths.append((f'/api/resource{index}/{{id}}', 'GET'))
+        paths.append((f'/api/resource{index}/{{parent_id}}/children', 'GET'))
+        index += 1
+    return paths[:count]
+
+
+def build_linear(paths):
+    routes = {}
+    for path, method in paths:
+        if '{' in path:
+            pattern = path.replace('{', '(?P<').replace('}', '>[^/]+)')
+            routes[(method, re.compile(pattern))] = handler
+        else:
+            routes[(method, path)] = handler
+    return routes
+
+
+def linear_match(routes, method, path):
+    exact_match = routes.get((method, path))
+    if exact_match:
+        return exact_match, {}
+
+    for (route_method, route_path), route_handler in routes.items():
+        if route_method != method:
+            continue
+        if isinstance(route_path, re.Pattern):
+            match = route_path.fullmatch(path)
+            if match:
+                return route_handler, match.groupdict()
+    return None, {}
+
+
+def build_router(paths):
+    router = Router()
+    for path, method in paths:
+        router.add(method, path, handler)
+    return router
+
+
+def main():
+    number = 20000
+    print(f"{'routes':>8} {'linear regex (us)':>18} {'router (us)':>12}")
+
+    for count in (10, 100, 1000, 5000):
+        paths = build_paths(count)
+        linear = build_linear(paths)
+        router = build_router(paths)
+
+        # Worst case for the linear scan: the last parameterized route registered
+        last_param = [path for path, _ in paths if path.endswith('{id}')][-1]
+        target = last_param.replace('{id}', '42')
+        assert linear_match(linear, 'GET', target)[0] is handler
+        assert router.match('GET', target)[0] is handler
+
+        linear_time = timeit.timeit(lambda: linear_match(linear, 'GET', target), number=number)
+        router_time = timeit.timeit(lambda: router.match('GET', target), number=number)
+
+        print(f"{count:>8} {linear_time / number * 1e6:>18.2f} {router_time / number * 1e6:>12.2f}")
+
+
+if __name__ == '__main__':
+    main()
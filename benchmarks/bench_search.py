@@ -0,0 +1,55 @@
+"""
+Search and autocomplete index benchmark
+
+Fills the trigram and prefix indexes with synthetic artist names (no
+database needed) and times substring searches and prefix completions at
+a few catalog sizes, to show latency stays flat as the catalog grows.
+Run from the project root:
+
+    python benchmarks/bench_search.py
+"""
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'server'))
+
+from services.search_index import TrigramIndex, PrefixIndex
+
+SYLLABLES = ['ka', 'lo', 'mi', 'ra', 'ne', 'so', 'tu', 'vi', 'ze', 'do', 'ri', 'an', 'el', 'or']
+
+
+def make_name(rng):
+    words = []
+    for _ in range(rng.randint(1, 3)):
+        words.append(''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))).capitalize())
+    return ' '.join(words)
+
+
+def fill(index, size, rng):
+    data = index._empty()
+    for doc_id in range(1, size + 1):
+        index._add(data, doc_id, [make_name(rng)], bulk=True)
+    index._finish(data)
+    index.data = data
+    index.ready = True
+
+
+def main():
+    number = 200
+    for size in (10000, 100000, 500000):
+        rng = random.Random(size)
+        trigram = TrigramIndex('bench', 'artists', ['name'])
+        prefix = PrefixIndex('bench_suggest', 'artists', 'name')
+        fill(trigram, size, rng)
+        fill(prefix, size, random.Random(size))
+
+        search = min(timeit.repeat(lambda: trigram.search('kalomi'), number=number, repeat=3)) / number
+        complete = min(timeit.repeat(lambda: prefix.complete('kalo', 10), number=number, repeat=3)) / number
+        print(f"{size:>7} names: search 'kalomi' {search * 1000:8.3f} ms ({len(trigram.search('kalomi'))} hits), "
+              f"complete 'kalo' {complete * 1000:6.3f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -171,6 +171,25 @@ server_module.run_server()
             print(f"❌ File not found: {server_path}")
             sys.exit(1)
 
+def run_database_command(action):
+    """Run a database maintenance command against the configured MySQL database"""
+    sys.path.insert(0, os.path.abspath('server'))
+    
+    if action == 'migrate':
+        from database.migrations import migrate
+        if not migrate():
+            sys.exit(1)
+    elif action == 'status':
+        from database.migrations import migration_status
+        if not migration_status():
+            sys.exit(1)
+    elif action == 'advise':
+        from services.index_advisor import run_advisor
+        unexpected = run_advisor()
+        # A non-zero exit lets CI fail on queries that scan a whole table
+        if unexpected is None or unexpected > 0:
+            sys.exit(1)
+
 def main():
     """Main entry point for the command runner"""
     args = parse_args()
@@ -182,10 +201,15 @@ def main():
         
         # Run the project
         run_project()
+    elif len(args.command) >= 2 and args.command[0] == 'db' and args.command[1] in ('migrate', 'status', 'advise'):
+        run_database_command(args.command[1])
     else:
         print(f"❌ Unknown command: {' '.join(args.command)}")
         print("Available commands:")
         print("  run project - Start the Artist Management System")
+        print("  db migrate  - Apply pending database migrations")
+        print("  db status   - List database migrations and whether they are applied")
+        print("  db advise   - EXPLAIN the queries the models issue and flag full scans")
         sys.exit(1)
 
 if __name__ == "__main__":
@@ -1,56 +1,129 @@
-import json
-import time
-import uuid
-import hashlib
+from auth.session_store import (
+    Session, SessionStore, SESSION_BACKEND, SESSION_TTL, SESSION_MAX_LIFETIME, SESSION_MAX_COUNT, SESSION_SWEEP_INTERVAL
+)
+from auth.sqlite_session_store import SQLiteSessionStore, SESSION_SQLITE_PATH, SESSION_TOUCH_INTERVAL
+from database.db_connection import has_written
 from models.user_model import User
+from services.entity_cache import user_cache
 
-# Simple in-memory session store (for production, use a persistent store like Redis)
-sessions = {}
+def create_session_store(backend=None):
+    """Build the session store for the requested backend: memory (one process) or sqlite (shared)"""
+    backend = backend or SESSION_BACKEND or 'memory'
+    
+    if backend == 'memory':
+        return SessionStore(
+            ttl=SESSION_TTL,
+            max_lifetime=SESSION_MAX_LIFETIME,
+            max_count=SESSION_MAX_COUNT,
+            sweep_interval=SESSION_SWEEP_INTERVAL
+        )
+    
+    if backend == 'sqlite':
+        return SQLiteSessionStore(
+            SESSION_SQLITE_PATH,
+            ttl=SESSION_TTL,
+            max_lifetime=SESSION_MAX_LIFETIME,
+            max_count=SESSION_MAX_COUNT,
+            sweep_interval=SESSION_SWEEP_INTERVAL,
+            touch_interval=SESSION_TOUCH_INTERVAL
+        )
+    
+    raise ValueError(f"Unknown session backend: {backend}")
+
+# Session store with sliding expiry, sweeping and a size cap; see configure_sessions()
+sessions = create_session_store()
+
+def configure_sessions(server_mode):
+    """
+    Pick the session store for the serving mode, before any worker starts
+    Prefork workers only share sessions through the sqlite store: with the
+    memory store a login would only be known to the worker that handled it.
+    Returns False if the configured backend cannot work in this mode
+    """
+    global sessions
+    if server_mode != 'prefork':
+        return True
+    
+    if SESSION_BACKEND == 'memory':
+        print("Error: SESSION_BACKEND=memory cannot be used with SERVER_MODE=prefork, "
+              "each worker would only know its own logins; set SESSION_BACKEND=sqlite or leave it unset")
+        return False
+    
+    if not SESSION_BACKEND:
+        sessions = create_session_store('sqlite')
+    return True
 
-class Session:
-    def __init__(self, user_id, role, expires=3600):  # 1 hour default session
-        self.session_id = str(uuid.uuid4())
-        self.user_id = user_id
-        self.role = role
-        self.created_at = time.time()
-        self.expires_at = self.created_at + expires
-        self.is_active = True
+def sanitize_user(user):
+    """Copy of a user row without the password hash"""
+    return {key: value for key, value in user.items() if key != 'password'}
 
 def create_session(user):
     """Create a new session for a user"""
     session = Session(user['id'], user['role'])
-    sessions[session.session_id] = session
+    sessions.add(session)
+    # The row was just read to log in, so the first request needs no lookup
+    sessions.set_user(session, sanitize_user(user))
     return session.session_id
 
 def validate_session(session_id):
-    """Check if a session is valid and not expired"""
-    if not session_id or session_id not in sessions:
+    """Check if a session is valid and not expired, extending its expiry"""
+    if not session_id:
         return None
     
-    session = sessions[session_id]
-    if not session.is_active or time.time() > session.expires_at:
-        # Session expired
-        destroy_session(session_id)
-        return None
-    
-    return session
+    return sessions.get(session_id)
 
 def get_user_from_session(session_id):
-    """Get user details from session"""
+    """
+    Get user details (without the password hash) from session
+    The row is read once and kept by the session store until User.update
+    or User.delete touches that user, so later requests make no queries
+    """
     session = validate_session(session_id)
     if not session:
         return None
     
-    user = User.get_by_id(session.user_id)
-    return user
+    user = session.user
+    if user is None:
+        # The snapshot may have been dropped by a write in another process, whose
+        # invalidation never reached this process's entity cache
+        user_cache.discard(session.user_id)
+        row = User.get_by_id(session.user_id)
+        if row is None:
+            return None
+        user = sanitize_user(row)
+        # Uncommitted rows are not kept; the store also refuses rows read while the user was being written
+        if not has_written('users'):
+            sessions.set_user(session, user)
+    
+    return dict(user)
+
+def forget_users(*user_ids):
+    """Drop the snapshots of these users, so the next request reads them again"""
+    ids = set()
+    for user_id in user_ids:
+        try:
+            ids.add(int(user_id))
+        except (TypeError, ValueError):
+            continue
+    
+    if ids:
+        sessions.forget_users(ids)
+
+# Writes to a user through the models invalidate that user's entity cache entry
+user_cache.add_listener(forget_users)
 
 def destroy_session(session_id):
     """Destroy a session (logout)"""
-    if session_id in sessions:
-        sessions[session_id].is_active = False
-        del sessions[session_id]
+    sessions.remove(session_id)
     return True
 
+def destroy_user_sessions(user_id):
+    """Destroy every session of a user (log out everywhere); returns how many were ended"""
+    return sessions.remove_user(user_id)
+
+def session_stats():
+    return sessions.stats()
+
 def login(email, password):
     """Authenticate a user and create a session"""
     user = User.authenticate(email, password)
@@ -97,17 +170,17 @@ def register(first_name, last_name, email, password, role='artist'):
 def requires_auth(func):
     """Decorator to require authentication for a function"""
     def wrapper(request, *args, **kwargs):
-        session_id = request.cookies.get('session_id')
-        session = validate_session(session_id)
+        # dispatch() has already resolved the session's user for this request
+        user = request.user or get_user_from_session(request.cookies.get('session_id'))
         
-        if not session:
+        if not user:
             return {
                 'status': 401,
                 'message': 'Unauthorized: Please login to continue'
             }
         
         # Set the authenticated user on the request
-        request.user = get_user_from_session(session_id)
+        request.user = user
         return func(request, *args, **kwargs)
     
     return wrapper
@@ -116,23 +189,24 @@ def requires_role(roles):
     """Decorator to require specific role(s) for a function"""
     def decorator(func):
         def wrapper(request, *args, **kwargs):
-            session_id = request.cookies.get('session_id')
-            session = validate_session(session_id)
+            # dispatch() has already resolved the session's user for this request
+            user = request.user or get_user_from_session(request.cookies.get('session_id'))
             
-            if not session:
+            if not user:
                 return {
                     'status': 401,
                     'message': 'Unauthorized: Please login to continue'
                 }
             
-            if session.role not in roles:
+            # The snapshot is refreshed when the user is updated, so role changes apply at once
+            if user['role'] not in roles:
                 return {
                     'status': 403, 
                     'message': 'Forbidden: You do not have permission to access this resource'
                 }
             
             # Set the authenticated user on the request
-            request.user = get_user_from_session(session_id)
+            request.user = user
             return func(request, *args, **kwargs)
         
         return wrapper
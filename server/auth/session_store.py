@@ -0,0 +1,241 @@
+import heapq
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dotenv import load_dotenv
+
+# Load environment variables from .env file
+load_dotenv()
+
+# Session store settings; SESSION_BACKEND is memory (one process) or sqlite (shared between local processes).
+# Left empty, prefork mode uses sqlite and every other mode uses memory
+SESSION_BACKEND = os.getenv("SESSION_BACKEND", "").lower()
+SESSION_TTL = float(os.getenv("SESSION_TTL", 3600))
+SESSION_MAX_LIFETIME = float(os.getenv("SESSION_MAX_LIFETIME", 86400))
+SESSION_MAX_COUNT = int(os.getenv("SESSION_MAX_COUNT", 100000))
+SESSION_SWEEP_INTERVAL = float(os.getenv("SESSION_SWEEP_INTERVAL", 60))
+
+
+class Session:
+    def __init__(self, user_id, role):
+        self.session_id = str(uuid.uuid4())
+        self.user_id = user_id
+        self.role = role
+        self.created_at = time.time()
+        # Set and extended by the session store
+        self.expires_at = None
+        self.is_active = True
+        # The user's row without the password hash, kept by the store; see set_user()
+        self.user = None
+        # The user's snapshot version when the session was looked up
+        self.user_version = 0
+
+
+class SessionBackend:
+    """
+    What auth_handler needs from a session store
+
+    get() returns the live session with its expiry extended, or None.
+    set_user() keeps a user snapshot for the session's user unless
+    forget_users() has been called for that user since the session was
+    looked up, so a lookup that raced a write does not keep the old row.
+
+    Stores implement sweep(); _ensure_sweeper() runs it every sweep_interval
+    seconds on a background thread, using the store's sweep_interval, lock
+    and sweeper_pid attributes.
+    """
+
+    def add(self, session):
+        raise NotImplementedError
+
+    def get(self, session_id):
+        raise NotImplementedError
+
+    def remove(self, session_id):
+        raise NotImplementedError
+
+    def remove_user(self, user_id):
+        """End every session of a user; returns how many there were"""
+        raise NotImplementedError
+
+    def set_user(self, session, user):
+        raise NotImplementedError
+
+    def forget_users(self, user_ids):
+        """Drop the snapshots of these users so the next lookup reads them again"""
+        raise NotImplementedError
+
+    def sweep(self):
+        """Remove expired sessions; returns how many were removed"""
+        raise NotImplementedError
+
+    def stats(self):
+        raise NotImplementedError
+
+    def _ensure_sweeper(self):
+        # Threads do not survive fork, so each prefork worker starts its own
+        if not self.sweep_interval or self.sweeper_pid == os.getpid():
+            return
+        with self.lock:
+            if self.sweeper_pid == os.getpid():
+                return
+            self.sweeper_pid = os.getpid()
+        thread = threading.Thread(target=self._sweep_loop, name='session-sweeper', daemon=True)
+        thread.start()
+
+    def _sweep_loop(self):
+        while True:
+            time.sleep(self.sweep_interval)
+            try:
+                self.sweep()
+            except Exception as e:
+                print(f"Error sweeping sessions: {e}")
+
+
+class SessionStore(SessionBackend):
+    """
+    Thread-safe in-memory sessions with sliding expiry and bounded size
+
+    Every successful lookup pushes a session's expiry out to ttl seconds
+    from now, up to max_lifetime seconds after login (0 means no cap).
+    Expiry times sit in a min-heap, so the background sweeper only looks
+    at sessions that are due. A lookup moves the heap entry lazily: when
+    the sweeper pops an entry whose session has since been extended, it
+    pushes it back with the new time. Sessions are also kept in LRU order;
+    past max_count the least recently used are evicted. A per-user index
+    finds all of one user's sessions for "log out everywhere".
+    """
+
+    def __init__(self, ttl=3600, max_lifetime=86400, max_count=100000, sweep_interval=60):
+        self.ttl = ttl
+        self.max_lifetime = max_lifetime
+        self.max_count = max_count
+        self.sweep_interval = sweep_interval
+        self.sessions = OrderedDict()
+        self.by_user = {}
+        self.user_versions = {}
+        self.expiry_heap = []
+        self.lock = threading.Lock()
+        self.sweeper_pid = None
+
+        self.created = 0
+        self.expired = 0
+        self.evicted = 0
+        self.sweeps = 0
+
+    def _expiry(self, session, now):
+        expires_at = now + self.ttl
+        if self.max_lifetime:
+            expires_at = min(expires_at, session.created_at + self.max_lifetime)
+        return expires_at
+
+    def add(self, session):
+        """Store a new session, evicting the least recently used ones past max_count"""
+        self._ensure_sweeper()
+        with self.lock:
+            session.expires_at = self._expiry(session, time.time())
+            session.user_version = self.user_versions.get(session.user_id, 0)
+            self.sessions[session.session_id] = session
+            self.by_user.setdefault(session.user_id, set()).add(session.session_id)
+            heapq.heappush(self.expiry_heap, (session.expires_at, session.session_id))
+            self.created += 1
+            while len(self.sessions) > self.max_count:
+                self._remove(next(iter(self.sessions)))
+                self.evicted += 1
+
+    def get(self, session_id):
+        """The live session with this id, with its expiry extended; None if unknown or expired"""
+        now = time.time()
+        with self.lock:
+            session = self.sessions.get(session_id)
+            if session is None:
+                return None
+            if not session.is_active or now > session.expires_at:
+                self._remove(session_id)
+                self.expired += 1
+                return None
+            session.expires_at = self._expiry(session, now)
+            session.user_version = self.user_versions.get(session.user_id, 0)
+            self.sessions.move_to_end(session_id)
+            return session
+
+    def remove(self, session_id):
+        with self.lock:
+            self._remove(session_id)
+
+    def remove_user(self, user_id):
+        """End every session of a user; returns how many there were"""
+        with self.lock:
+            session_ids = list(self.by_user.get(user_id, ()))
+            for session_id in session_ids:
+                self._remove(session_id)
+            return len(session_ids)
+
+    def set_user(self, session, user):
+        with self.lock:
+            if session.user_version == self.user_versions.get(session.user_id, 0):
+                session.user = user
+                session.role = user['role']
+
+    def forget_users(self, user_ids):
+        with self.lock:
+            for user_id in user_ids:
+                self.user_versions[user_id] = self.user_versions.get(user_id, 0) + 1
+                for session_id in self.by_user.get(user_id, ()):
+                    self.sessions[session_id].user = None
+
+    def _remove(self, session_id):
+        # Heap entries for removed sessions are skipped when they come up
+        session = self.sessions.pop(session_id, None)
+        if session is None:
+            return
+        session.is_active = False
+        user_sessions = self.by_user.get(session.user_id)
+        if user_sessions is not None:
+            user_sessions.discard(session_id)
+            if not user_sessions:
+                del self.by_user[session.user_id]
+
+    def sweep(self):
+        """Remove every session that has expired; returns how many were removed"""
+        now = time.time()
+        removed = 0
+        with self.lock:
+            while self.expiry_heap and self.expiry_heap[0][0] <= now:
+                _, session_id = heapq.heappop(self.expiry_heap)
+                session = self.sessions.get(session_id)
+                if session is None:
+                    continue
+                if session.expires_at > now:
+                    # Extended by a lookup since this entry was pushed
+                    heapq.heappush(self.expiry_heap, (session.expires_at, session_id))
+                    continue
+                self._remove(session_id)
+                removed += 1
+
+            # Entries of removed sessions linger until they come due; rebuild once they dominate
+            if len(self.expiry_heap) > 2 * len(self.sessions) + 1024:
+                self.expiry_heap = [(session.expires_at, session_id) for session_id, session in self.sessions.items()]
+                heapq.heapify(self.expiry_heap)
+
+            self.expired += removed
+            self.sweeps += 1
+        return removed
+
+    def stats(self):
+        with self.lock:
+            return {
+                'backend': 'memory',
+                'sessions': len(self.sessions),
+                'users': len(self.by_user),
+                'max_count': self.max_count,
+                'ttl': self.ttl,
+                'max_lifetime': self.max_lifetime,
+                'heap_entries': len(self.expiry_heap),
+                'created': self.created,
+                'expired': self.expired,
+                'evicted': self.evicted,
+                'sweeps': self.sweeps
+            }
@@ -0,0 +1,213 @@
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dotenv import load_dotenv
+from auth.session_store import Session, SessionBackend
+
+# Load environment variables from .env file
+load_dotenv()
+
+# SQLite session backend settings
+SESSION_SQLITE_PATH = os.getenv(
+    "SESSION_SQLITE_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'sessions.db')
+)
+SESSION_TOUCH_INTERVAL = float(os.getenv("SESSION_TOUCH_INTERVAL", 60))
+
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS sessions (
+      session_id TEXT PRIMARY KEY,
+      user_id INTEGER NOT NULL,
+      role TEXT NOT NULL,
+      created_at REAL NOT NULL,
+      expires_at REAL NOT NULL,
+      last_used REAL NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS idx_sessions_user_id ON sessions (user_id);
+    CREATE INDEX IF NOT EXISTS idx_sessions_expires_at ON sessions (expires_at);
+    CREATE INDEX IF NOT EXISTS idx_sessions_last_used ON sessions (last_used);
+    CREATE TABLE IF NOT EXISTS user_versions (
+      user_id INTEGER PRIMARY KEY,
+      version INTEGER NOT NULL
+    );
+"""
+
+
+class SQLiteSessionStore(SessionBackend):
+    """
+    Sessions in a local SQLite file shared by every worker process
+
+    A login handled by one prefork worker is seen by the others without
+    sticky sessions. The file is opened in WAL mode, so lookups never wait
+    for writers, and each thread keeps its own connection (reopened after
+    fork). A lookup is one primary-key read. It only writes the extended
+    expiry back once that has moved by touch_interval seconds, so active
+    sessions cost one write a minute instead of one per request.
+
+    User snapshots are kept per process, because they hold MySQL rows.
+    Whether one is current is shared: forget_users() bumps the user's
+    version in the file, and each lookup reads that version with the
+    session. A snapshot taken under an older version is read again.
+
+    Expired sessions are deleted by each process's sweeper, which also
+    evicts the least recently used sessions past max_count.
+    """
+
+    def __init__(self, path, ttl=3600, max_lifetime=86400, max_count=100000, sweep_interval=60, touch_interval=60):
+        self.path = path
+        self.ttl = ttl
+        self.max_lifetime = max_lifetime
+        self.max_count = max_count
+        self.sweep_interval = sweep_interval
+        self.touch_interval = touch_interval
+        self.local = threading.local()
+        self.snapshots = OrderedDict()
+        self.lock = threading.Lock()
+        self.sweeper_pid = None
+
+        self.created = 0
+        self.expired = 0
+        self.evicted = 0
+        self.sweeps = 0
+
+        connection = self._connection()
+        connection.executescript(SCHEMA)
+        # Sessions are credentials; keep the file private to this user
+        os.chmod(self.path, 0o600)
+
+    def _connection(self):
+        # Connections must not cross fork, so they are keyed by process as well as thread
+        if getattr(self.local, 'pid', None) != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            connection.row_factory = sqlite3.Row
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self.local.connection = connection
+            self.local.pid = os.getpid()
+        return self.local.connection
+
+    def _expiry(self, created_at, now):
+        expires_at = now + self.ttl
+        if self.max_lifetime:
+            expires_at = min(expires_at, created_at + self.max_lifetime)
+        return expires_at
+
+    def _version(self, connection, user_id):
+        row = connection.execute("SELECT version FROM user_versions WHERE user_id = ?", (user_id,)).fetchone()
+        return row['version'] if row else 0
+
+    def add(self, session):
+        self._ensure_sweeper()
+        now = time.time()
+        session.expires_at = self._expiry(session.created_at, now)
+        connection = self._connection()
+        connection.execute(
+            "INSERT INTO sessions (session_id, user_id, role, created_at, expires_at, last_used) VALUES (?, ?, ?, ?, ?, ?)",
+            (session.session_id, session.user_id, session.role, session.created_at, session.expires_at, now)
+        )
+        session.user_version = self._version(connection, session.user_id)
+        with self.lock:
+            self.created += 1
+
+    def get(self, session_id):
+        now = time.time()
+        connection = self._connection()
+        row = connection.execute("""
+            SELECT s.*, COALESCE(v.version, 0) as version
+            FROM sessions s
+            LEFT JOIN user_versions v ON v.user_id = s.user_id
+            WHERE s.session_id = ?
+        """, (session_id,)).fetchone()
+        if row is None:
+            return None
+        if now > row['expires_at']:
+            connection.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+            with self.lock:
+                self.expired += 1
+            return None
+
+        expires_at = self._expiry(row['created_at'], now)
+        # With a TTL shorter than the interval, write at half the TTL so the session can still slide
+        if expires_at - row['expires_at'] >= min(self.touch_interval, self.ttl / 2):
+            connection.execute(
+                "UPDATE sessions SET expires_at = ?, last_used = ? WHERE session_id = ?",
+                (expires_at, now, session_id)
+            )
+        else:
+            expires_at = row['expires_at']
+
+        session = Session(row['user_id'], row['role'])
+        session.session_id = row['session_id']
+        session.created_at = row['created_at']
+        session.expires_at = expires_at
+        session.user_version = row['version']
+        with self.lock:
+            snapshot = self.snapshots.get(row['user_id'])
+            if snapshot is not None and snapshot[0] == row['version']:
+                self.snapshots.move_to_end(row['user_id'])
+                session.user = snapshot[1]
+                session.role = snapshot[1]['role']
+        return session
+
+    def remove(self, session_id):
+        self._connection().execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+
+    def remove_user(self, user_id):
+        cursor = self._connection().execute("DELETE FROM sessions WHERE user_id = ?", (user_id,))
+        return cursor.rowcount
+
+    def set_user(self, session, user):
+        with self.lock:
+            self.snapshots[session.user_id] = (session.user_version, user)
+            self.snapshots.move_to_end(session.user_id)
+            while len(self.snapshots) > self.max_count:
+                self.snapshots.popitem(last=False)
+        session.user = user
+        session.role = user['role']
+
+    def forget_users(self, user_ids):
+        with self.lock:
+            for user_id in user_ids:
+                self.snapshots.pop(user_id, None)
+        # Other processes see the new version on their next lookup of these users' sessions
+        self._connection().executemany("""
+            INSERT INTO user_versions (user_id, version) VALUES (?, 1)
+            ON CONFLICT (user_id) DO UPDATE SET version = version + 1
+        """, [(user_id,) for user_id in user_ids])
+
+    def sweep(self):
+        connection = self._connection()
+        removed = connection.execute("DELETE FROM sessions WHERE expires_at <= ?", (time.time(),)).rowcount
+        evicted = connection.execute("""
+            DELETE FROM sessions WHERE session_id IN (
+              SELECT session_id FROM sessions ORDER BY last_used DESC LIMIT -1 OFFSET ?
+            )
+        """, (self.max_count,)).rowcount
+        with self.lock:
+            self.expired += removed
+            self.evicted += evicted
+            self.sweeps += 1
+        return removed
+
+    def stats(self):
+        row = self._connection().execute(
+            "SELECT COUNT(*) as sessions, COUNT(DISTINCT user_id) as users FROM sessions"
+        ).fetchone()
+        with self.lock:
+            return {
+                'backend': 'sqlite',
+                'path': self.path,
+                'sessions': row['sessions'],
+                'users': row['users'],
+                'max_count': self.max_count,
+                'ttl': self.ttl,
+                'max_lifetime': self.max_lifetime,
+                'touch_interval': self.touch_interval,
+                'snapshots': len(self.snapshots),
+                'created': self.created,
+                'expired': self.expired,
+                'evicted': self.evicted,
+                'sweeps': self.sweeps
+            }
@@ -1,6 +1,8 @@
 import io
 from models.artist_model import Artist
 from auth.auth_handler import requires_role, requires_auth
+from routing.pagination import get_page_params, build_pagination
+from serving.streaming import StreamBody
 
 def register_artist_routes(route):
     """Register all artist-related routes with the router"""
@@ -9,27 +11,30 @@ def register_artist_routes(route):
     @requires_role(['super_admin', 'artist_manager', 'artist'])
     def get_artists(request):
         """Get all artists with pagination"""
-        page = int(request.query_params.get('page', 1))
-        per_page = int(request.query_params.get('per_page', 10))
+        try:
+            page, per_page, after_id = get_page_params(request.query_params)
+        except ValueError:
+            return {
+                'status': 400,
+                'body': {'success': False, 'message': 'Invalid pagination parameters'}
+            }
+        
         search = request.query_params.get('search', '')
         
         if search:
-            artists = Artist.search(search, page, per_page)
+            ids = Artist.search_ids(search)
+            artists = Artist.search(search, page, per_page, after_id, ids=ids)
+            # The index's matches are the total; only the LIKE fallback needs a COUNT
+            total = len(ids) if ids is not None else Artist.count(search)
         else:
-            artists = Artist.get_all(page, per_page)
-            
-        total = Artist.count()
+            artists = Artist.get_all(page, per_page, after_id)
+            total = Artist.count(estimate=True)
         
         return {
             'status': 200,
             'body': {
                 'artists': artists,
-                'pagination': {
-                    'page': page,
-                    'per_page': per_page,
-                    'total': total,
-                    'total_pages': (total + per_page - 1) // per_page
-                }
+                'pagination': build_pagination(artists, page, per_page, total, after_id)
             }
         }
     
@@ -75,7 +80,7 @@ def register_artist_routes(route):
     @requires_role(['super_admin', 'artist_manager'])
     def get_artist(request):
         """Get an artist by ID"""
-        artist_id = request.path.split('/')[-1]
+        artist_id = request.path_params['id']
         
         artist = Artist.get_by_id(artist_id)
         if not artist:
@@ -93,7 +98,7 @@ def register_artist_routes(route):
     @requires_role(['artist_manager'])
     def update_artist(request):
         """Update an artist"""
-        artist_id = request.path.split('/')[-1]
+        artist_id = request.path_params['id']
         data = request.json_data or request.form_data
         
         # Check if artist exists
@@ -131,7 +136,7 @@ def register_artist_routes(route):
     @requires_role(['artist_manager'])
     def delete_artist(request):
         """Delete an artist"""
-        artist_id = request.path.split('/')[-1]
+        artist_id = request.path_params['id']
         
         # Check if artist exists
         artist = Artist.get_by_id(artist_id)
@@ -170,9 +175,8 @@ def register_artist_routes(route):
             }
         
         # Get file content
-        file_content = ''
-        if isinstance(data['csv_file'], dict):  # Multipart form data
-            file_content = data['csv_file']['value'].decode('utf-8')
+        if isinstance(data['csv_file'], dict):  # Multipart form data, read as a stream
+            file_content = io.TextIOWrapper(data['csv_file']['file'], encoding='utf-8', newline='')
         else:  # Plain text
             file_content = data['csv_file']
         
@@ -200,18 +204,17 @@ def register_artist_routes(route):
     @requires_role(['artist_manager'])
     def export_artists(request):
         """Export artists to CSV"""
-        csv_content = Artist.export_to_csv()
-        
-        if not csv_content:
+        if not Artist.count():
             return {
                 'status': 404,
                 'body': {'success': False, 'message': 'No artists found'}
             }
         
+        # Streamed so the export runs in constant memory however many artists there are
         return {
             'status': 200,
             'content_type': 'text/csv',
-            'body': csv_content,
+            'body': StreamBody(Artist.export_to_csv()),
             'headers': {
                 'Content-Disposition': 'attachment; filename=artists.csv'
             }
@@ -1,9 +1,13 @@
 from controllers.user_controller import register_user_routes
 from controllers.artist_controller import register_artist_routes
 from controllers.music_controller import register_music_routes
+from controllers.metrics_controller import register_metrics_routes
+from controllers.suggest_controller import register_suggest_routes
 
 def register_all_routes(route):
     """Register all routes with the router"""
     register_user_routes(route)
     register_artist_routes(route)
-    register_music_routes(route)
\ No newline at end of file
+    register_music_routes(route)
+    register_metrics_routes(route)
+    register_suggest_routes(route)
\ No newline at end of file
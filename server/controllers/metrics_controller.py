@@ -0,0 +1,27 @@
+from database.db_connection import get_pool_stats
+from services.count_service import counts
+from services.counters import counters
+from services.entity_cache import entity_cache_stats
+from services.query_cache import query_cache
+from services.search_index import index_stats
+from auth.auth_handler import requires_role, session_stats
+
+def register_metrics_routes(route):
+    """Register runtime metrics routes with the router"""
+    
+    @route('/api/metrics', methods=['GET'])
+    @requires_role(['super_admin'])
+    def get_metrics(request):
+        """Get connection pool and cache statistics"""
+        return {
+            'status': 200,
+            'body': {
+                'db_pool': get_pool_stats(),
+                'count_cache': counts.stats(),
+                'aggregate_counters': counters.stats(),
+                'entity_cache': entity_cache_stats(),
+                'query_cache': query_cache.stats(),
+                'sessions': session_stats(),
+                'search_index': index_stats()
+            }
+        }
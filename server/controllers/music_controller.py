@@ -1,6 +1,7 @@
 from models.music_model import Music
 from models.artist_model import Artist
 from auth.auth_handler import requires_role, requires_auth
+from routing.pagination import get_page_params, build_pagination
 
 def register_music_routes(route):
     """Register all music-related routes with the router"""
@@ -9,27 +10,30 @@ def register_music_routes(route):
     @requires_role(['super_admin', 'artist_manager', 'artist'])
     def get_all_music(request):
         """Get all music with pagination"""
-        page = int(request.query_params.get('page', 1))
-        per_page = int(request.query_params.get('per_page', 10))
+        try:
+            page, per_page, after_id = get_page_params(request.query_params)
+        except ValueError:
+            return {
+                'status': 400,
+                'body': {'success': False, 'message': 'Invalid pagination parameters'}
+            }
+        
         search = request.query_params.get('search', '')
         
         if search:
-            music_list = Music.search(search, page, per_page)
+            ids = Music.search_ids(search)
+            music_list = Music.search(search, page, per_page, after_id, ids=ids)
+            # The index's matches are the total; only the LIKE fallback needs a COUNT
+            total = len(ids) if ids is not None else Music.count(search)
         else:
-            music_list = Music.get_all(page, per_page)
-            
-        total = Music.count()
+            music_list = Music.get_all(page, per_page, after_id)
+            total = Music.count(estimate=True)
         
         return {
             'status': 200,
             'body': {
                 'music': music_list,
-                'pagination': {
-                    'page': page,
-                    'per_page': per_page,
-                    'total': total,
-                    'total_pages': (total + per_page - 1) // per_page
-                }
+                'pagination': build_pagination(music_list, page, per_page, total, after_id)
             }
         }
     
@@ -37,9 +41,14 @@ def register_music_routes(route):
     @requires_role(['super_admin', 'artist_manager', 'artist'])
     def get_artist_music(request):
         """Get all music for a specific artist with pagination"""
-        artist_id = request.path.split('/')[-2]
-        page = int(request.query_params.get('page', 1))
-        per_page = int(request.query_params.get('per_page', 10))
+        artist_id = request.path_params['artist_id']
+        try:
+            page, per_page, after_id = get_page_params(request.query_params)
+        except ValueError:
+            return {
+                'status': 400,
+                'body': {'success': False, 'message': 'Invalid pagination parameters'}
+            }
         
         # Check if artist exists
         artist = Artist.get_by_id(artist_id)
@@ -49,20 +58,15 @@ def register_music_routes(route):
                 'body': {'success': False, 'message': 'Artist not found'}
             }
         
-        music_list = Music.get_by_artist(artist_id, page, per_page)
-        total = Music.count_by_artist(artist_id)
+        music_list = Music.get_by_artist(artist_id, page, per_page, after_id)
+        total = Music.count_by_artist(artist['id'])
         
         return {
             'status': 200,
             'body': {
                 'artist': artist,
                 'music': music_list,
-                'pagination': {
-                    'page': page,
-                    'per_page': per_page,
-                    'total': total,
-                    'total_pages': (total + per_page - 1) // per_page
-                }
+                'pagination': build_pagination(music_list, page, per_page, total, after_id)
             }
         }
     
@@ -70,7 +74,7 @@ def register_music_routes(route):
     @requires_role(['artist'])
     def create_music(request):
         """Create a new song for an artist"""
-        artist_id = request.path.split('/')[-2]
+        artist_id = request.path_params['artist_id']
         data = request.json_data or request.form_data
         
         # Check if artist exists
@@ -132,7 +136,7 @@ def register_music_routes(route):
     @requires_role(['super_admin', 'artist_manager', 'artist'])
     def get_music(request):
         """Get a song by ID"""
-        music_id = request.path.split('/')[-1]
+        music_id = request.path_params['id']
         
         music = Music.get_by_id(music_id)
         if not music:
@@ -150,7 +154,7 @@ def register_music_routes(route):
     @requires_role(['artist'])
     def update_music(request):
         """Update a song"""
-        music_id = request.path.split('/')[-1]
+        music_id = request.path_params['id']
         data = request.json_data or request.form_data
         
         # Check if music exists
@@ -207,7 +211,7 @@ def register_music_routes(route):
     @requires_role(['artist'])
     def delete_music(request):
         """Delete a song"""
-        music_id = request.path.split('/')[-1]
+        music_id = request.path_params['id']
         
         # Check if music exists
         music = Music.get_by_id(music_id)
@@ -247,9 +251,14 @@ def register_music_routes(route):
     @requires_role(['super_admin', 'artist_manager', 'artist'])
     def get_music_by_genre(request):
         """Get music by genre with pagination"""
-        genre = request.path.split('/')[-1]
-        page = int(request.query_params.get('page', 1))
-        per_page = int(request.query_params.get('per_page', 10))
+        genre = request.path_params['genre']
+        try:
+            page, per_page, after_id = get_page_params(request.query_params)
+        except ValueError:
+            return {
+                'status': 400,
+                'body': {'success': False, 'message': 'Invalid pagination parameters'}
+            }
         
         # Validate genre
         valid_genres = ['rnb', 'country', 'classic', 'jazz']
@@ -259,22 +268,15 @@ def register_music_routes(route):
                 'body': {'success': False, 'message': 'Invalid genre'}
             }
         
-        music_list = Music.get_by_genre(genre, page, per_page)
+        music_list = Music.get_by_genre(genre, page, per_page, after_id)
         
-        # Count would be more efficient with a dedicated count_by_genre method,
-        # but we'll use this approach for simplicity
-        total = len(Music.get_by_genre(genre, 1, 1000000))
+        total = Music.count_by_genre(genre)
         
         return {
             'status': 200,
             'body': {
                 'genre': genre,
                 'music': music_list,
-                'pagination': {
-                    'page': page,
-                    'per_page': per_page,
-                    'total': total,
-                    'total_pages': (total + per_page - 1) // per_page
-                }
+                'pagination': build_pagination(music_list, page, per_page, total, after_id)
             }
         }
\ No newline at end of file
@@ -0,0 +1,52 @@
+from auth.auth_handler import requires_role
+from services.search_index import SUGGEST_INDEXES
+
+def register_suggest_routes(route):
+    """Register autocomplete routes with the router"""
+
+    @route('/api/suggest', methods=['GET'])
+    @requires_role(['super_admin', 'artist_manager', 'artist'])
+    def suggest(request):
+        """Get prefix completions for artist names, song titles, album names or user emails"""
+        prefix = request.query_params.get('q', '')
+        suggest_type = request.query_params.get('type', 'artists')
+
+        index = SUGGEST_INDEXES.get(suggest_type)
+        if index is None:
+            return {
+                'status': 400,
+                'body': {
+                    'success': False,
+                    'message': f"type must be one of: {', '.join(SUGGEST_INDEXES)}"
+                }
+            }
+
+        # User emails are only visible to super admins
+        if suggest_type == 'users' and request.user['role'] != 'super_admin':
+            return {
+                'status': 403,
+                'body': {'success': False, 'message': 'Forbidden: You do not have permission to access this resource'}
+            }
+
+        try:
+            limit = min(max(int(request.query_params.get('limit', 10)), 1), 50)
+        except ValueError:
+            return {
+                'status': 400,
+                'body': {'success': False, 'message': 'limit must be a number'}
+            }
+
+        suggestions = index.complete(prefix, limit)
+        if suggestions is None:
+            return {
+                'status': 503,
+                'body': {'success': False, 'message': 'Suggestions are not available'}
+            }
+
+        return {
+            'status': 200,
+            'body': {
+                'type': suggest_type,
+                'suggestions': suggestions
+            }
+        }
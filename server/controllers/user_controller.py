@@ -1,24 +1,6 @@
 from models.user_model import User
 from auth.auth_handler import requires_role
-import datetime
-
-def serialize_datetime(obj):
-    """Convert datetime objects to ISO format strings in a dictionary or list."""
-    if isinstance(obj, dict):
-        for key, value in obj.items():
-            if isinstance(value, (datetime.date, datetime.datetime)):
-                obj[key] = value.isoformat()
-            elif isinstance(value, dict):
-                serialize_datetime(value)
-            elif isinstance(value, list):
-                for item in value:
-                    if isinstance(item, dict):
-                        serialize_datetime(item)
-    elif isinstance(obj, list):
-        for item in obj:
-            if isinstance(item, dict):
-                serialize_datetime(item)
-    return obj
+from routing.pagination import get_page_params, build_pagination
 
 def register_user_routes(route):
     """Register all user-related routes with the router"""
@@ -27,30 +9,27 @@ def register_user_routes(route):
     @requires_role(['super_admin'])
     def get_users(request):
         """Get all users with pagination"""
-        page = int(request.query_params.get('page', 1))
-        per_page = int(request.query_params.get('per_page', 10))
+        try:
+            page, per_page, after_id = get_page_params(request.query_params)
+        except ValueError:
+            return {
+                'status': 400,
+                'body': {'success': False, 'message': 'Invalid pagination parameters'}
+            }
         
-        users = User.get_all(page, per_page)
-        total = User.count()
+        users = User.get_all(page, per_page, after_id)
+        total = User.count(estimate=True)
         
         # Remove password hash from response
         for user in users:
             if 'password' in user:
                 del user['password']
         
-        # Serialize datetime objects to strings
-        serialize_datetime(users)
-        
         return {
             'status': 200,
             'body': {
                 'users': users,
-                'pagination': {
-                    'page': page,
-                    'per_page': per_page,
-                    'total': total,
-                    'total_pages': (total + per_page - 1) // per_page
-                }
+                'pagination': build_pagination(users, page, per_page, total, after_id)
             }
         }
     
@@ -116,7 +95,7 @@ def register_user_routes(route):
     @requires_role(['super_admin'])
     def get_user(request):
         """Get a user by ID"""
-        user_id = request.path.split('/')[-1]
+        user_id = request.path_params['id']
         
         user = User.get_by_id(user_id)
         if not user:
@@ -129,9 +108,6 @@ def register_user_routes(route):
         if 'password' in user:
             del user['password']
         
-        # Serialize datetime objects to strings
-        serialize_datetime(user)
-        
         return {
             'status': 200,
             'body': {'user': user}
@@ -141,7 +117,7 @@ def register_user_routes(route):
     @requires_role(['super_admin'])
     def update_user(request):
         """Update a user"""
-        user_id = request.path.split('/')[-1]
+        user_id = request.path_params['id']
         data = request.json_data or request.form_data
         
         # Check if user exists
@@ -190,20 +166,27 @@ def register_user_routes(route):
     @requires_role(['super_admin'])
     def delete_user(request):
         """Delete a user"""
-        user_id = request.path.split('/')[-1]
+        user_id = request.path_params['id']
         
-        # Check if user exists
-        user = User.get_by_id(user_id)
+        # Check if user exists, locking the row so its role cannot change before the delete
+        user = User.get_for_update(user_id)
         if not user:
             return {
                 'status': 404,
                 'body': {'success': False, 'message': 'User not found'}
             }
         
-        # Prevent deleting the last super_admin
+        # Prevent deleting the last super_admin. Only then are all the admins read and locked
+        # until this request commits, so concurrent deletes in other workers cannot both pass,
+        # while deleting any other user leaves the admins' rows alone
         if user['role'] == 'super_admin':
-            super_admins = User.get_by_role('super_admin')
-            if len(super_admins) <= 1:
+            admin_ids = User.get_ids_by_role_for_update('super_admin')
+            if admin_ids is None:
+                return {
+                    'status': 500,
+                    'body': {'success': False, 'message': 'Failed to delete user'}
+                }
+            if len(admin_ids) <= 1:
                 return {
                     'status': 400,
                     'body': {
@@ -242,9 +225,6 @@ def register_user_routes(route):
         if 'password' in user:
             del user['password']
         
-        # Serialize datetime objects to strings
-        serialize_datetime(user)
-        
         return {
             'status': 200,
             'body': {'user': user}
@@ -1,64 +1,591 @@
+import os
+import re
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
 import mysql.connector
 from mysql.connector import Error
+from dotenv import load_dotenv
+
+# Load environment variables from .env file
+load_dotenv()
+
+# Database connection settings
+DB_CONFIG = {
+    'host': os.getenv("DB_HOST", "localhost"),
+    'user': os.getenv("DB_USER", "root"),
+    'password': os.getenv("DB_PASSWORD", "root"),
+    'database': os.getenv("DB_NAME", "artist_management")
+}
+
+# Connection pool settings
+DB_POOL_MIN_SIZE = int(os.getenv("DB_POOL_MIN_SIZE", 2))
+DB_POOL_MAX_SIZE = int(os.getenv("DB_POOL_MAX_SIZE", 20))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 10))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 1800))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+
+# Batched write settings
+DB_BATCH_SIZE = int(os.getenv("DB_BATCH_SIZE", 1000))
+DB_BATCH_MAX_PACKET_SIZE = int(os.getenv("DB_BATCH_MAX_PACKET_SIZE", 1024 * 1024))
+
+# Rows pulled from the server per round trip by stream_query
+DB_STREAM_FETCH_SIZE = int(os.getenv("DB_STREAM_FETCH_SIZE", 500))
+
+
+class ConnectionPool:
+    """
+    Thread-safe pool of MySQL connections
+
+    Connections are opened on demand up to max_size and kept idle for reuse.
+    On checkout a connection older than recycle seconds is replaced, and with
+    pre_ping a dead one is replaced as well. When every connection is in use,
+    callers wait up to timeout seconds for one to be returned.
+    """
+
+    def __init__(self, config, min_size=2, max_size=20, timeout=10, recycle=1800, pre_ping=True):
+        self.config = config
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.recycle = recycle
+        self.pre_ping = pre_ping
+
+        self.idle = deque()
+        self.created_at = {}
+        self.size = 0
+        self.condition = threading.Condition()
+
+        self.checkouts = 0
+        self.waits = 0
+        self.wait_time = 0.0
+        self.timeouts = 0
+        self.created = 0
+        self.recycled = 0
+        self.ping_failures = 0
+
+        for _ in range(min_size):
+            with self.condition:
+                self.size += 1
+            connection = self._open()
+            if connection is None:
+                break
+            self.idle.append(connection)
+
+    def _open(self):
+        """Open a connection for a slot the caller already reserved in self.size"""
+        try:
+            connection = mysql.connector.connect(**self.config)
+            # Reads must not pin an old snapshot on a reused connection;
+            # explicit transactions use start_transaction()
+            connection.autocommit = True
+        except Error as e:
+            print(f"Error connecting to MySQL database: {e}")
+            with self.condition:
+                self.size -= 1
+                self.condition.notify()
+            return None
+
+        with self.condition:
+            self.created += 1
+            self.created_at[id(connection)] = time.monotonic()
+        return connection
+
+    def _discard(self, connection):
+        with self.condition:
+            self.size -= 1
+            self.created_at.pop(id(connection), None)
+            self.condition.notify()
+        try:
+            connection.close()
+        except Error:
+            pass
+
+    def _is_usable(self, connection):
+        age = time.monotonic() - self.created_at.get(id(connection), 0)
+        if self.recycle and age > self.recycle:
+            self.recycled += 1
+            return False
+
+        if self.pre_ping:
+            try:
+                connection.ping(reconnect=False)
+            except Error:
+                self.ping_failures += 1
+                return False
+        return True
+
+    def acquire(self):
+        """Check out a connection, or return None if none is available within the timeout"""
+        deadline = None
+        waited_since = None
+
+        while True:
+            connection = None
+            with self.condition:
+                while not self.idle and self.size >= self.max_size:
+                    if deadline is None:
+                        deadline = time.monotonic() + self.timeout
+                        waited_since = time.monotonic()
+                        self.waits += 1
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self.timeouts += 1
+                        self.wait_time += time.monotonic() - waited_since
+                        print("Error connecting to MySQL database: connection pool exhausted")
+                        return None
+                    self.condition.wait(remaining)
+
+                if waited_since is not None:
+                    self.wait_time += time.monotonic() - waited_since
+                    waited_since = None
+
+                if self.idle:
+                    connection = self.idle.pop()
+                else:
+                    # Reserve a slot, then connect outside the lock
+                    self.size += 1
+
+            if connection is None:
+                connection = self._open()
+                if connection is None:
+                    return None
+            elif not self._is_usable(connection):
+                self._discard(connection)
+                continue
+
+            with self.condition:
+                self.checkouts += 1
+            return connection
+
+    def release(self, connection, discard=False):
+        """Return a connection to the pool, closing it if it is broken"""
+        if not discard:
+            try:
+                if getattr(connection, 'in_transaction', False):
+                    connection.rollback()
+            except Error:
+                discard = True
+
+        if discard:
+            self._discard(connection)
+            return
+
+        with self.condition:
+            self.idle.append(connection)
+            self.condition.notify()
+
+    def stats(self):
+        with self.condition:
+            return {
+                'size': self.size,
+                'idle': len(self.idle),
+                'in_use': self.size - len(self.idle),
+                'min_size': self.min_size,
+                'max_size': self.max_size,
+                'checkouts': self.checkouts,
+                'waits': self.waits,
+                'wait_time_seconds': round(self.wait_time, 6),
+                'timeouts': self.timeouts,
+                'created': self.created,
+                'recycled': self.recycled,
+                'ping_failures': self.ping_failures
+            }
+
+
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+
+def get_pool():
+    """Return this process's connection pool, creating it on first use"""
+    global _pool, _pool_pid
+    # Forked workers must not share the parent's sockets, so pools are per process
+    if _pool is None or _pool_pid != os.getpid():
+        with _pool_lock:
+            if _pool is None or _pool_pid != os.getpid():
+                _pool = ConnectionPool(
+                    DB_CONFIG,
+                    min_size=DB_POOL_MIN_SIZE,
+                    max_size=DB_POOL_MAX_SIZE,
+                    timeout=DB_POOL_TIMEOUT,
+                    recycle=DB_POOL_RECYCLE,
+                    pre_ping=DB_POOL_PRE_PING
+                )
+                _pool_pid = os.getpid()
+    return _pool
+
+def get_pool_stats():
+    """Connection pool counters for the metrics endpoint"""
+    return get_pool().stats()
 
 def get_connection():
     """
-    Create a connection to the MySQL database
-    Returns a connection object or None if connection fails
+    Check out a connection to the MySQL database from the pool
+    Returns a connection object or None if connection fails;
+    hand it back with release_connection()
+    """
+    return get_pool().acquire()
+
+def release_connection(connection, discard=False):
+    """Return a connection obtained from get_connection() to the pool"""
+    get_pool().release(connection, discard)
+
+class UnitOfWork:
+    """
+    One connection and one transaction shared by every query in a block
+
+    The connection is checked out lazily on the first query, so blocks that
+    never touch the database cost nothing. Callbacks registered with
+    on_commit() run only if the block commits. See transaction().
+    """
+
+    def __init__(self):
+        self.connection = None
+        self.failed = False
+        self.rollback_only = False
+        # Set by finish(): whether the block's writes were committed
+        self.committed = False
+        self.after_commit = []
+        # Tables written in this block; caches read them from the database until it ends
+        self.tables_written = set()
+
+    def get_connection(self):
+        if self.connection is None:
+            connection = get_connection()
+            if connection is None:
+                return None
+            try:
+                connection.start_transaction()
+            except Error as e:
+                print(f"Error starting transaction: {e}")
+                release_connection(connection, discard=True)
+                return None
+            self.connection = connection
+        return self.connection
+
+    def mark_rollback_only(self):
+        """Roll back at the end of the block instead of committing"""
+        self.rollback_only = True
+
+    def finish(self, commit):
+        commit = commit and not self.failed and not self.rollback_only
+        committed = self._end(commit)
+        self.committed = committed
+
+        callbacks = self.after_commit
+        self.after_commit = []
+        if committed:
+            for callback in callbacks:
+                try:
+                    callback()
+                except Exception as e:
+                    print(f"Error in on_commit callback: {e}")
+        return committed
+
+    def _end(self, commit):
+        if self.connection is None:
+            return commit
+
+        connection = self.connection
+        self.connection = None
+        broken = False
+        committed = False
+        try:
+            if commit:
+                connection.commit()
+                committed = True
+            else:
+                connection.rollback()
+        except Error as e:
+            print(f"Error finishing transaction: {e}")
+            broken = True
+            try:
+                connection.rollback()
+            except Error:
+                pass
+        finally:
+            release_connection(connection, discard=broken)
+        return committed
+
+
+_local = threading.local()
+
+def current_unit_of_work():
+    """The unit of work open on this thread, or None"""
+    return getattr(_local, 'unit_of_work', None)
+
+def on_commit(callback):
+    """
+    Run callback once the open transaction() block commits
+    Outside a block the write has already been committed, so it runs at once
     """
+    unit = current_unit_of_work()
+    if unit is None:
+        callback()
+    else:
+        unit.after_commit.append(callback)
+
+def mark_written(*tables):
+    """Note that the open transaction() block has written to tables; does nothing outside one"""
+    unit = current_unit_of_work()
+    if unit is not None:
+        unit.tables_written.update(tables)
+
+def has_written(table):
+    """Whether the open transaction() block has uncommitted writes to table"""
+    unit = current_unit_of_work()
+    return unit is not None and table in unit.tables_written
+
+@contextmanager
+def record_queries():
+    """
+    Collect (query, params) for every statement this thread runs in the block
+    The statements still execute; the index advisor uses this to EXPLAIN them
+    """
+    queries = []
+    _local.recorder = queries
     try:
-        connection = mysql.connector.connect(
-            host="localhost",
-            user="root",  # Replace with your MySQL username
-            password="root",  # Replace with your MySQL password
-            database="artist_management"
-        )
-        return connection
-    except Error as e:
-        print(f"Error connecting to MySQL database: {e}")
-        return None
+        yield queries
+    finally:
+        _local.recorder = None
+
+def _record(query, params):
+    recorder = getattr(_local, 'recorder', None)
+    if recorder is not None:
+        recorder.append((query, params))
+
+@contextmanager
+def transaction():
+    """
+    Run all execute_query calls in the block on one connection and commit once
+
+    The block commits when it exits normally and rolls back if it raises, if
+    any query in it failed, or if mark_rollback_only() was called. Nested
+    blocks join the outer unit of work. Once the block has exited,
+    unit.committed tells whether its writes were kept: it is False after a
+    failed query or a failed COMMIT, even though the block itself did not raise.
+    """
+    outer = current_unit_of_work()
+    if outer is not None:
+        yield outer
+        return
+
+    unit = UnitOfWork()
+    _local.unit_of_work = unit
+    try:
+        yield unit
+    except BaseException:
+        unit.finish(commit=False)
+        raise
+    else:
+        unit.finish(commit=True)
+    finally:
+        _local.unit_of_work = None
 
 def execute_query(query, params=None, fetchone=False, fetchall=False):
     """
     Execute a SQL query with parameters
-    
+
     Args:
         query (str): SQL query to execute
         params (tuple, optional): Parameters for the query
         fetchone (bool, optional): Whether to fetch one result
         fetchall (bool, optional): Whether to fetch all results
-        
+
     Returns:
-        For INSERT/UPDATE/DELETE: The last row ID
+        For INSERT: The last row ID
+        For UPDATE/DELETE: The number of affected rows
         For SELECT with fetchone=True: A single record as dictionary
         For SELECT with fetchall=True: A list of records as dictionaries
         None if there's an error
+
+    Inside a transaction() block the query runs on the block's connection
+    and is committed together with the rest of the block.
     """
-    connection = get_connection()
+    _record(query, params)
+    unit = current_unit_of_work()
+    connection = unit.get_connection() if unit else get_connection()
     if connection is None:
         return None
-    
-    cursor = connection.cursor(dictionary=True)
+
+    # Buffered so a fetchone() never leaves unread rows on a pooled connection
+    cursor = connection.cursor(dictionary=True, buffered=True)
     result = None
-    
+    broken = False
+
     try:
         if params:
             cursor.execute(query, params)
         else:
             cursor.execute(query)
-            
+
         if fetchall:
             result = cursor.fetchall()
         elif fetchone:
             result = cursor.fetchone()
         else:
-            connection.commit()
-            result = cursor.lastrowid
+            if unit is None:
+                connection.commit()
+            # lastrowid is 0 for UPDATE/DELETE, so report the affected rows instead
+            result = cursor.lastrowid or cursor.rowcount
     except Error as e:
         print(f"Error executing query: {e}")
-        connection.rollback()
+        if unit is not None:
+            # The whole unit of work is rolled back when it finishes
+            unit.failed = True
+        else:
+            try:
+                connection.rollback()
+            except Error:
+                broken = True
     finally:
         cursor.close()
-        connection.close()
-        
-    return result
\ No newline at end of file
+        if unit is None:
+            release_connection(connection, discard=broken)
+
+    return result
+
+def stream_query(query, params=None, fetch_size=None):
+    """
+    Execute a SELECT and yield its rows as dictionaries one at a time
+
+    Rows are read from MySQL with an unbuffered cursor, fetch_size at a
+    time, so memory stays flat however large the result is. The pooled
+    connection is checked out when iteration starts and returned when the
+    generator is exhausted or closed. A connection closed with rows still
+    unread is discarded rather than drained.
+
+    The query runs on its own connection, outside any transaction() block.
+    Errors are printed and re-raised, so a half-sent response is aborted
+    instead of looking complete.
+    """
+    fetch_size = fetch_size or DB_STREAM_FETCH_SIZE
+    _record(query, params)
+    connection = get_connection()
+    if connection is None:
+        raise Error("No database connection available")
+
+    cursor = None
+    exhausted = False
+    broken = False
+    try:
+        cursor = connection.cursor(dictionary=True, buffered=False)
+        if params:
+            cursor.execute(query, params)
+        else:
+            cursor.execute(query)
+
+        while True:
+            rows = cursor.fetchmany(fetch_size)
+            if not rows:
+                break
+            yield from rows
+        exhausted = True
+    except Error as e:
+        print(f"Error streaming query: {e}")
+        broken = True
+        raise
+    finally:
+        if cursor is not None:
+            try:
+                cursor.close()
+            except Error:
+                broken = True
+        release_connection(connection, discard=broken or not exhausted)
+
+
+# INSERT ... VALUES (%s, ...) with nothing after the row, so it can be repeated
+_INSERT_VALUES = re.compile(r'^\s*(INSERT\s.+?\bVALUES\s*)(\([^()]*\))\s*;?\s*$', re.IGNORECASE | re.DOTALL)
+
+def _param_size(value):
+    """Rough size of a parameter once rendered into the SQL text"""
+    if value is None:
+        return 4
+    if isinstance(value, str):
+        return len(value.encode('utf-8')) + 2
+    if isinstance(value, (bytes, bytearray)):
+        return 2 * len(value) + 3
+    return len(str(value))
+
+def _insert_batches(template, prefix_size, params_seq, batch_size, max_packet_size):
+    """Group rows so each multi-row INSERT stays under batch_size rows and max_packet_size bytes"""
+    batch = []
+    size = prefix_size
+    for params in params_seq:
+        row_size = len(template) + 1 + sum(_param_size(value) for value in params)
+        if batch and (len(batch) >= batch_size or size + row_size > max_packet_size):
+            yield batch
+            batch = []
+            size = prefix_size
+        batch.append(params)
+        size += row_size
+    if batch:
+        yield batch
+
+def execute_many(query, params_seq, batch_size=None, max_packet_size=None):
+    """
+    Execute one SQL statement for many parameter tuples in batches
+
+    Args:
+        query (str): SQL statement with %s placeholders for one row
+        params_seq (iterable): Parameter tuples, one per row
+        batch_size (int, optional): Most rows sent in one statement
+        max_packet_size (int, optional): Approximate byte limit for one statement
+
+    Returns:
+        A dict with 'rowcount' (rows affected) and 'id_ranges', a list of
+        (first_id, last_id) pairs, one per multi-row INSERT sent
+        None if there's an error
+
+    A plain INSERT ... VALUES (...) is rewritten to multi-row INSERTs. MySQL
+    hands consecutive auto-increment ids to the rows of one such statement,
+    so each batch's ids are first_id..last_id. INSERT IGNORE batches that
+    skip rows leave gaps. Any other statement goes through executemany().
+    All batches run in one transaction, joining an open transaction() block.
+    """
+    batch_size = batch_size or DB_BATCH_SIZE
+    max_packet_size = max_packet_size or DB_BATCH_MAX_PACKET_SIZE
+
+    outer = current_unit_of_work()
+    unit = outer or UnitOfWork()
+    connection = unit.get_connection()
+    if connection is None:
+        return None
+
+    cursor = connection.cursor(buffered=True)
+    result = {'rowcount': 0, 'id_ranges': []}
+
+    try:
+        match = _INSERT_VALUES.match(query)
+        if match:
+            prefix, template = match.groups()
+            for batch in _insert_batches(template, len(prefix), params_seq, batch_size, max_packet_size):
+                values = ', '.join([template] * len(batch))
+                cursor.execute(prefix + values, [value for params in batch for value in params])
+                result['rowcount'] += cursor.rowcount
+                if cursor.lastrowid:
+                    # lastrowid is the id of the first row in a multi-row INSERT
+                    result['id_ranges'].append((cursor.lastrowid, cursor.lastrowid + cursor.rowcount - 1))
+        else:
+            batch = []
+            for params in params_seq:
+                batch.append(params)
+                if len(batch) >= batch_size:
+                    cursor.executemany(query, batch)
+                    result['rowcount'] += cursor.rowcount
+                    batch = []
+            if batch:
+                cursor.executemany(query, batch)
+                result['rowcount'] += cursor.rowcount
+    except Error as e:
+        print(f"Error executing batch: {e}")
+        unit.failed = True
+        result = None
+    finally:
+        cursor.close()
+
+    if outer is None and not unit.finish(commit=True):
+        return None
+    return result
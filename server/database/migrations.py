@@ -0,0 +1,125 @@
+from database.db_connection import execute_query
+
+# Tracks which migrations have been applied to this database
+MIGRATIONS_TABLE = """
+    CREATE TABLE IF NOT EXISTS schema_migrations (
+      version INT PRIMARY KEY,
+      name VARCHAR(255) NOT NULL,
+      applied_at DATETIME DEFAULT CURRENT_TIMESTAMP
+    )
+"""
+
+
+def index_columns(table):
+    """
+    Map each index on table to {'columns': [...], 'unique': bool}
+    Returns None if there's an error
+    """
+    query = """
+        SELECT INDEX_NAME as name, NON_UNIQUE as non_unique, COLUMN_NAME as column_name
+        FROM information_schema.STATISTICS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s
+        ORDER BY INDEX_NAME, SEQ_IN_INDEX
+    """
+    rows = execute_query(query, (table,), fetchall=True)
+    if rows is None:
+        return None
+
+    indexes = {}
+    for row in rows:
+        index = indexes.setdefault(row['name'], {'columns': [], 'unique': not int(row['non_unique'])})
+        index['columns'].append(row['column_name'])
+    return indexes
+
+def ensure_index(table, name, columns, unique=False):
+    """
+    Create an index on table unless one over exactly these columns exists
+
+    An existing index counts whatever it is called, so indexes created by
+    schema.sql or by hand are not duplicated; for unique=True it must also
+    be unique. MySQL DDL commits on its own, which is why migrations are
+    written to be safe to run again. Returns False if there's an error.
+    """
+    indexes = index_columns(table)
+    if indexes is None:
+        return False
+
+    for index in indexes.values():
+        if index['columns'] == columns and (index['unique'] or not unique):
+            print(f"  {table}({', '.join(columns)}) already indexed")
+            return True
+
+    kind = "UNIQUE INDEX" if unique else "INDEX"
+    if execute_query(f"CREATE {kind} {name} ON {table} ({', '.join(columns)})") is None:
+        return False
+    print(f"  Created {name} on {table}({', '.join(columns)})")
+    return True
+
+
+def _add_lookup_indexes():
+    """Indexes behind the login, role, genre and per-artist lookups and the search index refresh"""
+    indexes = [
+        ('users', 'uq_users_email', ['email'], True),
+        ('users', 'idx_users_role', ['role']),
+        ('users', 'idx_users_created_at', ['created_at']),
+        ('users', 'idx_users_updated_at', ['updated_at']),
+        ('artists', 'idx_artists_created_at', ['created_at']),
+        ('artists', 'idx_artists_updated_at', ['updated_at']),
+        ('music', 'idx_music_genre', ['genre']),
+        ('music', 'idx_music_artist_id', ['artist_id', 'id']),
+        ('music', 'idx_music_created_at', ['created_at']),
+        ('music', 'idx_music_updated_at', ['updated_at'])
+    ]
+    return all(ensure_index(*index) for index in indexes)
+
+# (version, name, apply) in the order they run; apply returns True on success.
+# Append new migrations with the next version; never renumber applied ones.
+MIGRATIONS = [
+    (1, 'add lookup indexes', _add_lookup_indexes)
+]
+
+
+def applied_migrations():
+    """Map version to applied_at for every applied migration, or None if there's an error"""
+    if execute_query(MIGRATIONS_TABLE) is None:
+        return None
+    rows = execute_query("SELECT version, applied_at FROM schema_migrations", fetchall=True)
+    if rows is None:
+        return None
+    return {row['version']: row['applied_at'] for row in rows}
+
+def migrate():
+    """Apply pending migrations in version order, stopping at the first failure; returns True if all are applied"""
+    applied = applied_migrations()
+    if applied is None:
+        print("❌ Could not read schema_migrations")
+        return False
+
+    pending = [migration for migration in MIGRATIONS if migration[0] not in applied]
+    if not pending:
+        print("✅ Database schema is up to date")
+        return True
+
+    for version, name, apply in pending:
+        print(f"Applying migration {version}: {name}")
+        if not apply():
+            print(f"❌ Migration {version} failed; fix the error and run it again")
+            return False
+        query = "INSERT INTO schema_migrations (version, name) VALUES (%s, %s)"
+        if execute_query(query, (version, name)) is None:
+            print(f"❌ Migration {version} ran but could not be recorded")
+            return False
+        print(f"✅ Applied migration {version}")
+    return True
+
+def migration_status():
+    """Print every migration with when it was applied, or that it is pending; returns False if there's an error"""
+    applied = applied_migrations()
+    if applied is None:
+        print("❌ Could not read schema_migrations")
+        return False
+
+    for version, name, _ in MIGRATIONS:
+        state = f"applied {applied[version]}" if version in applied else "pending"
+        print(f"  {version:>4}  {name:<40} {state}")
+    return True
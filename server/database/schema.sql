@@ -14,7 +14,10 @@ CREATE TABLE users (
   address VARCHAR(255),
   created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
   updated_at DATETIME DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
-  role ENUM('super_admin', 'artist_manager', 'artist') NOT NULL
+  role ENUM('super_admin', 'artist_manager', 'artist') NOT NULL,
+  INDEX idx_users_role (role),
+  INDEX idx_users_created_at (created_at),
+  INDEX idx_users_updated_at (updated_at)
 );
 
 -- Artist Table
@@ -27,7 +30,9 @@ CREATE TABLE artists (
   first_release_year YEAR,
   no_of_albums_released INT,
   created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-  updated_at DATETIME DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+  updated_at DATETIME DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+  INDEX idx_artists_created_at (created_at),
+  INDEX idx_artists_updated_at (updated_at)
 );
 
 -- Music/Song Table (renamed from 'songs' to 'music' as per your schema)
@@ -39,6 +44,10 @@ CREATE TABLE music (
   genre ENUM('rnb', 'country', 'classic', 'jazz'),
   created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
   updated_at DATETIME DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+  INDEX idx_music_genre (genre),
+  INDEX idx_music_artist_id (artist_id, id),
+  INDEX idx_music_created_at (created_at),
+  INDEX idx_music_updated_at (updated_at),
   FOREIGN KEY (artist_id) REFERENCES artists(id) ON DELETE CASCADE
 );
 
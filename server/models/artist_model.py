@@ -1,6 +1,12 @@
 import csv
 import io
-from database.db_connection import execute_query
+from collections import Counter
+from database.db_connection import execute_query, execute_many, stream_query, DB_BATCH_SIZE
+from services.count_service import counts
+from services.counters import counters
+from services.entity_cache import artist_cache, music_cache
+from services.query_cache import query_cache
+from services.search_index import artist_index, page_of, index_artist, index_artists, unindex_artists, unindex_songs
 
 class Artist:
     def __init__(self, id=None, name=None, dob=None, gender=None, address=None,
@@ -25,24 +31,81 @@ class Artist:
             VALUES (%s, %s, %s, %s, %s, %s)
         """
         params = (name, dob, gender, address, first_release_year, no_of_albums_released)
-        return execute_query(query, params)
+        result = execute_query(query, params)
+        counts.invalidate('artists')
+        query_cache.invalidate('artists')
+        if result:
+            artist_cache.invalidate(result)
+            index_artist(result, name)
+        return result
+    
+    @staticmethod
+    def create_many(artists):
+        """
+        Create many artists with batched multi-row INSERTs
+        Takes dicts with the same keys as create(); returns execute_many()'s result
+        """
+        artists = list(artists)
+        query = """
+            INSERT INTO artists 
+            (name, dob, gender, address, first_release_year, no_of_albums_released) 
+            VALUES (%s, %s, %s, %s, %s, %s)
+        """
+        params_seq = (
+            (
+                artist.get('name'),
+                artist.get('dob'),
+                artist.get('gender'),
+                artist.get('address'),
+                artist.get('first_release_year'),
+                artist.get('no_of_albums_released') or 0
+            )
+            for artist in artists
+        )
+        result = execute_many(query, params_seq)
+        counts.invalidate('artists')
+        query_cache.invalidate('artists')
+        if result:
+            ids = [artist_id for first, last in result['id_ranges'] for artist_id in range(first, last + 1)]
+            artist_cache.invalidate(*ids)
+            # Without one id per row the search index catches up on its next refresh instead
+            if len(ids) == len(artists):
+                index_artists((artist_id, artist.get('name')) for artist_id, artist in zip(ids, artists))
+        return result
     
     @staticmethod
     def get_by_id(artist_id):
-        """Get an artist by ID"""
+        """Get an artist by ID, served from the entity cache when it holds the row"""
         query = "SELECT * FROM artists WHERE id = %s"
-        return execute_query(query, (artist_id,), fetchone=True)
+        return artist_cache.get(artist_id, lambda key: execute_query(query, (key,), fetchone=True))
+    
+    @staticmethod
+    def get_many(artist_ids):
+        """Get artists by ID, in the order the IDs are given"""
+        if not artist_ids:
+            return []
+        placeholders = ', '.join(['%s'] * len(artist_ids))
+        query = f"SELECT * FROM artists WHERE id IN ({placeholders})"
+        rows = query_cache.fetchall(query, tuple(artist_ids), ('artists',))
+        if rows is None:
+            return None
+        by_id = {row['id']: row for row in rows}
+        return [by_id[artist_id] for artist_id in artist_ids if artist_id in by_id]
     
     @staticmethod
-    def get_all(page=1, per_page=10):
-        """Get all artists with pagination"""
+    def get_all(page=1, per_page=10, after_id=None):
+        """Get all artists with pagination, by offset or after the artist with id after_id"""
+        if after_id is not None:
+            query = "SELECT * FROM artists WHERE id > %s ORDER BY id LIMIT %s"
+            return query_cache.fetchall(query, (after_id, per_page), ('artists',))
+        
         offset = (page - 1) * per_page
-        query = "SELECT * FROM artists LIMIT %s OFFSET %s"
-        return execute_query(query, (per_page, offset), fetchall=True)
+        query = "SELECT * FROM artists ORDER BY id LIMIT %s OFFSET %s"
+        return query_cache.fetchall(query, (per_page, offset), ('artists',))
     
     @staticmethod
-    def update(artist_id, data):
-        """Update an artist's information"""
+    def update_query(artist_id, data):
+        """Build the (query, params) that update() runs for data, without running it"""
         fields = []
         params = []
         
@@ -52,31 +115,70 @@ class Artist:
                 params.append(value)
         
         params.append(artist_id)
-        
-        query = f"UPDATE artists SET {', '.join(fields)} WHERE id = %s"
-        return execute_query(query, params)
+        return f"UPDATE artists SET {', '.join(fields)} WHERE id = %s", params
+    
+    @staticmethod
+    def update(artist_id, data):
+        """Update an artist's information"""
+        result = execute_query(*Artist.update_query(artist_id, data))
+        counts.invalidate('artists')
+        query_cache.invalidate('artists')
+        artist_cache.invalidate(artist_id)
+        if result and data.get('name') is not None:
+            index_artist(int(artist_id), data['name'])
+        return result
+    
+    @staticmethod
+    def delete_queries(artist_id):
+        """
+        Build the (query, params) pairs that delete() runs, without running them:
+        the read of the songs the delete cascades to, then the delete itself
+        """
+        return [
+            ("SELECT id, genre FROM music WHERE artist_id = %s", (artist_id,)),
+            ("DELETE FROM artists WHERE id = %s", (artist_id,))
+        ]
     
     @staticmethod
     def delete(artist_id):
         """Delete an artist"""
-        query = "DELETE FROM artists WHERE id = %s"
-        return execute_query(query, (artist_id,))
+        songs_query, delete_query = Artist.delete_queries(artist_id)
+        # The artist's songs go with it (ON DELETE CASCADE), so note what the counters and index lose
+        songs = execute_query(*songs_query, fetchall=True)
+        result = execute_query(*delete_query)
+        counts.invalidate('artists', 'music')
+        query_cache.invalidate('artists', 'music')
+        artist_cache.invalidate(artist_id)
+        music_cache.invalidate(*[song['id'] for song in songs or []])
+        if result:
+            unindex_artists(int(artist_id))
+            if songs:
+                counters.songs_removed_by_genre(artist_id, Counter(song['genre'] for song in songs))
+                unindex_songs(*[song['id'] for song in songs])
+        return result
     
     @staticmethod
-    def count():
-        """Count total number of artists"""
-        query = "SELECT COUNT(*) as count FROM artists"
-        result = execute_query(query, fetchone=True)
-        return result['count'] if result else 0
+    def count(search_term=None, estimate=False):
+        """
+        Count artists, or only those matching search_term like search() does
+        Cached until the next artist write; estimate allows a statistics-based total
+        """
+        if search_term:
+            ids = artist_index.search(search_term)
+            if ids is not None:
+                return len(ids)
+            return counts.count('artists', "name LIKE %s", (f"%{search_term}%",))
+        return counts.count('artists', estimate=estimate)
     
     @staticmethod
     def import_from_csv(csv_content):
-        """Import artists from CSV content"""
+        """Import artists from CSV content (a string or a text file object)"""
         created_count = 0
         
         try:
-            csv_file = io.StringIO(csv_content)
+            csv_file = io.StringIO(csv_content) if isinstance(csv_content, str) else csv_content
             csv_reader = csv.DictReader(csv_file)
+            batch = []
             
             for row in csv_reader:
                 # Convert empty strings to None
@@ -90,45 +192,86 @@ class Artist:
                 else:
                     row['no_of_albums_released'] = 0
                 
-                # Create artist
-                Artist.create(
-                    name=row.get('name'),
-                    dob=row.get('dob'),
-                    gender=row.get('gender'),
-                    address=row.get('address'),
-                    first_release_year=row.get('first_release_year'),
-                    no_of_albums_released=row.get('no_of_albums_released')
-                )
-                created_count += 1
+                batch.append(row)
+                if len(batch) >= DB_BATCH_SIZE:
+                    created_count += Artist._create_batch(batch)
+                    batch = []
+            
+            if batch:
+                created_count += Artist._create_batch(batch)
             
             return {'success': True, 'count': created_count}
         except Exception as e:
             return {'success': False, 'error': str(e)}
     
     @staticmethod
-    def export_to_csv():
-        """Export all artists to CSV format"""
-        query = "SELECT * FROM artists"
-        artists = execute_query(query, fetchall=True)
-        
-        if not artists:
-            return None
-        
+    def _create_batch(rows):
+        """Insert one batch of parsed CSV rows, raising if the database rejects it"""
+        result = Artist.create_many(rows)
+        if result is None:
+            raise ValueError("Database error while inserting artists")
+        return result['rowcount']
+    
+    @staticmethod
+    def export_to_csv(chunk_size=65536):
+        """
+        Export all artists to CSV format
+        Yields the CSV text in pieces of about chunk_size characters while rows
+        stream from the database, so the table is never held in memory
+        """
         output = io.StringIO()
-        csv_writer = csv.DictWriter(output, fieldnames=artists[0].keys())
-        csv_writer.writeheader()
-        csv_writer.writerows(artists)
+        csv_writer = None
         
-        return output.getvalue()
+        for artist in stream_query("SELECT * FROM artists"):
+            if csv_writer is None:
+                csv_writer = csv.DictWriter(output, fieldnames=artist.keys())
+                csv_writer.writeheader()
+            csv_writer.writerow(artist)
+            
+            if output.tell() >= chunk_size:
+                yield output.getvalue()
+                output.seek(0)
+                output.truncate()
+        
+        if output.tell():
+            yield output.getvalue()
+    
+    @staticmethod
+    def search_ids(search_term):
+        """
+        Ids of the artists matching search_term, best matches first, from the trigram index
+        Returns None when the index cannot answer and search() falls back to LIKE
+        """
+        return artist_index.search(search_term)
     
     @staticmethod
-    def search(search_term, page=1, per_page=10):
-        """Search artists by name"""
+    def search(search_term, page=1, per_page=10, after_id=None, ids=None):
+        """
+        Search artists by name
+        Uses the trigram index, best matches first, when it can answer;
+        otherwise falls back to LIKE ordered by id. ids takes a search_ids()
+        result the caller already has, so the index is not searched twice
+        """
+        if ids is None:
+            ids = artist_index.search(search_term)
+        if ids is not None:
+            return Artist.get_many(page_of(ids, page, per_page, after_id))
+        
+        search_pattern = f"%{search_term}%"
+        if after_id is not None:
+            query = """
+                SELECT * FROM artists 
+                WHERE name LIKE %s AND id > %s 
+                ORDER BY id 
+                LIMIT %s
+            """
+            return query_cache.fetchall(query, (search_pattern, after_id, per_page), ('artists',))
+        
         offset = (page - 1) * per_page
         query = """
             SELECT * FROM artists 
             WHERE name LIKE %s 
+            ORDER BY id 
             LIMIT %s OFFSET %s
         """
-        search_pattern = f"%{search_term}%"
-        return execute_query(query, (search_pattern, per_page, offset), fetchall=True)
\ No newline at end of file
+        return query_cache.fetchall(query, (search_pattern, per_page, offset), ('artists',))
\ No newline at end of file
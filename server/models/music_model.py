@@ -1,4 +1,9 @@
-from database.db_connection import execute_query
+from database.db_connection import execute_query, execute_many
+from services.count_service import counts
+from services.counters import counters
+from services.entity_cache import music_cache
+from services.query_cache import query_cache
+from services.search_index import music_index, page_of, index_song, index_songs, unindex_songs
 
 class Music:
     def __init__(self, id=None, artist_id=None, title=None, album_name=None,
@@ -20,98 +25,209 @@ class Music:
             VALUES (%s, %s, %s, %s)
         """
         params = (artist_id, title, album_name, genre)
-        return execute_query(query, params)
+        result = execute_query(query, params)
+        counts.invalidate('music')
+        query_cache.invalidate('music')
+        if result:
+            music_cache.invalidate(result)
+            counters.song_added(artist_id, genre)
+            index_song(result, title, album_name)
+        return result
+    
+    @staticmethod
+    def create_many(songs):
+        """
+        Create many songs with batched multi-row INSERTs
+        Takes dicts with the same keys as create(); returns execute_many()'s result
+        """
+        songs = list(songs)
+        query = """
+            INSERT INTO music 
+            (artist_id, title, album_name, genre) 
+            VALUES (%s, %s, %s, %s)
+        """
+        params_seq = (
+            (song.get('artist_id'), song.get('title'), song.get('album_name'), song.get('genre'))
+            for song in songs
+        )
+        result = execute_many(query, params_seq)
+        counts.invalidate('music')
+        query_cache.invalidate('music')
+        if result:
+            counters.songs_added((song.get('artist_id'), song.get('genre')) for song in songs)
+            ids = [music_id for first, last in result['id_ranges'] for music_id in range(first, last + 1)]
+            music_cache.invalidate(*ids)
+            # Without one id per row the search index catches up on its next refresh instead
+            if len(ids) == len(songs):
+                index_songs((music_id, song.get('title'), song.get('album_name')) for music_id, song in zip(ids, songs))
+        return result
     
     @staticmethod
     def get_by_id(music_id):
-        """Get a song by ID"""
+        """Get a song by ID, served from the entity cache when it holds the row"""
         query = "SELECT * FROM music WHERE id = %s"
-        return execute_query(query, (music_id,), fetchone=True)
+        return music_cache.get(music_id, lambda key: execute_query(query, (key,), fetchone=True))
     
     @staticmethod
-    def get_all(page=1, per_page=10):
-        """Get all songs with pagination"""
-        offset = (page - 1) * per_page
-        query = """
+    def get_many(music_ids):
+        """Get songs with their artist names by ID, in the order the IDs are given"""
+        if not music_ids:
+            return []
+        placeholders = ', '.join(['%s'] * len(music_ids))
+        query = f"""
             SELECT m.*, a.name as artist_name 
             FROM music m
             JOIN artists a ON m.artist_id = a.id
-            LIMIT %s OFFSET %s
+            WHERE m.id IN ({placeholders})
         """
-        return execute_query(query, (per_page, offset), fetchall=True)
+        rows = query_cache.fetchall(query, tuple(music_ids), ('music', 'artists'))
+        if rows is None:
+            return None
+        by_id = {row['id']: row for row in rows}
+        return [by_id[music_id] for music_id in music_ids if music_id in by_id]
     
     @staticmethod
-    def get_by_artist(artist_id, page=1, per_page=10):
-        """Get all songs for a specific artist with pagination"""
-        offset = (page - 1) * per_page
-        query = """
+    def _get_page(condition, params, page, per_page, after_id):
+        """
+        Fetch one page of songs with their artist names, ordered by id
+        Pages by offset, or with after_id by keyset (songs with a greater id)
+        Served from the query cache until a song or artist write commits
+        """
+        conditions = [f"({condition})"] if condition else []
+        if after_id is not None:
+            conditions.append("m.id > %s")
+            params = params + (after_id,)
+        
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        query = f"""
             SELECT m.*, a.name as artist_name 
             FROM music m
             JOIN artists a ON m.artist_id = a.id
-            WHERE m.artist_id = %s
-            LIMIT %s OFFSET %s
+            {where}
+            ORDER BY m.id
         """
-        return execute_query(query, (artist_id, per_page, offset), fetchall=True)
+        if after_id is not None:
+            query += " LIMIT %s"
+            params = params + (per_page,)
+        else:
+            query += " LIMIT %s OFFSET %s"
+            params = params + (per_page, (page - 1) * per_page)
+        return query_cache.fetchall(query, params, ('music', 'artists'))
     
     @staticmethod
-    def update(music_id, data):
-        """Update a song's information"""
+    def get_all(page=1, per_page=10, after_id=None):
+        """Get all songs with pagination"""
+        return Music._get_page(None, (), page, per_page, after_id)
+    
+    @staticmethod
+    def get_by_artist(artist_id, page=1, per_page=10, after_id=None):
+        """Get all songs for a specific artist with pagination"""
+        return Music._get_page("m.artist_id = %s", (artist_id,), page, per_page, after_id)
+    
+    @staticmethod
+    def update_query(music_id, data):
+        """Build the (query, params) that update() runs for data, without running it"""
         fields = []
         params = []
-        
         for key, value in data.items():
             if key != 'id' and value is not None:
                 fields.append(f"{key} = %s")
                 params.append(value)
-        
         params.append(music_id)
+        return f"UPDATE music SET {', '.join(fields)} WHERE id = %s", params
+    
+    @staticmethod
+    def update(music_id, data):
+        """Update a song's information"""
+        # Moving a song to another genre or artist changes the aggregate counters,
+        # and a new title or album name changes its search index entry
+        moved = data.get('genre') is not None or data.get('artist_id') is not None
+        renamed = data.get('title') is not None or data.get('album_name') is not None
+        old = Music.get_by_id(music_id) if moved or renamed else None
         
-        query = f"UPDATE music SET {', '.join(fields)} WHERE id = %s"
-        return execute_query(query, params)
+        result = execute_query(*Music.update_query(music_id, data))
+        counts.invalidate('music')
+        query_cache.invalidate('music')
+        music_cache.invalidate(music_id)
+        if result and old:
+            if moved:
+                counters.song_removed(old['artist_id'], old['genre'])
+                counters.song_added(data.get('artist_id') or old['artist_id'], data.get('genre') or old['genre'])
+            if renamed:
+                index_song(old['id'], data.get('title') or old['title'], data.get('album_name') or old['album_name'])
+        return result
+    
+    @staticmethod
+    def delete_query(music_id):
+        """Build the (query, params) that delete() runs, without running it"""
+        return "DELETE FROM music WHERE id = %s", (music_id,)
     
     @staticmethod
     def delete(music_id):
         """Delete a song"""
-        query = "DELETE FROM music WHERE id = %s"
-        return execute_query(query, (music_id,))
+        song = Music.get_by_id(music_id)
+        result = execute_query(*Music.delete_query(music_id))
+        counts.invalidate('music')
+        query_cache.invalidate('music')
+        music_cache.invalidate(music_id)
+        if result and song:
+            counters.song_removed(song['artist_id'], song['genre'])
+            unindex_songs(song['id'])
+        return result
     
     @staticmethod
-    def count():
-        """Count total number of songs"""
-        query = "SELECT COUNT(*) as count FROM music"
-        result = execute_query(query, fetchone=True)
-        return result['count'] if result else 0
+    def count(search_term=None, estimate=False):
+        """
+        Count songs, or only those matching search_term like search() does
+        Cached until the next song write; estimate allows a statistics-based total
+        """
+        if search_term:
+            ids = music_index.search(search_term)
+            if ids is not None:
+                return len(ids)
+            search_pattern = f"%{search_term}%"
+            return counts.count('music', "title LIKE %s OR album_name LIKE %s", (search_pattern, search_pattern))
+        return counts.count('music', estimate=estimate)
     
     @staticmethod
     def count_by_artist(artist_id):
-        """Count number of songs for a specific artist"""
-        query = "SELECT COUNT(*) as count FROM music WHERE artist_id = %s"
-        result = execute_query(query, (artist_id,), fetchone=True)
-        return result['count'] if result else 0
+        """Count number of songs for a specific artist from the aggregate counters"""
+        return counters.get('artist', int(artist_id))
     
     @staticmethod
-    def search(search_term, page=1, per_page=10):
-        """Search songs by title or album name"""
-        offset = (page - 1) * per_page
-        query = """
-            SELECT m.*, a.name as artist_name 
-            FROM music m
-            JOIN artists a ON m.artist_id = a.id
-            WHERE m.title LIKE %s OR m.album_name LIKE %s
-            LIMIT %s OFFSET %s
+    def count_by_genre(genre):
+        """Count number of songs in a genre from the aggregate counters"""
+        return counters.get('genre', genre)
+    
+    @staticmethod
+    def search_ids(search_term):
+        """
+        Ids of the songs matching search_term, best matches first, from the trigram index
+        Returns None when the index cannot answer and search() falls back to LIKE
+        """
+        return music_index.search(search_term)
+    
+    @staticmethod
+    def search(search_term, page=1, per_page=10, after_id=None, ids=None):
+        """
+        Search songs by title or album name
+        Uses the trigram index, best matches first, when it can answer;
+        otherwise falls back to LIKE ordered by id. ids takes a search_ids()
+        result the caller already has, so the index is not searched twice
         """
+        if ids is None:
+            ids = music_index.search(search_term)
+        if ids is not None:
+            return Music.get_many(page_of(ids, page, per_page, after_id))
+        
         search_pattern = f"%{search_term}%"
-        return execute_query(query, (search_pattern, search_pattern, per_page, offset), fetchall=True)
+        return Music._get_page(
+            "m.title LIKE %s OR m.album_name LIKE %s",
+            (search_pattern, search_pattern),
+            page, per_page, after_id
+        )
     
     @staticmethod
-    def get_by_genre(genre, page=1, per_page=10):
+    def get_by_genre(genre, page=1, per_page=10, after_id=None):
         """Get songs by genre with pagination"""
-        offset = (page - 1) * per_page
-        query = """
-            SELECT m.*, a.name as artist_name 
-            FROM music m
-            JOIN artists a ON m.artist_id = a.id
-            WHERE m.genre = %s
-            LIMIT %s OFFSET %s
-        """
-        return execute_query(query, (genre, per_page, offset), fetchall=True)
\ No newline at end of file
+        return Music._get_page("m.genre = %s", (genre,), page, per_page, after_id)
@@ -1,5 +1,10 @@
 import bcrypt
-from database.db_connection import execute_query
+from database.db_connection import execute_query, execute_many
+from services.count_service import counts
+from services.counters import counters
+from services.entity_cache import user_cache
+from services.query_cache import query_cache
+from services.search_index import index_user, index_users, unindex_users
 
 class User:
     def __init__(self, id=None, first_name=None, last_name=None, email=None, 
@@ -38,13 +43,59 @@ class User:
             VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
         """
         params = (first_name, last_name, email, hashed_password, phone, dob, gender, address, role)
-        return execute_query(query, params)
+        result = execute_query(query, params)
+        counts.invalidate('users')
+        query_cache.invalidate('users')
+        if result:
+            user_cache.invalidate(result)
+            counters.user_added(role)
+            index_user(result, email)
+        return result
+    
+    @staticmethod
+    def create_many(users):
+        """
+        Create many users with batched multi-row INSERTs
+        Takes dicts with the same keys as create(); passwords are hashed here
+        Returns execute_many()'s result
+        """
+        users = list(users)
+        query = """
+            INSERT INTO users 
+            (first_name, last_name, email, password, phone, dob, gender, address, role) 
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+        """
+        params_seq = (
+            (
+                user.get('first_name'),
+                user.get('last_name'),
+                user.get('email'),
+                User.hash_password(user['password']),
+                user.get('phone'),
+                user.get('dob'),
+                user.get('gender'),
+                user.get('address'),
+                user.get('role')
+            )
+            for user in users
+        )
+        result = execute_many(query, params_seq)
+        counts.invalidate('users')
+        query_cache.invalidate('users')
+        if result:
+            counters.users_added(user.get('role') for user in users)
+            ids = [user_id for first, last in result['id_ranges'] for user_id in range(first, last + 1)]
+            user_cache.invalidate(*ids)
+            # Without one id per row the suggest index catches up on its next refresh instead
+            if len(ids) == len(users):
+                index_users((user_id, user.get('email')) for user_id, user in zip(ids, users))
+        return result
     
     @staticmethod
     def get_by_id(user_id):
-        """Get a user by ID"""
+        """Get a user by ID, served from the entity cache when it holds the row"""
         query = "SELECT * FROM users WHERE id = %s"
-        return execute_query(query, (user_id,), fetchone=True)
+        return user_cache.get(user_id, lambda key: execute_query(query, (key,), fetchone=True))
     
     @staticmethod
     def get_by_email(email):
@@ -53,28 +104,25 @@ class User:
         return execute_query(query, (email,), fetchone=True)
     
     @staticmethod
-    def get_all(page=1, per_page=10):
-        """Get all users with pagination"""
+    def get_all(page=1, per_page=10, after_id=None):
+        """Get all users with pagination, by offset or after the user with id after_id"""
+        if after_id is not None:
+            query = "SELECT * FROM users WHERE id > %s ORDER BY id LIMIT %s"
+            return query_cache.fetchall(query, (after_id, per_page), ('users',))
+        
         offset = (page - 1) * per_page
-        query = "SELECT * FROM users LIMIT %s OFFSET %s"
-        return execute_query(query, (per_page, offset), fetchall=True)
+        query = "SELECT * FROM users ORDER BY id LIMIT %s OFFSET %s"
+        return query_cache.fetchall(query, (per_page, offset), ('users',))
     
     @staticmethod
-    def update(user_id, data):
-        """Update a user's information"""
+    def update_query(user_id, data):
+        """
+        Build the (query, params) that update() runs for data, without running it
+        Returns None if data has no fields to update
+        """
         fields = []
         params = []
         
-        # Make sure we have valid data
-        if not data or not isinstance(data, dict):
-            print("Invalid data for user update")
-            return False
-        
-        # Make sure user_id is valid
-        if not user_id:
-            print("Invalid user ID for update")
-            return False
-        
         for key, value in data.items():
             # Skip invalid keys and None values
             if key not in ['first_name', 'last_name', 'email', 'phone', 'dob', 'gender', 'address', 'role']:
@@ -91,35 +139,105 @@ class User:
         
         # Check if we have fields to update
         if not fields:
-            print("No valid fields to update")
-            return False
+            return None
         
         # Add updated_at timestamp
         fields.append("updated_at = CURRENT_TIMESTAMP")
         
         params.append(user_id)
+        return f"UPDATE users SET {', '.join(fields)} WHERE id = %s", params
+    
+    @staticmethod
+    def update(user_id, data):
+        """Update a user's information"""
+        # Make sure we have valid data
+        if not data or not isinstance(data, dict):
+            print("Invalid data for user update")
+            return False
+        
+        # Make sure user_id is valid
+        if not user_id:
+            print("Invalid user ID for update")
+            return False
+        
+        update = User.update_query(user_id, data)
+        if update is None:
+            print("No valid fields to update")
+            return False
+        query, params = update
+        
+        # A role change moves the user between the per-role counters
+        old = User.get_by_id(user_id) if data.get('role') is not None else None
     
         try:
-            query = f"UPDATE users SET {', '.join(fields)} WHERE id = %s"
             result = execute_query(query, params)
             print(f"User update result: {result}, Query: {query}, Params: {params}")
+            user_cache.invalidate(user_id)
+            query_cache.invalidate('users')
+            if result and old and old['role'] != data['role']:
+                counters.user_removed(old['role'])
+                counters.user_added(data['role'])
+            if result and data.get('email') is not None:
+                index_user(int(user_id), data['email'])
             return result
         except Exception as e:
             print(f"Error updating user: {e}")
             return False
     
+    @staticmethod
+    def delete_query(user_id):
+        """Build the (query, params) that delete() runs, without running it"""
+        return "DELETE FROM users WHERE id = %s", (user_id,)
+    
     @staticmethod
     def delete(user_id):
         """Delete a user"""
-        query = "DELETE FROM users WHERE id = %s"
-        return execute_query(query, (user_id,))
+        user = User.get_by_id(user_id)
+        result = execute_query(*User.delete_query(user_id))
+        counts.invalidate('users')
+        query_cache.invalidate('users')
+        user_cache.invalidate(user_id)
+        if result and user:
+            counters.user_removed(user['role'])
+            unindex_users(user['id'])
+        return result
+    
+    @staticmethod
+    def count(estimate=False):
+        """Count total number of users, cached until the next user is created or deleted"""
+        return counts.count('users', estimate=estimate)
+    
+    @staticmethod
+    def count_by_role(role):
+        """
+        Count users with a role from the aggregate counters
+        Other processes' writes show up after a reconcile, so use it for display only
+        """
+        return counters.get('role', role)
     
     @staticmethod
-    def count():
-        """Count total number of users"""
-        query = "SELECT COUNT(*) as count FROM users"
-        result = execute_query(query, fetchone=True)
-        return result['count'] if result else 0
+    def get_for_update(user_id):
+        """
+        A user's id and role, read from MySQL with the row locked
+        Inside a transaction() block, other deletes and role changes of the
+        user wait until it ends. Returns None if there's no such user or an error
+        """
+        query = "SELECT id, role FROM users WHERE id = %s FOR UPDATE"
+        return execute_query(query, (user_id,), fetchone=True)
+    
+    @staticmethod
+    def get_ids_by_role_for_update(role):
+        """
+        IDs of the users with a role, read from MySQL with their rows locked
+        Inside a transaction() block, other deletes and role changes of those
+        users wait until it ends, so safety checks can rely on the answer
+        Returns None if there's an error
+        """
+        query = "SELECT id FROM users WHERE role = %s FOR UPDATE"
+        rows = execute_query(query, (role,), fetchall=True)
+        if rows is None:
+            return None
+        return [row['id'] for row in rows]
         
     @staticmethod
     def authenticate(email, password):
@@ -134,4 +252,4 @@ class User:
         """Get users by role with pagination"""
         offset = (page - 1) * per_page
         query = "SELECT * FROM users WHERE role = %s LIMIT %s OFFSET %s"
-        return execute_query(query, (role, per_page, offset), fetchall=True)
\ No newline at end of file
+        return query_cache.fetchall(query, (role, per_page, offset), ('users',))
\ No newline at end of file
@@ -0,0 +1,77 @@
+import base64
+import json
+
+# Largest page a client may ask for; bigger requests get this many rows
+MAX_PER_PAGE = 100
+
+
+def encode_cursor(last_id):
+    """Opaque cursor pointing just past the row with id last_id"""
+    raw = json.dumps({'id': last_id}, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).rstrip(b'=').decode('ascii')
+
+def decode_cursor(cursor):
+    """Return the id stored in a cursor, raising ValueError if it is not one of ours"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        last_id = json.loads(raw)['id']
+    except (ValueError, TypeError, KeyError):
+        raise ValueError("Invalid pagination cursor")
+    if not isinstance(last_id, int) or isinstance(last_id, bool):
+        raise ValueError("Invalid pagination cursor")
+    return last_id
+
+def get_page_params(query_params, default_per_page=10, max_per_page=MAX_PER_PAGE):
+    """
+    Read paging parameters from a request's query string
+
+    ?after=<cursor>&limit=N selects keyset paging and ?page=P&per_page=N the
+    older offset paging; limit and per_page are interchangeable and capped
+    at max_per_page. Returns (page, per_page, after_id) where after_id is
+    None for offset paging. Raises ValueError on malformed values.
+    """
+    per_page = int(query_params.get('limit') or query_params.get('per_page') or default_per_page)
+    if per_page < 1:
+        raise ValueError("per_page must be positive")
+    per_page = min(per_page, max_per_page)
+
+    after = query_params.get('after')
+    if after:
+        return 1, per_page, decode_cursor(after)
+
+    page = int(query_params.get('page', 1))
+    if page < 1:
+        raise ValueError("page must be positive")
+    return page, per_page, None
+
+def build_pagination(rows, page, per_page, total, after_id=None):
+    """
+    Pagination block for a list response
+
+    next_cursor continues after the last row returned and is None once a
+    short page shows there is nothing left. Offset paging also reports page
+    and total_pages so existing clients keep working. A total taken from
+    table statistics is flagged with total_is_estimate.
+    """
+    next_cursor = None
+    if rows and len(rows) >= per_page:
+        next_cursor = encode_cursor(rows[-1]['id'])
+
+    if after_id is not None:
+        pagination = {
+            'limit': per_page,
+            'total': int(total),
+            'next_cursor': next_cursor
+        }
+    else:
+        pagination = {
+            'page': page,
+            'per_page': per_page,
+            'total': int(total),
+            'total_pages': (total + per_page - 1) // per_page,
+            'next_cursor': next_cursor
+        }
+
+    if getattr(total, 'estimated', False):
+        pagination['total_is_estimate'] = True
+    return pagination
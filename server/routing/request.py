@@ -0,0 +1,54 @@
+import urllib.parse
+from http import cookies
+
+# Sentinel for attributes that have not been parsed yet
+_UNSET = object()
+
+
+# Utility function to parse cookies
+def parse_cookies(cookie_string):
+    cookie = cookies.SimpleCookie()
+    cookie.load(cookie_string)
+    return {key: morsel.value for key, morsel in cookie.items()}
+
+# Utility function to parse query parameters
+def parse_query_params(query_string):
+    return {k: v[0] for k, v in urllib.parse.parse_qs(query_string).items()}
+
+
+class Request:
+    """
+    Request object passed to route handlers
+
+    Query parameters and cookies are parsed on first access, so routes that
+    never look at them (static files, most HTML pages) skip the work.
+    """
+
+    __slots__ = (
+        'method', 'path', 'query_string', 'headers', 'path_params',
+        'form_data', 'json_data', 'user', '_query_params', '_cookies'
+    )
+
+    def __init__(self, method, path, query_string, headers):
+        self.method = method
+        self.path = path
+        self.query_string = query_string
+        self.headers = headers
+        self.path_params = {}
+        self.form_data = {}
+        self.json_data = {}
+        self.user = None
+        self._query_params = _UNSET
+        self._cookies = _UNSET
+
+    @property
+    def query_params(self):
+        if self._query_params is _UNSET:
+            self._query_params = parse_query_params(self.query_string)
+        return self._query_params
+
+    @property
+    def cookies(self):
+        if self._cookies is _UNSET:
+            self._cookies = parse_cookies(self.headers.get('Cookie', ''))
+        return self._cookies
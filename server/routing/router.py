@@ -0,0 +1,106 @@
+class _Node:
+    __slots__ = ('literals', 'param_child', 'handler', 'param_names')
+
+    def __init__(self):
+        self.literals = {}
+        self.param_child = None
+        self.handler = None
+        # Parameter names are kept on the leaf so /{id} and /{artist_id}/music can share a branch
+        self.param_names = ()
+
+
+class Router:
+    """
+    Method-bucketed route table
+
+    Paths without parameters live in a per-method dict and resolve with one
+    lookup. Parameterized paths such as /api/artists/{id} are stored in a
+    segment trie per method, so matching costs one step per path segment no
+    matter how many routes are registered. Literal segments always win over
+    parameters, e.g. /api/artists/import before /api/artists/{id}.
+    """
+
+    def __init__(self):
+        self._exact = {}
+        self._trees = {}
+
+    def add(self, method, path, handler):
+        method = method.upper()
+
+        if '{' not in path:
+            self._exact.setdefault(method, {})[path] = handler
+            return
+
+        node = self._trees.setdefault(method, _Node())
+        names = []
+        for segment in path.split('/'):
+            if segment.startswith('{') and segment.endswith('}'):
+                names.append(segment[1:-1])
+                if node.param_child is None:
+                    node.param_child = _Node()
+                node = node.param_child
+            elif '{' in segment or '}' in segment:
+                raise ValueError(f"Parameters must span a whole path segment: {path}")
+            else:
+                node = node.literals.setdefault(segment, _Node())
+
+        node.handler = handler
+        node.param_names = tuple(names)
+
+    def match(self, method, path):
+        """Return (handler, path_params) for a request, or (None, {}) if nothing matches"""
+        exact = self._exact.get(method)
+        if exact:
+            handler = exact.get(path)
+            if handler:
+                return handler, {}
+
+        root = self._trees.get(method)
+        if root is None:
+            return None, {}
+
+        values = []
+        leaf = self._walk(root, path.split('/'), 0, values)
+        if leaf is None:
+            return None, {}
+        return leaf.handler, dict(zip(leaf.param_names, values))
+
+    def _walk(self, node, segments, index, values):
+        if index == len(segments):
+            return node if node.handler is not None else None
+
+        segment = segments[index]
+
+        child = node.literals.get(segment)
+        if child is not None:
+            leaf = self._walk(child, segments, index + 1, values)
+            if leaf is not None:
+                return leaf
+
+        if node.param_child is not None and segment:
+            values.append(segment)
+            leaf = self._walk(node.param_child, segments, index + 1, values)
+            if leaf is not None:
+                return leaf
+            values.pop()
+
+        return None
+
+    def routes(self):
+        """List registered (method, path) pairs, mainly for debugging"""
+        found = [(method, path) for method, paths in self._exact.items() for path in paths]
+
+        def collect(method, node, parts):
+            if node.handler is not None:
+                names = iter(node.param_names)
+                found.append((method, '/'.join(
+                    '{' + next(names) + '}' if part is None else part for part in parts
+                )))
+            for segment, child in node.literals.items():
+                collect(method, child, parts + [segment])
+            if node.param_child is not None:
+                collect(method, node.param_child, parts + [None])
+
+        for method, root in self._trees.items():
+            collect(method, root, [])
+        return found
@@ -3,75 +3,121 @@ import http.server
 import socketserver
 import urllib.parse
 from http import cookies
-import cgi
 import os
-import re
-import datetime 
-from auth.auth_handler import login, register, destroy_session, validate_session, get_user_from_session
+import html
+from http import HTTPStatus
+from dotenv import load_dotenv
+from auth.auth_handler import login, register, destroy_session, destroy_user_sessions, get_user_from_session, configure_sessions
 from controllers.controller_init import register_all_routes
+from database.db_connection import transaction
+from services.search_index import build_indexes, start_refresher
+from serving.thread_pool import ThreadPoolHTTPServer
+from serving.prefork import PreforkSupervisor
+from serving.async_engine import AsyncHTTPServer
+from serving.body import BodyReader
+from routing.router import Router
+from routing.request import Request
+from serving.static_files import StaticFileCache, FileBody
+from serving.streaming import StreamBody, encode_chunk
+from serving.compression import compress_response, precompress_directory
+from serving import serialization
+from serving.multipart import MultipartParser, MultipartError, get_boundary, close_uploads
 
 
 
-class DateTimeEncoder(json.JSONEncoder):
-    def default(self, obj):
-        if isinstance(obj, (datetime.date, datetime.datetime)):
-            return obj.isoformat()
-        return super().default(obj)
-    
-
+# Load environment variables from .env file
+load_dotenv()
 
 # Configuration
-PORT = 8000
-HOST = "localhost"
+PORT = int(os.getenv("PORT", 8000))
+HOST = os.getenv("HOST", "localhost")
+
+# Serving mode: "threaded" uses a bounded worker pool, "single" serves one request at a time,
+# "prefork" runs several processes that each serve with a worker pool,
+# "async" handles connections on an asyncio event loop and runs handlers on SERVER_WORKERS threads
+SERVER_MODE = os.getenv("SERVER_MODE", "threaded")
+SERVER_WORKERS = int(os.getenv("SERVER_WORKERS", 16))
+SERVER_QUEUE_SIZE = int(os.getenv("SERVER_QUEUE_SIZE", 128))
+SERVER_BACKLOG = int(os.getenv("SERVER_BACKLOG", 128))
+PREFORK_PROCESSES = int(os.getenv("PREFORK_PROCESSES", os.cpu_count() or 1))
+PREFORK_REUSE_PORT = os.getenv("PREFORK_REUSE_PORT", "false").lower() == "true"
+PREFORK_SHUTDOWN_TIMEOUT = int(os.getenv("PREFORK_SHUTDOWN_TIMEOUT", 30))
+KEEPALIVE_TIMEOUT = int(os.getenv("KEEPALIVE_TIMEOUT", 15))
+
+# JSON encoder for response bodies: auto (orjson when installed), orjson or stdlib
+JSON_ENCODER = os.getenv("JSON_ENCODER", "auto")
+serialization.set_encoder(JSON_ENCODER)
+
+# Request bodies: anything larger than MAX_BODY_SIZE is refused with 413,
+# uploaded files move from memory to a temporary file past UPLOAD_SPOOL_SIZE
+MAX_BODY_SIZE = int(os.getenv("MAX_BODY_SIZE", 256 * 1024 * 1024))
+UPLOAD_SPOOL_SIZE = int(os.getenv("UPLOAD_SPOOL_SIZE", 1024 * 1024))
+
+# Static files: assets may be cached by browsers for STATIC_MAX_AGE seconds, HTML is always revalidated
+STATIC_MAX_AGE = int(os.getenv("STATIC_MAX_AGE", 3600))
+STATIC_CACHE_MAX_FILE_SIZE = int(os.getenv("STATIC_CACHE_MAX_FILE_SIZE", 1024 * 1024))
 
-# Dictionary to store route handlers
-routes = {}
+# Response compression for bodies of at least COMPRESSION_MIN_SIZE bytes
+COMPRESSION_ENABLED = os.getenv("COMPRESSION_ENABLED", "true").lower() == "true"
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", 1024))
 
-# Utility function to parse cookies
-def parse_cookies(cookie_string):
-    cookie = cookies.SimpleCookie()
-    cookie.load(cookie_string)
-    return {key: morsel.value for key, morsel in cookie.items()}
+# Requests with these methods run their handler inside one database transaction
+TRANSACTIONAL_METHODS = ('POST', 'PUT', 'DELETE')
 
-# Utility function to parse query parameters
-def parse_query_params(query_string):
-    return {k: v[0] for k, v in urllib.parse.parse_qs(query_string).items()}
+# Compiled route table
+router = Router()
+
+# In-memory caches for client files
+static_files = StaticFileCache(
+    os.path.join('client', 'static'),
+    cache_control=f'public, max-age={STATIC_MAX_AGE}',
+    max_file_size=STATIC_CACHE_MAX_FILE_SIZE,
+    precompressed=COMPRESSION_ENABLED
+)
+html_files = StaticFileCache(
+    'client',
+    cache_control='no-cache',
+    max_file_size=STATIC_CACHE_MAX_FILE_SIZE,
+    precompressed=COMPRESSION_ENABLED
+)
+
+class RequestError(Exception):
+    """Raised while reading a request to answer it with an HTTP error status"""
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
 
 # Utility function to parse JSON body
-def parse_json_body(request_handler):
-    content_length = int(request_handler.headers.get('Content-Length', 0))
+def parse_json_body(headers, rfile):
+    content_length = int(headers.get('Content-Length', 0))
     if content_length == 0:
         return {}
     
-    body = request_handler.rfile.read(content_length)
+    body = rfile.read(content_length)
     try:
         return json.loads(body.decode('utf-8'))
     except json.JSONDecodeError:
         return {}
 
 # Utility function to parse form data
-def parse_form_data(request_handler):
-    content_type = request_handler.headers.get('Content-Type', '')
+# Uploaded files are handed to controllers as {'filename', 'content_type', 'file', 'size'},
+# where 'file' is a spooled temporary file positioned at the start
+def parse_form_data(headers, rfile):
+    content_type = headers.get('Content-Type', '')
     if 'multipart/form-data' in content_type:
-        form = cgi.FieldStorage(
-            fp=request_handler.rfile,
-            headers=request_handler.headers,
-            environ={'REQUEST_METHOD': 'POST'}
-        )
-        data = {}
-        for field in form.keys():
-            if form[field].filename:
-                # Handle file upload
-                data[field] = {
-                    'filename': form[field].filename,
-                    'value': form[field].value
-                }
-            else:
-                data[field] = form[field].value
-        return data
+        try:
+            parser = MultipartParser(
+                rfile,
+                get_boundary(content_type),
+                spool_size=UPLOAD_SPOOL_SIZE
+            )
+            return parser.parse()
+        except MultipartError as e:
+            raise RequestError(400, str(e))
     else:
-        content_length = int(request_handler.headers.get('Content-Length', 0))
-        post_data = request_handler.rfile.read(content_length).decode('utf-8')
+        content_length = int(headers.get('Content-Length', 0))
+        post_data = rfile.read(content_length).decode('utf-8')
         return {k: v[0] for k, v in urllib.parse.parse_qs(post_data).items()}
 
 # Route decorator
@@ -81,21 +127,213 @@ def route(path, methods=None):
     
     def decorator(func):
         for method in methods:
-            # Check if path contains parameters like {id}
-            if '{' in path:
-                # Convert to regex pattern
-                pattern = path.replace('{', '(?P<').replace('}', '>[^/]+)')
-                routes[(method.upper(), re.compile(pattern))] = func
-            else:
-                routes[(method.upper(), path)] = func
+            router.add(method, path, func)
         return func
     
     return decorator
 
+def error_result(status, message):
+    """Build an HTML error result in the same format as http.server's error page"""
+    return {
+        'status': status,
+        'content_type': 'text/html;charset=utf-8',
+        'body': http.server.DEFAULT_ERROR_MESSAGE % {
+            'code': status,
+            'message': html.escape(message, quote=False),
+            'explain': html.escape(HTTPStatus(status).description, quote=False)
+        }
+    }
+
+def serve_static_file(path, headers):
+    # Strip off the /static/ prefix
+    result = static_files.respond(path[8:], headers)
+    return result or error_result(404, "File not found")
+
+def serve_html_file(path, headers):
+    # If root path, serve index.html
+    if path == '/':
+        file_path = 'index.html'
+    else:
+        # Strip off the leading slash
+        file_path = path[1:]
+    
+    result = html_files.respond(file_path, headers)
+    return result or error_result(404, "File not found")
+
+def build_request(method, raw_path, headers, rfile):
+    """Parse the request line, cookies and body into the object passed to route handlers"""
+    # Split the URL path from the query string; both are parsed lazily by Request
+    path, _, query_string = raw_path.partition('?')
+    path = path.split('#', 1)[0]
+    
+    # Create request object to pass to route handlers
+    request = Request(method, path, query_string, headers)
+    
+    # Refuse bodies over the limit before reading any of them
+    content_length = int(headers.get('Content-Length', 0) or 0)
+    if content_length > MAX_BODY_SIZE:
+        raise RequestError(413, f"Request body exceeds {MAX_BODY_SIZE} bytes")
+    
+    # Parse request body based on content type
+    if method in ['POST', 'PUT']:
+        content_type = headers.get('Content-Type', '')
+        if 'application/json' in content_type:
+            request.json_data = parse_json_body(headers, rfile)
+        else:
+            request.form_data = parse_form_data(headers, rfile)
+    
+    return request
+
+def dispatch(request):
+    """Route a request to static files, API handlers or HTML pages and return a result dict"""
+    method = request.method
+    path = request.path
+    
+    # Check for static file requests
+    if path.startswith('/static/'):
+        return serve_static_file(path, request.headers)
+    
+    # Check for session and set user if authenticated
+    session_id = request.cookies.get('session_id')
+    if session_id:
+        request.user = get_user_from_session(session_id)
+    
+    # Find matching route handler
+    handler, request.path_params = router.match(method, path)
+    
+    if handler:
+        # Execute the route handler
+        try:
+            if method in TRANSACTIONAL_METHODS:
+                # Every model call in a mutating request shares one connection and commits once
+                with transaction() as unit:
+                    result = handler(request)
+                    if result.get('status', 200) >= 500:
+                        unit.mark_rollback_only()
+                # A query that failed inside the handler, or a failed COMMIT, rolled everything back
+                if not unit.committed and result.get('status', 200) < 500:
+                    return error_result(500, "The request could not be saved; no changes were made")
+                return result
+            return handler(request)
+        except Exception as e:
+            print(f"Error handling request: {e}")
+            return error_result(500, str(e))
+    
+    # Check if it's an HTML file
+    if path.endswith('.html') or path == '/':
+        return serve_html_file(path, request.headers)
+    
+    # Route not found
+    return error_result(404, "Route not found")
+
+def render_result(result):
+    """Turn a handler result dict into a status code, header list and body bytes"""
+    headers = []
+    
+    # Set cookies if needed
+    if 'cookies' in result:
+        for name, value in result['cookies'].items():
+            cookie = cookies.SimpleCookie()
+            cookie[name] = value
+            headers.append(('Set-Cookie', cookie[name].OutputString()))
+    
+    # Set headers if needed
+    if 'headers' in result:
+        for name, value in result['headers'].items():
+            headers.append((name, value))
+    
+    status = result.get('status', 200)
+    
+    # Set content type
+    if status != 304:
+        headers.append(('Content-type', result.get('content_type', 'application/json')))
+    
+    # Encode response body
+    body = b''
+    if 'body' in result:
+        if isinstance(result['body'], str):
+            body = result['body'].encode('utf-8')
+        elif isinstance(result['body'], (bytes, FileBody, StreamBody)):
+            body = result['body']
+        else:
+            body = serialization.dumps(result['body'])
+    
+    return status, headers, body
+
+def process_request(method, raw_path, headers, rfile):
+    """Run one request through the application, independent of the serving engine"""
+    request = None
+    try:
+        # HEAD is answered like GET; the serving engines leave out the body
+        request = build_request('GET' if method == 'HEAD' else method, raw_path, headers, rfile)
+        result = dispatch(request)
+    except RequestError as e:
+        result = error_result(e.status, e.message)
+    except Exception as e:
+        print(f"Error handling request: {e}")
+        result = error_result(500, str(e))
+    finally:
+        # Remove spooled upload files once the handler is done with them
+        if request is not None:
+            close_uploads(request.form_data)
+    
+    status, response_headers, body = render_result(result)
+    
+    # Compress in one place so every route and static file benefits
+    if COMPRESSION_ENABLED and status not in (204, 304):
+        body = compress_response(
+            response_headers,
+            body,
+            headers.get('Accept-Encoding'),
+            min_size=COMPRESSION_MIN_SIZE
+        )
+    
+    return status, response_headers, body
+
 class RequestHandler(http.server.SimpleHTTPRequestHandler):
+    # Keep connections open between requests. Reads and writes give up after KEEPALIVE_TIMEOUT
+    # seconds; the worker pool also closes connections idle for that long, see handle()
+    protocol_version = 'HTTP/1.1'
+    timeout = KEEPALIVE_TIMEOUT
+    
+    def handle(self):
+        """
+        Serve requests on the connection until it closes or goes idle
+
+        Under the worker pool a keep-alive connection with no request waiting
+        is handed back (self.idle) to be watched without a thread, so idle
+        clients do not hold a worker. Single mode keeps reading on this thread.
+        """
+        self.idle = False
+        self.close_connection = True
+        self.handle_one_request()
+        can_park = hasattr(self.server, 'park')
+        while not self.close_connection:
+            if can_park:
+                try:
+                    waiting = self.request_waiting()
+                except OSError:
+                    return
+                if not waiting:
+                    self.idle = True
+                    return
+            self.handle_one_request()
+    
+    def request_waiting(self):
+        """Whether the next request has started to arrive, checked without blocking"""
+        # A parked connection is read again from a fresh rfile, so nothing may be left buffered
+        self.connection.settimeout(0)
+        try:
+            return bool(self.rfile.peek(1))
+        finally:
+            self.connection.settimeout(self.timeout)
+    
     def do_GET(self):
         self.handle_request('GET')
     
+    def do_HEAD(self):
+        self.handle_request('HEAD')
+    
     def do_POST(self):
         self.handle_request('POST')
     
@@ -106,158 +344,73 @@ class RequestHandler(http.server.SimpleHTTPRequestHandler):
         self.handle_request('DELETE')
     
     def handle_request(self, method):
-        # Parse URL path and query parameters
-        parsed_url = urllib.parse.urlparse(self.path)
-        path = parsed_url.path
-        query_params = parse_query_params(parsed_url.query)
+        try:
+            content_length = int(self.headers.get('Content-Length', 0) or 0)
+        except ValueError:
+            content_length = -1
+        if content_length < 0:
+            # send_error() also closes the connection, since the body cannot be framed
+            self.send_error(400, "Bad Content-Length")
+            return
+        request_body = BodyReader(self.rfile, content_length)
         
-        # Parse cookies
-        cookies_string = self.headers.get('Cookie', '')
-        self.cookies = parse_cookies(cookies_string)
+        status, headers, body = process_request(method, self.path, self.headers, request_body)
         
-        # Create request object to pass to route handlers
-        self.request = type('Request', (), {
-            'method': method,
-            'path': path,
-            'query_params': query_params,
-            'cookies': self.cookies,
-            'headers': self.headers,
-            'form_data': {},
-            'json_data': {},
-            'user': None
-        })
+        # Skip any body the handler left unread so the next request starts at the right byte;
+        # chunked or oversized leftovers cannot be skipped safely, so close instead
+        if self.headers.get('Transfer-Encoding') or not request_body.drain():
+            self.close_connection = True
         
-        # Parse request body based on content type
-        if method in ['POST', 'PUT']:
-            content_type = self.headers.get('Content-Type', '')
-            if 'application/json' in content_type:
-                self.request.json_data = parse_json_body(self)
-            else:
-                self.request.form_data = parse_form_data(self)
+        # Streamed bodies have no length up front: chunk them, or end them by closing for HTTP/1.0
+        chunked = isinstance(body, StreamBody) and self.request_version == 'HTTP/1.1'
+        if isinstance(body, StreamBody) and not chunked:
+            self.close_connection = True
         
-        # Check for static file requests
-        if path.startswith('/static/'):
-            return self.serve_static_file(path)
+        self.send_response(status)
+        for name, value in headers:
+            self.send_header(name, value)
+        if chunked:
+            self.send_header('Transfer-Encoding', 'chunked')
+        elif status != 304 and not isinstance(body, StreamBody):
+            self.send_header('Content-Length', str(len(body)))
+        if self.close_connection:
+            self.send_header('Connection', 'close')
+        self.end_headers()
         
-        # Check for session and set user if authenticated
-        session_id = self.cookies.get('session_id')
-        if session_id:
-            self.request.user = get_user_from_session(session_id)
-        
-        # Find matching route handler
-        handler = self.find_route_handler(method, path)
-        
-        if handler:
-            # Execute the route handler
-            try:
-                result = handler(self.request)
-                self.send_response(result.get('status', 200))
-                
-                # Set cookies if needed
-                if 'cookies' in result:
-                    for name, value in result['cookies'].items():
-                        cookie = cookies.SimpleCookie()
-                        cookie[name] = value
-                        self.send_header('Set-Cookie', cookie[name].OutputString())
-                
-                # Set headers if needed
-                if 'headers' in result:
-                    for name, value in result['headers'].items():
-                        self.send_header(name, value)
-                
-                # Set content type
-                self.send_header('Content-type', result.get('content_type', 'application/json'))
-                self.end_headers()
-                
-                # Send response body
-                if 'body' in result:
-                    if isinstance(result['body'], str):
-                        self.wfile.write(result['body'].encode('utf-8'))
-                    elif isinstance(result['body'], bytes):
-                        self.wfile.write(result['body'])
-                    else:
-                        self.wfile.write(json.dumps(result['body'],cls=DateTimeEncoder).encode('utf-8'))
-            except Exception as e:
-                print(f"Error handling request: {e}")
-                self.send_error(500, str(e))
+        # Send response body
+        if method == 'HEAD':
+            if isinstance(body, StreamBody):
+                body.close()
+        elif isinstance(body, FileBody):
+            self.send_file(body)
+        elif isinstance(body, StreamBody):
+            self.send_stream(body, chunked)
         else:
-            # Check if it's an HTML file
-            if path.endswith('.html') or path == '/':
-                return self.serve_html_file(path)
-            
-            # Route not found
-            self.send_error(404, "Route not found")
-    
-    def find_route_handler(self, method, path):
-        # First check for exact matches
-        exact_match = routes.get((method, path))
-        if exact_match:
-            return exact_match
-        
-        # Then check for regex pattern matches
-        for (route_method, route_path), handler in routes.items():
-            if route_method != method:
-                continue
-            
-            if isinstance(route_path, re.Pattern):
-                match = route_path.fullmatch(path)
-                if match:
-                    # Add captured parameters to request
-                    self.request.path_params = match.groupdict()
-                    return handler
-        
-        return None
+            self.wfile.write(body)
     
-    def serve_static_file(self, path):
-        # Strip off the /static/ prefix
-        file_path = path[8:]
-        
-        # Determine the file's full path
-        full_path = os.path.join('client', 'static', file_path)
-        
-        if os.path.exists(full_path) and os.path.isfile(full_path):
-            # Determine content type based on file extension
-            _, ext = os.path.splitext(full_path)
-            content_types = {
-                '.css': 'text/css',
-                '.js': 'application/javascript',
-                '.jpg': 'image/jpeg',
-                '.jpeg': 'image/jpeg',
-                '.png': 'image/png',
-                '.gif': 'image/gif',
-                '.svg': 'image/svg+xml'
-            }
-            content_type = content_types.get(ext.lower(), 'application/octet-stream')
-            
-            self.send_response(200)
-            self.send_header('Content-type', content_type)
-            self.end_headers()
-            
-            with open(full_path, 'rb') as file:
-                self.wfile.write(file.read())
-        else:
-            self.send_error(404, "File not found")
+    def send_file(self, body):
+        """Copy a file to the socket with sendfile, falling back to send() where it is unavailable"""
+        with open(body.path, 'rb') as file:
+            # The connection has a timeout, so its fd is non-blocking: socket.sendfile() waits
+            # for the send buffer to drain under that timeout where raw os.sendfile() fails with EAGAIN
+            self.connection.sendfile(file, 0, body.size)
     
-    def serve_html_file(self, path):
-        # If root path, serve index.html
-        if path == '/':
-            file_path = 'index.html'
-        else:
-            # Strip off the leading slash
-            file_path = path[1:]
-        
-        # Determine the file's full path
-        full_path = os.path.join('client', file_path)
-        
-        if os.path.exists(full_path) and os.path.isfile(full_path):
-            self.send_response(200)
-            self.send_header('Content-type', 'text/html')
-            self.end_headers()
-            
-            with open(full_path, 'rb') as file:
-                self.wfile.write(file.read())
-        else:
-            self.send_error(404, "File not found")
+    def send_stream(self, body, chunked):
+        """Write a StreamBody as it is produced; a failure mid-stream drops the connection"""
+        try:
+            while True:
+                chunk = body.next_chunk()
+                if chunk is None:
+                    break
+                self.wfile.write(encode_chunk(chunk) if chunked else chunk)
+            if chunked:
+                self.wfile.write(encode_chunk(b''))
+        except Exception as e:
+            # Headers are already out, so the only way to signal the error is a truncated body
+            print(f"Error streaming response: {e}")
+            self.close_connection = True
+        finally:
+            body.close()
 
 # Define authentication routes
 @route('/api/login', methods=['POST'])
@@ -326,25 +479,34 @@ def api_logout(request):
         'body': {'success': True, 'message': 'Logout successful'}
     }
 
-@route('/api/check-auth', methods=['GET'])
-def api_check_auth(request):
-    session_id = request.cookies.get('session_id')
-    
-    if not session_id:
+@route('/api/logout-all', methods=['POST'])
+def api_logout_all(request):
+    # Ends this session too, along with those on every other device
+    if not request.user:
         return {
             'status': 401,
-            'body': {'authenticated': False}
+            'body': {'success': False, 'message': 'Unauthorized: Please login to continue'}
         }
     
-    session = validate_session(session_id)
-    if not session:
+    ended = destroy_user_sessions(request.user['id'])
+    
+    return {
+        'status': 200,
+        'cookies': {'session_id': ''},
+        'body': {'success': True, 'message': 'Logged out of all sessions', 'sessions_ended': ended}
+    }
+
+@route('/api/check-auth', methods=['GET'])
+def api_check_auth(request):
+    # Resolved from the session cookie by dispatch()
+    user = request.user
+    
+    if not user:
         return {
             'status': 401,
             'body': {'authenticated': False}
         }
     
-    user = get_user_from_session(session_id)
-    
     return {
         'status': 200,
         'body': {
@@ -362,19 +524,85 @@ def api_check_auth(request):
 # Register all routes
 register_all_routes(route)
 
+# Build the server for the requested serving mode
+def create_server(mode=None, bind_and_activate=True):
+    mode = mode or SERVER_MODE
+    
+    if mode == 'single':
+        return socketserver.TCPServer((HOST, PORT), RequestHandler, bind_and_activate)
+    
+    # Keep this process's search indexes in step with other processes' writes
+    start_refresher()
+    
+    if mode in ('threaded', 'prefork'):
+        return ThreadPoolHTTPServer(
+            (HOST, PORT),
+            RequestHandler,
+            workers=SERVER_WORKERS,
+            queue_size=SERVER_QUEUE_SIZE,
+            backlog=SERVER_BACKLOG,
+            keepalive_timeout=KEEPALIVE_TIMEOUT,
+            bind_and_activate=bind_and_activate
+        )
+    
+    if mode == 'async':
+        return AsyncHTTPServer(
+            process_request,
+            HOST,
+            PORT,
+            executor_workers=SERVER_WORKERS,
+            backlog=SERVER_BACKLOG,
+            keepalive_timeout=KEEPALIVE_TIMEOUT,
+            max_body_size=MAX_BODY_SIZE,
+            spool_size=UPLOAD_SPOOL_SIZE
+        )
+    
+    raise ValueError(f"Unknown server mode: {mode}")
+
+# Run worker processes under a supervisor
+def run_prefork():
+    print(f"Starting server at http://{HOST}:{PORT} (prefork mode, {PREFORK_PROCESSES} processes)")
+    supervisor = PreforkSupervisor(
+        lambda bind_and_activate: create_server('prefork', bind_and_activate),
+        (HOST, PORT),
+        processes=PREFORK_PROCESSES,
+        backlog=SERVER_BACKLOG,
+        reuse_port=PREFORK_REUSE_PORT,
+        shutdown_timeout=PREFORK_SHUTDOWN_TIMEOUT
+    )
+    supervisor.run()
+    print("Server stopped")
+
 # Start the server
-def run_server():
+def run_server(mode=None):
+    # Prefork workers need a session store they all share
+    if not configure_sessions(mode or SERVER_MODE):
+        return
+    
     # Create the directory structure if it doesn't exist
     os.makedirs('client/static', exist_ok=True)
     
-    print(f"Starting server at http://{HOST}:{PORT}")
-    httpd = socketserver.TCPServer((HOST, PORT), RequestHandler)
+    # Build .gz siblings for static text assets once, before any worker starts
+    if COMPRESSION_ENABLED:
+        written = precompress_directory('client', min_size=COMPRESSION_MIN_SIZE)
+        if written:
+            print(f"Precompressed {written} static files")
+    
+    # Build search indexes once; prefork workers inherit them copy-on-write
+    build_indexes()
+    
+    if (mode or SERVER_MODE) == 'prefork':
+        return run_prefork()
+    
+    httpd = create_server(mode)
+    print(f"Starting server at http://{HOST}:{PORT} ({mode or SERVER_MODE} mode)")
     try:
         httpd.serve_forever()
     except KeyboardInterrupt:
         print("Server stopped")
     finally:
-        httpd.server_close()
+        if hasattr(httpd, 'server_close'):
+            httpd.server_close()
 
 if __name__ == "__main__":
     run_server()
\ No newline at end of file
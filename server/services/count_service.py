@@ -0,0 +1,153 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from dotenv import load_dotenv
+from database.db_connection import execute_query, current_unit_of_work, has_written, on_commit
+from services.generations import generations
+
+# Load environment variables from .env file
+load_dotenv()
+
+# Count cache settings
+COUNT_CACHE_TTL = float(os.getenv("COUNT_CACHE_TTL", 300))
+COUNT_CACHE_MAX_ENTRIES = int(os.getenv("COUNT_CACHE_MAX_ENTRIES", 1024))
+COUNT_ESTIMATE_THRESHOLD = int(os.getenv("COUNT_ESTIMATE_THRESHOLD", 0))
+
+
+class EstimatedCount(int):
+    """A row count taken from table statistics rather than COUNT(*)"""
+    estimated = True
+
+
+class CountService:
+    """
+    Cached COUNT(*) results for paginated listings
+
+    Counts are keyed by table, WHERE condition and parameters, so filtered
+    counts (searches, per-artist, per-genre) are cached next to the plain
+    table totals. Every entry of a table is dropped when a write to that
+    table commits: in this process at once, and in other worker processes
+    on lookup, because each entry records the table's shared generation
+    (see services/generations.py) and the commit bumps it. Entries also
+    expire after ttl seconds as a backstop for writes made outside the models.
+    Inside a transaction() block that has written the table the cache is
+    bypassed, and counts read inside any block are not stored, since the
+    block may yet roll back.
+
+    When estimate_threshold is set, unfiltered counts of tables whose
+    statistics report at least that many rows come from
+    information_schema instead of a full COUNT(*).
+    """
+
+    def __init__(self, ttl=300, max_entries=1024, estimate_threshold=0):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.estimate_threshold = estimate_threshold
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.estimates = 0
+        self.invalidations = 0
+
+    def _get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[1] > time.monotonic() and entry[2] == generations.get(key[0]):
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+            return None
+
+    def _put(self, key, generation, value):
+        with self.lock:
+            # A write committed while we were counting; the value may be stale
+            if generations.get(key[0]) != generation:
+                return
+            self.entries[key] = (value, time.monotonic() + self.ttl, generation)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def count(self, table, condition=None, params=(), estimate=False):
+        """
+        Number of rows in table matching condition (a trusted SQL fragment)
+        With estimate=True an unfiltered count may be an EstimatedCount
+        """
+        # This transaction's own uncommitted writes are not in the cache
+        if has_written(table):
+            value = self._load(table, condition, params, estimate)
+            return 0 if value is None else value
+
+        key = (table, condition, tuple(params))
+        value = self._get(key)
+        if value is not None:
+            return value
+
+        generation = generations.get(table)
+        value = self._load(table, condition, params, estimate)
+        if value is None:
+            return 0
+        if current_unit_of_work() is None:
+            self._put(key, generation, value)
+        return value
+
+    def _load(self, table, condition, params, estimate):
+        """Count from the database, or None if there's an error"""
+        if estimate and condition is None and self.estimate_threshold:
+            value = self._estimate(table)
+            if value is not None:
+                return value
+        query = f"SELECT COUNT(*) as count FROM {table}"
+        if condition:
+            query += f" WHERE {condition}"
+        result = execute_query(query, params or None, fetchone=True)
+        if result is None:
+            return None
+        return result['count']
+
+    def _estimate(self, table):
+        """Row estimate from table statistics, or None when the table is small enough to count"""
+        query = """
+            SELECT TABLE_ROWS as estimate FROM information_schema.TABLES
+            WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s
+        """
+        result = execute_query(query, (table,), fetchone=True)
+        if not result or result['estimate'] is None or result['estimate'] < self.estimate_threshold:
+            return None
+        with self.lock:
+            self.estimates += 1
+        return EstimatedCount(result['estimate'])
+
+    def invalidate(self, *tables):
+        """Drop cached counts for tables once the current transaction commits"""
+        on_commit(lambda: self._invalidate_now(tables))
+
+    def _invalidate_now(self, tables):
+        generations.bump(*tables)
+        with self.lock:
+            for key in [key for key in self.entries if key[0] in tables]:
+                del self.entries[key]
+            self.invalidations += 1
+
+    def stats(self):
+        with self.lock:
+            return {
+                'entries': len(self.entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'estimates': self.estimates,
+                'invalidations': self.invalidations
+            }
+
+
+# Shared by every model in this process
+counts = CountService(
+    ttl=COUNT_CACHE_TTL,
+    max_entries=COUNT_CACHE_MAX_ENTRIES,
+    estimate_threshold=COUNT_ESTIMATE_THRESHOLD
+)
@@ -0,0 +1,198 @@
+import os
+import threading
+import time
+from dotenv import load_dotenv
+from database.db_connection import execute_query, on_commit
+from services.generations import generations
+
+# Load environment variables from .env file
+load_dotenv()
+
+# Seconds between reconciling the counters against the database; 0 disables it
+COUNTERS_RECONCILE_INTERVAL = float(os.getenv("COUNTERS_RECONCILE_INTERVAL", 300))
+
+# GROUP BY query that rebuilds each counter family from scratch
+FAMILIES = {
+    'genre': "SELECT genre as name, COUNT(*) as count FROM music WHERE genre IS NOT NULL GROUP BY genre",
+    'role': "SELECT role as name, COUNT(*) as count FROM users GROUP BY role",
+    'artist': "SELECT artist_id as name, COUNT(*) as count FROM music GROUP BY artist_id"
+}
+
+# Table each family counts, whose shared generation tells when a loaded family is out of date
+FAMILY_TABLES = {'genre': 'music', 'role': 'users', 'artist': 'music'}
+
+
+class AggregateCounters:
+    """
+    In-memory song counts per genre and per artist, and user counts per role
+
+    Each family is loaded with one GROUP BY query the first time it is read,
+    after which lookups are dictionary reads. The model write paths report
+    every change through the song_*/user_* methods; the deltas are applied
+    when the surrounding transaction commits, so rolled back writes never
+    count.
+
+    A loaded family records the shared generation of the table it counts
+    (see services/generations.py), read before its query ran. Once a write
+    to that table commits in any worker process the family is reloaded on
+    its next read, like CountService entries, so counts used as pagination
+    totals agree with the cached pages. That includes writes that committed
+    while the family was loading. Writes made outside the models do not
+    bump generations, so a background thread also reloads the loaded
+    families every reconcile_interval seconds and records how far they had
+    drifted.
+    """
+
+    def __init__(self, reconcile_interval=300):
+        self.reconcile_interval = reconcile_interval
+        self.values = {}
+        self.generations = {}
+        self.lock = threading.Lock()
+        self.reconciler_pid = None
+
+        self.loads = 0
+        self.reconciles = 0
+        self.drift = 0
+        self.last_reconcile = None
+
+    def load_query(self, family):
+        """The GROUP BY query that loads a family, for callers that only want to inspect it"""
+        return FAMILIES[family]
+
+    def _load(self, family):
+        rows = execute_query(self.load_query(family), fetchall=True)
+        if rows is None:
+            return None
+        return {row['name']: row['count'] for row in rows}
+
+    def _family(self, family):
+        self._ensure_reconciler()
+        generation = generations.get(FAMILY_TABLES[family])
+        with self.lock:
+            values = self.values.get(family)
+            if values is not None and self.generations[family] == generation:
+                return values
+
+        loaded = self._load(family)
+        if loaded is None:
+            return values or {}
+        return self._store(family, generation, loaded)
+
+    def _store(self, family, generation, loaded):
+        """Keep a freshly loaded family unless another thread stored one loaded at a later generation"""
+        with self.lock:
+            if family not in self.values or self.generations[family] <= generation:
+                self.values[family] = loaded
+                self.generations[family] = generation
+                self.loads += 1
+            return self.values[family]
+
+    def get(self, family, name):
+        values = self._family(family)
+        with self.lock:
+            return values.get(name, 0)
+
+    def _apply(self, changes):
+        with self.lock:
+            for family, name, delta in changes:
+                values = self.values.get(family)
+                # Families not loaded yet will read the change from the database
+                if values is None or name is None:
+                    continue
+                count = values.get(name, 0) + delta
+                if count > 0:
+                    values[name] = count
+                else:
+                    values.pop(name, None)
+
+    def _record(self, changes):
+        on_commit(lambda: self._apply(changes))
+
+    def song_added(self, artist_id, genre):
+        self.songs_added([(artist_id, genre)])
+
+    def songs_added(self, songs):
+        """Count new songs given as (artist_id, genre) pairs"""
+        changes = []
+        for artist_id, genre in songs:
+            changes.append(('artist', int(artist_id), 1))
+            changes.append(('genre', genre, 1))
+        self._record(changes)
+
+    def song_removed(self, artist_id, genre):
+        self._record([('artist', int(artist_id), -1), ('genre', genre, -1)])
+
+    def songs_removed_by_genre(self, artist_id, genre_counts):
+        """An artist's songs went away in a cascade; genre_counts maps genre to songs removed"""
+        changes = [('genre', genre, -count) for genre, count in genre_counts.items()]
+        changes.append(('artist', int(artist_id), -sum(genre_counts.values())))
+        self._record(changes)
+
+    def user_added(self, role):
+        self.users_added([role])
+
+    def users_added(self, roles):
+        self._record([('role', role, 1) for role in roles])
+
+    def user_removed(self, role):
+        self._record([('role', role, -1)])
+
+    def reconcile(self):
+        """Reload every loaded family from the database and return the total drift found"""
+        with self.lock:
+            families = list(self.values)
+
+        drift = 0
+        for family in families:
+            generation = generations.get(FAMILY_TABLES[family])
+            loaded = self._load(family)
+            if loaded is None:
+                continue
+            with self.lock:
+                current = self.values.get(family, {})
+                for name in set(current) | set(loaded):
+                    drift += abs(current.get(name, 0) - loaded.get(name, 0))
+                self.values[family] = loaded
+                self.generations[family] = generation
+
+        with self.lock:
+            self.reconciles += 1
+            self.drift += drift
+            self.last_reconcile = time.time()
+        return drift
+
+    def _ensure_reconciler(self):
+        # Threads do not survive fork, so each prefork worker starts its own
+        if not self.reconcile_interval or self.reconciler_pid == os.getpid():
+            return
+        with self.lock:
+            if self.reconciler_pid == os.getpid():
+                return
+            self.reconciler_pid = os.getpid()
+        thread = threading.Thread(target=self._reconcile_loop, name='counters-reconcile', daemon=True)
+        thread.start()
+
+    def _reconcile_loop(self):
+        while True:
+            time.sleep(self.reconcile_interval)
+            try:
+                drift = self.reconcile()
+                if drift:
+                    print(f"Aggregate counters reconciled, corrected drift of {drift}")
+            except Exception as e:
+                print(f"Error reconciling aggregate counters: {e}")
+
+    def stats(self):
+        with self.lock:
+            return {
+                'loaded': sorted(self.values),
+                'loads': self.loads,
+                'reconciles': self.reconciles,
+                'drift_corrected': self.drift,
+                'last_reconcile': self.last_reconcile,
+                'reconcile_interval': self.reconcile_interval
+            }
+
+
+# Shared by every model in this process
+counters = AggregateCounters(reconcile_interval=COUNTERS_RECONCILE_INTERVAL)
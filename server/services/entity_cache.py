@@ -0,0 +1,155 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from dotenv import load_dotenv
+from database.db_connection import current_unit_of_work, has_written, mark_written, on_commit
+from services.generations import generations
+
+# Load environment variables from .env file
+load_dotenv()
+
+# Entity cache settings; each table's TTL defaults to ENTITY_CACHE_TTL
+ENTITY_CACHE_ENABLED = os.getenv("ENTITY_CACHE_ENABLED", "true").lower() == "true"
+ENTITY_CACHE_TTL = float(os.getenv("ENTITY_CACHE_TTL", 300))
+ENTITY_CACHE_USERS_SIZE = int(os.getenv("ENTITY_CACHE_USERS_SIZE", 1000))
+ENTITY_CACHE_USERS_TTL = float(os.getenv("ENTITY_CACHE_USERS_TTL", ENTITY_CACHE_TTL))
+ENTITY_CACHE_ARTISTS_SIZE = int(os.getenv("ENTITY_CACHE_ARTISTS_SIZE", 5000))
+ENTITY_CACHE_ARTISTS_TTL = float(os.getenv("ENTITY_CACHE_ARTISTS_TTL", ENTITY_CACHE_TTL))
+ENTITY_CACHE_MUSIC_SIZE = int(os.getenv("ENTITY_CACHE_MUSIC_SIZE", 10000))
+ENTITY_CACHE_MUSIC_TTL = float(os.getenv("ENTITY_CACHE_MUSIC_TTL", ENTITY_CACHE_TTL))
+
+
+class EntityCache:
+    """
+    LRU cache of one table's rows by id, in front of get_by_id
+
+    Entries expire after ttl seconds and the least recently used one is
+    evicted once there are more than max_entries. The model write paths call
+    invalidate(), which drops the entry at once and again when the
+    transaction commits. A generation number bumped on every invalidation
+    stops a read that raced a write from caching the old row.
+
+    Each entry also records the table's shared generation (see
+    services/generations.py), which the commit bumps in every process. A
+    write in another prefork worker therefore retires this worker's rows of
+    that table on their next lookup instead of when they expire.
+
+    Rows read inside a transaction() block are never cached: they may be
+    uncommitted. Once the block has written to the table it reads from the
+    database, so it sees its own changes. Callers get their own copy of each
+    row and may modify it.
+    """
+
+    def __init__(self, table, max_entries=1000, ttl=300, enabled=True):
+        self.table = table
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.enabled = enabled
+        self.entries = OrderedDict()
+        self.generation = 0
+        self.lock = threading.Lock()
+        self.listeners = []
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.stale = 0
+        self.invalidations = 0
+
+    def get(self, entity_id, load):
+        """Row for entity_id, from the cache or from load(entity_id) on a miss"""
+        try:
+            key = int(entity_id)
+        except (TypeError, ValueError):
+            return load(entity_id)
+        if not self.enabled or has_written(self.table):
+            return load(key)
+
+        with self.lock:
+            written = generations.get(self.table)
+            entry = self.entries.get(key)
+            if entry is not None:
+                row, expires, entry_written = entry
+                if entry_written == written and expires > time.monotonic():
+                    self.entries.move_to_end(key)
+                    self.hits += 1
+                    return dict(row)
+                del self.entries[key]
+                if entry_written != written:
+                    self.stale += 1
+                else:
+                    self.expirations += 1
+            self.misses += 1
+            generation = self.generation
+
+        row = load(key)
+        if row is not None and current_unit_of_work() is None:
+            self._put(key, generation, written, row)
+        return row
+
+    def _put(self, key, generation, written, row):
+        with self.lock:
+            # A write to the table landed while we were loading; the row may be stale
+            if self.generation != generation:
+                return
+            self.entries[key] = (dict(row), time.monotonic() + self.ttl, written)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, *entity_ids):
+        """Drop rows that are being written, now and once the current transaction commits"""
+        mark_written(self.table)
+        self._drop(entity_ids)
+        on_commit(lambda: self._committed(entity_ids))
+
+    def _committed(self, entity_ids):
+        generations.bump(self.table)
+        self._drop(entity_ids)
+
+    def _drop(self, entity_ids):
+        self.discard(*entity_ids)
+        for listener in self.listeners:
+            listener(*entity_ids)
+
+    def discard(self, *entity_ids):
+        """Drop this process's copies of rows known to be stale, without notifying listeners"""
+        with self.lock:
+            self.generation += 1
+            for entity_id in entity_ids:
+                try:
+                    self.entries.pop(int(entity_id), None)
+                except (TypeError, ValueError):
+                    continue
+            self.invalidations += 1
+
+    def add_listener(self, callback):
+        """Call callback(*entity_ids) whenever rows are invalidated, for copies kept outside the cache"""
+        self.listeners.append(callback)
+
+    def stats(self):
+        with self.lock:
+            return {
+                'enabled': self.enabled,
+                'entries': len(self.entries),
+                'max_entries': self.max_entries,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'stale': self.stale,
+                'invalidations': self.invalidations
+            }
+
+
+# Shared by every model in this process
+user_cache = EntityCache('users', ENTITY_CACHE_USERS_SIZE, ENTITY_CACHE_USERS_TTL, ENTITY_CACHE_ENABLED)
+artist_cache = EntityCache('artists', ENTITY_CACHE_ARTISTS_SIZE, ENTITY_CACHE_ARTISTS_TTL, ENTITY_CACHE_ENABLED)
+music_cache = EntityCache('music', ENTITY_CACHE_MUSIC_SIZE, ENTITY_CACHE_MUSIC_TTL, ENTITY_CACHE_ENABLED)
+
+def entity_cache_stats():
+    return {cache.table: cache.stats() for cache in (user_cache, artist_cache, music_cache)}
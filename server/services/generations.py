@@ -0,0 +1,44 @@
+import ctypes
+import multiprocessing
+
+# Tables whose writes the caches track; the shared array cannot grow once workers have forked
+TABLES = ('users', 'artists', 'music')
+
+
+class TableGenerations:
+    """
+    Per-table write generations in memory shared by every worker process
+
+    Caches note a table's generation when they store a result read from it,
+    and treat the result as stale once that generation has moved. The
+    models bump a table's generation when a write to it commits. The
+    numbers live in a shared mapping allocated when this module is
+    imported, which is before the prefork supervisor forks, so a commit in
+    one worker retires the cached results of every worker. Reading a
+    generation is one memory access; bumping takes a lock shared between
+    the processes.
+    """
+
+    def __init__(self, tables):
+        self.slots = {table: slot for slot, table in enumerate(tables)}
+        self.values = multiprocessing.RawArray(ctypes.c_longlong, len(tables))
+        self.lock = multiprocessing.Lock()
+
+    def get(self, table):
+        return self.values[self.slots[table]]
+
+    def snapshot(self, tables):
+        """Current generations of several tables, in the order given"""
+        return tuple(self.values[self.slots[table]] for table in tables)
+
+    def bump(self, *tables):
+        with self.lock:
+            for table in tables:
+                self.values[self.slots[table]] += 1
+
+    def stats(self):
+        return {table: self.values[slot] for table, slot in self.slots.items()}
+
+
+# Shared by every cache in this process and, after fork, by every prefork worker
+generations = TableGenerations(TABLES)
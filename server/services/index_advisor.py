@@ -0,0 +1,146 @@
+from datetime import datetime, timedelta
+from database.db_connection import execute_query, record_queries
+from models.artist_model import Artist
+from models.music_model import Music
+from models.user_model import User
+from services.count_service import counts
+from services.counters import counters, FAMILIES
+from services.search_index import INDEXES
+
+# EXPLAIN access types that read a whole table or a whole index
+FULL_SCANS = {'ALL': 'full table scan', 'index': 'full index scan'}
+
+
+def _sample_rows():
+    """One real user, artist and song to feed the model methods, with stand-ins for empty tables"""
+    user = execute_query("SELECT id, email, role FROM users ORDER BY id LIMIT 1", fetchone=True)
+    artist = execute_query("SELECT id FROM artists ORDER BY id LIMIT 1", fetchone=True)
+    song = execute_query("SELECT id, genre FROM music ORDER BY id LIMIT 1", fetchone=True)
+    return (
+        user or {'id': 1, 'email': 'admin@example.com', 'role': 'super_admin'},
+        artist or {'id': 1},
+        song or {'id': 1, 'genre': 'jazz'}
+    )
+
+def _first(generator):
+    """Start a streaming generator, then close it so only its query runs"""
+    try:
+        next(generator, None)
+    finally:
+        generator.close()
+
+def _checks(user, artist, song):
+    """
+    (label, run, full_scan_expected) for every query path the models and services take
+
+    run is a callable that makes the calls, or a list of (query, params)
+    that are explained without running them. Searches take the SQL
+    fallback because this process has not built the search indexes.
+    Writes are never run: their SQL comes from the models' query builders.
+    """
+    genre = song['genre'] or 'jazz'
+    since = datetime.now() - timedelta(days=1)
+    return [
+        ('User.get_by_id', lambda: User.get_by_id(user['id']), False),
+        ('User.get_by_email', lambda: User.get_by_email(user['email']), False),
+        ('User.get_all', lambda: User.get_all(page=2), False),
+        ('User.get_all (keyset)', lambda: User.get_all(after_id=user['id']), False),
+        ('User.get_by_role', lambda: User.get_by_role(user['role'], page=2), False),
+        ('User.count', lambda: counts.count('users'), True),
+        ('Artist.get_by_id', lambda: Artist.get_by_id(artist['id']), False),
+        ('Artist.get_many', lambda: Artist.get_many([artist['id']]), False),
+        ('Artist.get_all', lambda: Artist.get_all(page=2), False),
+        ('Artist.get_all (keyset)', lambda: Artist.get_all(after_id=artist['id']), False),
+        ('Artist.search (SQL fallback)', lambda: Artist.search('ab'), True),
+        ('Artist.search (SQL fallback, keyset)', lambda: Artist.search('ab', after_id=artist['id']), True),
+        ('Artist.count', lambda: Artist.count(), True),
+        ('Artist.count (search)', lambda: Artist.count('ab'), True),
+        ('Artist.export_to_csv', lambda: _first(Artist.export_to_csv()), True),
+        ('Music.get_by_id', lambda: Music.get_by_id(song['id']), False),
+        ('Music.get_many', lambda: Music.get_many([song['id']]), False),
+        ('Music.get_all', lambda: Music.get_all(page=2), False),
+        ('Music.get_all (keyset)', lambda: Music.get_all(after_id=song['id']), False),
+        ('Music.get_by_artist', lambda: Music.get_by_artist(artist['id'], page=2), False),
+        ('Music.get_by_artist (keyset)', lambda: Music.get_by_artist(artist['id'], after_id=song['id']), False),
+        ('Music.get_by_genre', lambda: Music.get_by_genre(genre, page=2), False),
+        ('Music.get_by_genre (keyset)', lambda: Music.get_by_genre(genre, after_id=song['id']), False),
+        ('Music.search (SQL fallback)', lambda: Music.search('ab'), True),
+        ('Music.count', lambda: Music.count(), True),
+        ('Music.count (search)', lambda: Music.count('ab'), True),
+        ('Aggregate counters', [(counters.load_query(family), None) for family in FAMILIES], True),
+        ('Search index build', [(index._select(index._where()), None) for index in INDEXES], True),
+        ('Search index refresh', [(index._select("WHERE updated_at >= %s"), (since,)) for index in INDEXES], False),
+        ('User.update', [User.update_query(user['id'], {'role': user['role']})], False),
+        ('Music.update', [Music.update_query(song['id'], {'genre': genre})], False),
+        ('Artist.update', [Artist.update_query(artist['id'], {'no_of_albums_released': 0})], False),
+        ('Music.delete', [Music.delete_query(song['id'])], False),
+        ('Artist.delete', Artist.delete_queries(artist['id']), False),
+        ('User.delete', [User.delete_query(user['id'])], False)
+    ]
+
+def collect_queries():
+    """
+    Run every check and return [(label, query, params, full_scan_expected)]
+    with each distinct query listed once, under the first check that issued it
+    """
+    user, artist, song = _sample_rows()
+    collected = []
+    seen = set()
+
+    for label, run, expected in _checks(user, artist, song):
+        if callable(run):
+            with record_queries() as queries:
+                run()
+        else:
+            queries = run
+        for query, params in queries:
+            text = ' '.join(query.split())
+            if text not in seen:
+                seen.add(text)
+                collected.append((label, text, params, expected))
+    return collected
+
+def run_advisor():
+    """
+    EXPLAIN every query the models issue and print the ones that scan a whole table or index
+
+    Scans that read a whole table by design (exports, counts, unindexed
+    LIKE searches, index builds) are reported as expected. A full index scan
+    in a query with a LIMIT stops early and is not flagged. MySQL picks plans
+    from table statistics, so run this against realistically sized data.
+    Returns the number of unexpected full scans, or None if there's an error.
+    """
+    collected = collect_queries()
+    unexpected = 0
+    expected_scans = 0
+
+    for label, query, params, expected in collected:
+        plan = execute_query(f"EXPLAIN {query}", params, fetchall=True)
+        if plan is None:
+            print(f"❌ Could not explain {label}: {query}")
+            return None
+
+        findings = []
+        for row in plan:
+            scan = FULL_SCANS.get(row.get('type'))
+            if row.get('select_type') == 'INSERT' or not row.get('table') or scan is None:
+                continue
+            if row['type'] == 'index' and ' LIMIT ' in query.upper():
+                continue
+            findings.append(f"{scan} on {row['table']} (~{row.get('rows')} rows, possible keys: {row.get('possible_keys') or 'none'})")
+
+        if not findings:
+            print(f"✅ {label}: {query}")
+        elif expected:
+            expected_scans += len(findings)
+            print(f"ℹ️  {label}: {query}")
+            for finding in findings:
+                print(f"      {finding} - expected")
+        else:
+            unexpected += len(findings)
+            print(f"⚠️  {label}: {query}")
+            for finding in findings:
+                print(f"      {finding}")
+
+    print(f"\n{len(collected)} queries explained, {unexpected} unexpected full scans, {expected_scans} expected")
+    return unexpected
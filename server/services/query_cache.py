@@ -0,0 +1,140 @@
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from dotenv import load_dotenv
+from database.db_connection import execute_query, current_unit_of_work, has_written, mark_written, on_commit
+from services.generations import generations
+
+# Load environment variables from .env file
+load_dotenv()
+
+# Query result cache settings
+QUERY_CACHE_ENABLED = os.getenv("QUERY_CACHE_ENABLED", "true").lower() == "true"
+QUERY_CACHE_MAX_BYTES = int(os.getenv("QUERY_CACHE_MAX_BYTES", 32 * 1024 * 1024))
+QUERY_CACHE_MAX_ENTRY_BYTES = int(os.getenv("QUERY_CACHE_MAX_ENTRY_BYTES", 1024 * 1024))
+QUERY_CACHE_TTL = float(os.getenv("QUERY_CACHE_TTL", 300))
+
+
+def result_size(rows):
+    """Approximate bytes held by a list of row dictionaries"""
+    size = sys.getsizeof(rows)
+    for row in rows:
+        size += sys.getsizeof(row)
+        for key, value in row.items():
+            # Column names are shared between rows, so only the values are counted
+            size += sys.getsizeof(value)
+    return size
+
+
+class QueryCache:
+    """
+    SELECT results keyed by normalized SQL and parameters
+
+    Every table has a generation number, bumped when a model write to it
+    commits. The numbers are shared by every worker process (see
+    services/generations.py), so a write in one prefork worker retires the
+    pages cached by all of them. Each entry records the generations of the
+    tables its query reads, as they were before the query ran. An entry
+    whose tables have moved on since is stale and is dropped on lookup, so
+    writes never scan the cache. A result that raced a write is stored
+    under the old generation and is never served.
+
+    The cache is bounded by the approximate memory its results hold:
+    least recently used entries are evicted once the total passes
+    max_bytes, and results over max_entry_bytes are not cached at all.
+    Entries also expire after ttl seconds, which bounds how stale writes
+    made outside the models can leave them. Queries inside a transaction() block
+    follow the same rules as the entity cache.
+    """
+
+    def __init__(self, max_bytes=32 * 1024 * 1024, max_entry_bytes=1024 * 1024, ttl=300, enabled=True):
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_entry_bytes
+        self.ttl = ttl
+        self.enabled = enabled
+        self.entries = OrderedDict()
+        self.bytes = 0
+        self.lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.evictions = 0
+        self.too_large = 0
+
+    def fetchall(self, query, params, tables):
+        """
+        Rows for a SELECT that reads tables, like execute_query(fetchall=True)
+        Returns fresh copies of the rows, or None if there's an error
+        """
+        if not self.enabled or any(has_written(table) for table in tables):
+            return execute_query(query, params, fetchall=True)
+
+        key = (' '.join(query.split()), tuple(params or ()))
+        with self.lock:
+            versions = generations.snapshot(tables)
+            entry = self.entries.get(key)
+            if entry is not None:
+                rows, entry_versions, size, expires = entry
+                if entry_versions == versions and expires > time.monotonic():
+                    self.entries.move_to_end(key)
+                    self.hits += 1
+                    return [dict(row) for row in rows]
+                self._remove(key)
+                self.stale += 1
+            self.misses += 1
+
+        rows = execute_query(query, params, fetchall=True)
+        if rows is not None and current_unit_of_work() is None:
+            self._put(key, versions, rows)
+        return rows
+
+    def _put(self, key, versions, rows):
+        size = result_size(rows)
+        cached = [dict(row) for row in rows]
+        with self.lock:
+            if size > self.max_entry_bytes:
+                self.too_large += 1
+                return
+            if key in self.entries:
+                self._remove(key)
+            self.entries[key] = (cached, versions, size, time.monotonic() + self.ttl)
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                self._remove(next(iter(self.entries)))
+                self.evictions += 1
+
+    def _remove(self, key):
+        entry = self.entries.pop(key)
+        self.bytes -= entry[2]
+
+    def invalidate(self, *tables):
+        """Retire every cached result that reads tables once the current transaction commits"""
+        mark_written(*tables)
+        on_commit(lambda: generations.bump(*tables))
+
+    def stats(self):
+        with self.lock:
+            return {
+                'enabled': self.enabled,
+                'entries': len(self.entries),
+                'bytes': self.bytes,
+                'max_bytes': self.max_bytes,
+                'generations': generations.stats(),
+                'hits': self.hits,
+                'misses': self.misses,
+                'stale': self.stale,
+                'evictions': self.evictions,
+                'too_large': self.too_large
+            }
+
+
+# Shared by every model in this process
+query_cache = QueryCache(
+    max_bytes=QUERY_CACHE_MAX_BYTES,
+    max_entry_bytes=QUERY_CACHE_MAX_ENTRY_BYTES,
+    ttl=QUERY_CACHE_TTL,
+    enabled=QUERY_CACHE_ENABLED
+)
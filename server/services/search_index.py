@@ -0,0 +1,451 @@
+import bisect
+import os
+import threading
+import time
+from dotenv import load_dotenv
+from database.db_connection import execute_query, stream_query, on_commit
+
+# Load environment variables from .env file
+load_dotenv()
+
+# Search index settings
+SEARCH_INDEX_ENABLED = os.getenv("SEARCH_INDEX_ENABLED", "true").lower() == "true"
+SEARCH_INDEX_REFRESH_INTERVAL = float(os.getenv("SEARCH_INDEX_REFRESH_INTERVAL", 60))
+
+# Batches larger than this are appended and sorted once instead of inserted row by row
+BULK_UPSERT_THRESHOLD = 64
+
+
+def normalize(text):
+    """Case-fold text the way MySQL's case-insensitive collations compare it"""
+    return text.casefold() if text else ''
+
+def trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+def match_quality(term, texts):
+    """Lower is better: 0 exact, 1 prefix, 2 start of a word, 3 anywhere; None if no text contains term"""
+    best = None
+    for text in texts:
+        position = text.find(term)
+        if position == -1:
+            continue
+        if text == term:
+            quality = 0
+        elif position == 0:
+            quality = 1
+        elif not text[position - 1].isalnum():
+            quality = 2
+        else:
+            quality = 3
+        if best is None or quality < best:
+            best = quality
+    return best
+
+
+class TableIndex:
+    """
+    In-memory index over one table's text columns, kept in step with MySQL
+
+    The index is loaded with build() and kept current by upsert(),
+    upsert_many() and delete() from the model write paths. refresh() picks up rows changed
+    elsewhere (another prefork worker, a direct SQL edit) by updated_at,
+    and rebuilds when the row count shows deletions it has not seen.
+    Subclasses define the structure through _empty(), _add() and _remove().
+    """
+
+    def __init__(self, name, table, columns):
+        self.name = name
+        self.table = table
+        self.columns = columns
+        self.data = self._empty()
+        self.ready = False
+        self.watermark = None
+        self.lock = threading.RLock()
+
+        self.builds = 0
+        self.refreshes = 0
+        self.searches = 0
+
+    def _empty(self):
+        raise NotImplementedError
+
+    def _add(self, data, doc_id, fields, bulk=False):
+        raise NotImplementedError
+
+    def _remove(self, data, doc_id):
+        raise NotImplementedError
+
+    def _finish(self, data):
+        """Called once after a bulk build"""
+
+    def _condition(self):
+        """SQL condition for the rows _add() keeps, or None when it keeps every row"""
+        return None
+
+    def _where(self):
+        condition = self._condition()
+        return f"WHERE {condition}" if condition else ''
+
+    def _select(self, where=''):
+        return f"SELECT id, {', '.join(self.columns)}, updated_at FROM {self.table} {where}"
+
+    def build(self):
+        """Load every row, streaming so only the index itself is held in memory"""
+        data = self._empty()
+        watermark = None
+        for row in stream_query(self._select(self._where())):
+            self._add(data, row['id'], [row[column] for column in self.columns], bulk=True)
+            if row['updated_at'] is not None and (watermark is None or row['updated_at'] > watermark):
+                watermark = row['updated_at']
+        self._finish(data)
+
+        with self.lock:
+            self.data = data
+            self.watermark = watermark
+            self.ready = True
+            self.builds += 1
+
+    def refresh(self):
+        """Apply rows changed since the last build or refresh, rebuilding if rows were deleted elsewhere"""
+        if not self.ready:
+            return
+        if self.watermark is not None:
+            rows = execute_query(self._select("WHERE updated_at >= %s"), (self.watermark,), fetchall=True) or []
+            with self.lock:
+                for row in rows:
+                    self._remove(self.data, row['id'])
+                    self._add(self.data, row['id'], [row[column] for column in self.columns])
+                    if row['updated_at'] is not None and row['updated_at'] > self.watermark:
+                        self.watermark = row['updated_at']
+                self.refreshes += 1
+
+        # Counts only the rows the index keeps, so rows it skips do not look like missed deletions
+        result = execute_query(f"SELECT COUNT(*) as count FROM {self.table} {self._where()}", fetchone=True)
+        if result is None or self.watermark is None or result['count'] != len(self.data['documents']):
+            self.build()
+
+    def upsert(self, doc_id, *fields):
+        """Index or re-index a row once the current transaction commits"""
+        self.upsert_many([(doc_id,) + fields])
+
+    def upsert_many(self, docs):
+        """
+        Index or re-index rows given as (doc_id, *fields) tuples once the current transaction commits
+        The whole batch is applied by one callback, so bulk imports queue one per index, not one per row
+        """
+        # The last fields given for a row win, as with successive upserts
+        batch = {doc[0]: doc[1:] for doc in docs}
+        if not batch:
+            return
+
+        def apply():
+            with self.lock:
+                if not self.ready:
+                    return
+                bulk = len(batch) > BULK_UPSERT_THRESHOLD
+                # Removals need the structure intact, so they all go before any bulk appends
+                for doc_id in batch:
+                    self._remove(self.data, doc_id)
+                for doc_id, fields in batch.items():
+                    self._add(self.data, doc_id, fields, bulk=bulk)
+                if bulk:
+                    self._finish(self.data)
+        on_commit(apply)
+
+    def delete(self, *doc_ids):
+        """Drop rows from the index once the current transaction commits"""
+        def apply():
+            with self.lock:
+                for doc_id in doc_ids:
+                    self._remove(self.data, doc_id)
+        on_commit(apply)
+
+    def stats(self):
+        with self.lock:
+            return {
+                'ready': self.ready,
+                'documents': len(self.data['documents']),
+                'builds': self.builds,
+                'refreshes': self.refreshes,
+                'searches': self.searches
+            }
+
+
+class TrigramIndex(TableIndex):
+    """
+    Trigram inverted index for substring search
+
+    Every document (a row id and its text fields) is listed under each
+    three-character sequence it contains. A search intersects the lists
+    for the term's trigrams, starting from the shortest, then checks the
+    few candidates left for the whole term. That gives the same matches as
+    LIKE '%term%' without scanning the table. Terms shorter than three
+    characters have no trigrams, so search() returns None for them and the
+    caller falls back to SQL.
+    """
+
+    def _empty(self):
+        return {'documents': {}, 'postings': {}}
+
+    def _add(self, data, doc_id, fields, bulk=False):
+        texts = tuple(normalize(field) for field in fields)
+        data['documents'][doc_id] = texts
+        postings = data['postings']
+        for gram in set().union(*(trigrams(text) for text in texts)):
+            postings.setdefault(gram, set()).add(doc_id)
+
+    def _remove(self, data, doc_id):
+        texts = data['documents'].pop(doc_id, None)
+        if texts is None:
+            return
+        postings = data['postings']
+        for gram in set().union(*(trigrams(text) for text in texts)):
+            ids = postings.get(gram)
+            if ids is not None:
+                ids.discard(doc_id)
+                if not ids:
+                    del postings[gram]
+
+    def search(self, term):
+        """
+        Ids of rows whose fields contain term, best matches first
+        Returns None when the index cannot answer (not built, or term under three characters)
+        """
+        term = normalize(term)
+        grams = trigrams(term)
+        with self.lock:
+            if not self.ready or not grams:
+                return None
+            self.searches += 1
+
+            documents = self.data['documents']
+            postings = self.data['postings']
+            lists = sorted((postings.get(gram, ()) for gram in grams), key=len)
+            if not lists[0]:
+                return []
+            candidates = set(lists[0]).intersection(*lists[1:])
+
+            ranked = []
+            for doc_id in candidates:
+                texts = documents[doc_id]
+                quality = match_quality(term, texts)
+                if quality is not None:
+                    ranked.append((quality, min(len(text) for text in texts if term in text), doc_id))
+
+        ranked.sort()
+        return [doc_id for _, _, doc_id in ranked]
+
+    def stats(self):
+        stats = super().stats()
+        with self.lock:
+            stats['trigrams'] = len(self.data['postings'])
+        return stats
+
+
+class PrefixIndex(TableIndex):
+    """
+    Sorted-array prefix index for autocomplete over one text column
+
+    Each value is stored once per word it contains, keyed by the text from
+    that word to the end, in one sorted list of (key, id) pairs. So "Bob
+    Marley" completes both "bo" and "mar". A lookup is a binary search for
+    the prefix followed by a walk over the next few entries, which costs
+    O(log n + k) however large the table is. With distinct, rows sharing a
+    value (songs on one album) give a single completion.
+    """
+
+    def __init__(self, name, table, column, distinct=False):
+        self.distinct = distinct
+        super().__init__(name, table, [column])
+
+    def _empty(self):
+        return {'documents': {}, 'entries': []}
+
+    def _keys(self, text):
+        keys = []
+        start = 0
+        for word in text.split(' '):
+            if word:
+                keys.append(text[start:])
+            start += len(word) + 1
+        return keys
+
+    def _add(self, data, doc_id, fields, bulk=False):
+        display = fields[0]
+        if not display:
+            return
+        data['documents'][doc_id] = display
+        entries = data['entries']
+        for key in self._keys(normalize(display)):
+            if bulk:
+                entries.append((key, doc_id))
+            else:
+                bisect.insort(entries, (key, doc_id))
+
+    def _finish(self, data):
+        # Also called after bulk upserts append to an already sorted list, which sort() merges cheaply
+        data['entries'].sort()
+
+    def _condition(self):
+        # Rows without a value have nothing to complete and are not indexed
+        column = self.columns[0]
+        return f"{column} IS NOT NULL AND {column} <> ''"
+
+    def _remove(self, data, doc_id):
+        display = data['documents'].pop(doc_id, None)
+        if display is None:
+            return
+        entries = data['entries']
+        for key in self._keys(normalize(display)):
+            position = bisect.bisect_left(entries, (key, doc_id))
+            if position < len(entries) and entries[position] == (key, doc_id):
+                del entries[position]
+
+    def complete(self, prefix, limit=10):
+        """
+        Up to limit completions for prefix, in alphabetical order of the matched text
+        Returns [{'id', 'text'}], or [{'text'}] for a distinct index; None if not built
+        """
+        prefix = normalize(prefix).strip()
+        with self.lock:
+            if not self.ready:
+                return None
+            self.searches += 1
+            if not prefix:
+                return []
+
+            documents = self.data['documents']
+            entries = self.data['entries']
+            seen = set()
+            results = []
+            position = bisect.bisect_left(entries, (prefix,))
+            while position < len(entries) and len(results) < limit:
+                key, doc_id = entries[position]
+                if not key.startswith(prefix):
+                    break
+                position += 1
+
+                display = documents[doc_id]
+                seen_key = display.casefold() if self.distinct else doc_id
+                if seen_key in seen:
+                    continue
+                seen.add(seen_key)
+                results.append({'text': display} if self.distinct else {'id': doc_id, 'text': display})
+        return results
+
+    def stats(self):
+        stats = super().stats()
+        with self.lock:
+            stats['entries'] = len(self.data['entries'])
+        return stats
+
+
+def page_of(ids, page, per_page, after_id=None):
+    """
+    Slice one page out of a ranked id list
+    With after_id the page starts just after that id's position; if the row
+    has since dropped out of the results, it holds the next larger ids
+    """
+    if after_id is None:
+        offset = (page - 1) * per_page
+        return ids[offset:offset + per_page]
+    try:
+        start = ids.index(after_id) + 1
+    except ValueError:
+        return [doc_id for doc_id in ids if doc_id > after_id][:per_page]
+    return ids[start:start + per_page]
+
+
+artist_index = TrigramIndex('artists', 'artists', ['name'])
+music_index = TrigramIndex('music', 'music', ['title', 'album_name'])
+
+# Autocomplete indexes, by the suggestion type /api/suggest accepts
+SUGGEST_INDEXES = {
+    'artists': PrefixIndex('suggest_artists', 'artists', 'name'),
+    'songs': PrefixIndex('suggest_songs', 'music', 'title'),
+    'albums': PrefixIndex('suggest_albums', 'music', 'album_name', distinct=True),
+    'users': PrefixIndex('suggest_users', 'users', 'email')
+}
+
+INDEXES = (artist_index, music_index) + tuple(SUGGEST_INDEXES.values())
+
+
+# Write-path hooks for the models; each applies once the transaction commits
+def index_artist(artist_id, name):
+    index_artists([(artist_id, name)])
+
+def index_artists(artists):
+    """Index (artist_id, name) pairs, with one commit callback per index for the batch"""
+    artists = list(artists)
+    artist_index.upsert_many(artists)
+    SUGGEST_INDEXES['artists'].upsert_many(artists)
+
+def unindex_artists(*artist_ids):
+    artist_index.delete(*artist_ids)
+    SUGGEST_INDEXES['artists'].delete(*artist_ids)
+
+def index_song(music_id, title, album_name):
+    index_songs([(music_id, title, album_name)])
+
+def index_songs(songs):
+    """Index (music_id, title, album_name) tuples, with one commit callback per index for the batch"""
+    songs = list(songs)
+    music_index.upsert_many(songs)
+    SUGGEST_INDEXES['songs'].upsert_many((music_id, title) for music_id, title, _ in songs)
+    SUGGEST_INDEXES['albums'].upsert_many((music_id, album_name) for music_id, _, album_name in songs)
+
+def unindex_songs(*music_ids):
+    music_index.delete(*music_ids)
+    SUGGEST_INDEXES['songs'].delete(*music_ids)
+    SUGGEST_INDEXES['albums'].delete(*music_ids)
+
+def index_user(user_id, email):
+    index_users([(user_id, email)])
+
+def index_users(users):
+    """Index (user_id, email) pairs with one commit callback for the batch"""
+    SUGGEST_INDEXES['users'].upsert_many(users)
+
+def unindex_users(*user_ids):
+    SUGGEST_INDEXES['users'].delete(*user_ids)
+
+_refresher_pid = None
+_refresher_lock = threading.Lock()
+
+def build_indexes():
+    """Build every search index; called once at startup, before prefork workers fork"""
+    if not SEARCH_INDEX_ENABLED:
+        return
+    for index in INDEXES:
+        started = time.monotonic()
+        try:
+            index.build()
+        except Exception as e:
+            print(f"Error building {index.name} search index, falling back to SQL: {e}")
+            continue
+        print(f"Built {index.name} search index: {len(index.data['documents'])} rows in {time.monotonic() - started:.2f}s")
+
+def start_refresher():
+    """Start this process's refresh thread; threads do not survive fork, so each worker calls it"""
+    global _refresher_pid
+    if not SEARCH_INDEX_ENABLED or not SEARCH_INDEX_REFRESH_INTERVAL or _refresher_pid == os.getpid():
+        return
+    with _refresher_lock:
+        if _refresher_pid == os.getpid():
+            return
+        _refresher_pid = os.getpid()
+    thread = threading.Thread(target=_refresh_loop, name='search-index-refresh', daemon=True)
+    thread.start()
+
+def _refresh_loop():
+    while True:
+        time.sleep(SEARCH_INDEX_REFRESH_INTERVAL)
+        for index in INDEXES:
+            try:
+                index.refresh()
+            except Exception as e:
+                print(f"Error refreshing {index.name} search index: {e}")
+
+def index_stats():
+    return {index.name: index.stats() for index in INDEXES}
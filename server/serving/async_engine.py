@@ -0,0 +1,220 @@
+import asyncio
+import http.client
+import io
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+
+from serving.streaming import StreamBody, encode_chunk
+
+
+class AsyncHTTPServer:
+    """
+    asyncio HTTP/1.1 front end for the application
+
+    Connections, keep-alive and request framing are handled on the event loop,
+    so idle clients cost no threads. Each parsed request is passed to
+    app(method, target, headers, rfile) on a thread pool because route
+    handlers block on MySQL and bcrypt; app returns (status, headers, body),
+    where body is bytes, a file object with path and size attributes, or a
+    StreamBody whose chunks are also produced on the thread pool.
+    HEAD responses carry the headers app returns and no body.
+    """
+
+    # The methods the threaded RequestHandler serves; others get a 501 from both engines
+    methods = ('GET', 'HEAD', 'POST', 'PUT', 'DELETE')
+
+    def __init__(self, app, host, port, executor_workers=16, backlog=128,
+                 keepalive_timeout=15, max_header_size=65536, max_body_size=None,
+                 spool_size=1024 * 1024):
+        self.app = app
+        self.host = host
+        self.port = port
+        self.backlog = backlog
+        self.keepalive_timeout = keepalive_timeout
+        self.max_header_size = max_header_size
+        self.max_body_size = max_body_size
+        self.spool_size = spool_size
+        self.executor = ThreadPoolExecutor(
+            max_workers=executor_workers,
+            thread_name_prefix='http-handler'
+        )
+
+    def serve_forever(self):
+        try:
+            asyncio.run(self._serve())
+        finally:
+            self.executor.shutdown(wait=True)
+
+    async def _serve(self):
+        server = await asyncio.start_server(
+            self._handle_connection,
+            self.host,
+            self.port,
+            backlog=self.backlog,
+            limit=self.max_header_size
+        )
+        async with server:
+            await server.serve_forever()
+
+    async def _handle_connection(self, reader, writer):
+        try:
+            while await self._handle_one(reader, writer):
+                pass
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def _handle_one(self, reader, writer):
+        """Serve one request; return True if the connection should stay open"""
+        try:
+            head = await asyncio.wait_for(
+                reader.readuntil(b'\r\n\r\n'),
+                timeout=self.keepalive_timeout
+            )
+        except asyncio.TimeoutError:
+            return False
+        except asyncio.IncompleteReadError:
+            # Client closed the connection between requests
+            return False
+        except asyncio.LimitOverrunError:
+            await self._send(writer, 431, [], b'', keep_alive=False)
+            return False
+
+        request_line, _, header_block = head.partition(b'\r\n')
+        try:
+            method, target, version = request_line.decode('latin-1').split()
+            headers = http.client.parse_headers(io.BytesIO(header_block))
+        except (ValueError, http.client.HTTPException):
+            await self._send(writer, 400, [], b'', keep_alive=False)
+            return False
+
+        method = method.upper()
+        if method not in self.methods:
+            await self._send(writer, 501, [], b'', keep_alive=False)
+            return False
+
+        keep_alive = self._wants_keep_alive(version, headers)
+        chunked = version == 'HTTP/1.1'
+
+        if headers.get('Transfer-Encoding'):
+            # Chunked request bodies are not used by the client
+            await self._send(writer, 411, [], b'', keep_alive=False)
+            return False
+
+        try:
+            content_length = int(headers.get('Content-Length', 0) or 0)
+        except ValueError:
+            content_length = -1
+        if content_length < 0:
+            # Without a usable length the request body cannot be framed, so the connection closes
+            await self._send(writer, 400, [], b'', keep_alive=False)
+            return False
+        if self.max_body_size is not None and content_length > self.max_body_size:
+            await self._send(writer, 413, [], b'', keep_alive=False)
+            return False
+
+        if content_length and headers.get('Expect', '').lower() == '100-continue':
+            writer.write(b'HTTP/1.1 100 Continue\r\n\r\n')
+
+        # Large bodies (uploads) spill to a temporary file instead of staying in memory
+        body = tempfile.SpooledTemporaryFile(max_size=self.spool_size)
+        try:
+            remaining = content_length
+            while remaining:
+                chunk = await reader.read(min(remaining, 65536))
+                if not chunk:
+                    raise asyncio.IncompleteReadError(b'', remaining)
+                body.write(chunk)
+                remaining -= len(chunk)
+            body.seek(0)
+
+            loop = asyncio.get_running_loop()
+            status, response_headers, response_body = await loop.run_in_executor(
+                self.executor,
+                self.app,
+                method,
+                target,
+                headers,
+                body
+            )
+        finally:
+            body.close()
+
+        if isinstance(response_body, StreamBody) and not chunked:
+            # HTTP/1.0 clients find the end of a streamed body by the connection closing
+            keep_alive = False
+
+        await self._send(writer, status, response_headers, response_body, keep_alive, chunked,
+                         send_body=method != 'HEAD')
+        return keep_alive
+
+    def _wants_keep_alive(self, version, headers):
+        connection = headers.get('Connection', '').lower()
+        if version == 'HTTP/1.1':
+            return connection != 'close'
+        return connection == 'keep-alive'
+
+    async def _send(self, writer, status, headers, body, keep_alive, chunked=True, send_body=True):
+        try:
+            reason = HTTPStatus(status).phrase
+        except ValueError:
+            reason = ''
+
+        streamed = isinstance(body, StreamBody)
+        lines = [f"HTTP/1.1 {status} {reason}"]
+        for name, value in headers:
+            if name.lower() in ('content-length', 'connection', 'transfer-encoding'):
+                continue
+            lines.append(f"{name}: {value}")
+        if streamed:
+            if chunked:
+                lines.append("Transfer-Encoding: chunked")
+        elif status != 304:
+            lines.append(f"Content-Length: {len(body)}")
+        lines.append("Connection: keep-alive" if keep_alive else "Connection: close")
+
+        writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1'))
+
+        if not send_body:
+            # A HEAD response ends with its headers; a keep-alive client reads the next response right after
+            await writer.drain()
+            if streamed:
+                await asyncio.get_running_loop().run_in_executor(self.executor, body.close)
+        elif streamed:
+            await self._send_stream(writer, body, chunked)
+        elif isinstance(body, (bytes, bytearray)):
+            writer.write(body)
+            await writer.drain()
+        else:
+            # File bodies go out with sendfile once the headers are flushed
+            await writer.drain()
+            with open(body.path, 'rb') as file:
+                await asyncio.get_running_loop().sendfile(writer.transport, file, 0, body.size)
+
+    async def _send_stream(self, writer, body, chunked):
+        """Pull chunks on the thread pool (they may block on MySQL) and write them as they come"""
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                chunk = await loop.run_in_executor(self.executor, body.next_chunk)
+                if chunk is None:
+                    break
+                writer.write(encode_chunk(chunk) if chunked else chunk)
+                await writer.drain()
+            if chunked:
+                writer.write(encode_chunk(b''))
+                await writer.drain()
+        except ConnectionError:
+            raise
+        except Exception as e:
+            # Headers are already out; drop the connection so the body reads as truncated
+            print(f"Error streaming response: {e}")
+            raise ConnectionError("Response stream failed") from e
+        finally:
+            await loop.run_in_executor(self.executor, body.close)
@@ -0,0 +1,41 @@
+class BodyReader:
+    """
+    File-like view of a request body that never reads past Content-Length
+
+    On a keep-alive connection the bytes after the body belong to the next
+    request, so parsers must not be handed the raw socket file.
+    """
+
+    def __init__(self, rfile, length):
+        self.rfile = rfile
+        self.remaining = max(length, 0)
+
+    def read(self, size=-1):
+        if size is None or size < 0 or size > self.remaining:
+            size = self.remaining
+        if size == 0:
+            return b''
+
+        data = self.rfile.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def readline(self, size=-1):
+        if size is None or size < 0 or size > self.remaining:
+            size = self.remaining
+        if size == 0:
+            return b''
+
+        line = self.rfile.readline(size)
+        self.remaining -= len(line)
+        return line
+
+    def drain(self, limit=65536):
+        """Discard whatever the handler did not read; False if more than limit was left"""
+        if self.remaining > limit:
+            return False
+
+        while self.remaining:
+            if not self.read(min(self.remaining, 8192)):
+                return False
+        return True
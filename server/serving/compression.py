@@ -0,0 +1,228 @@
+import gzip
+import os
+import zlib
+
+from serving.streaming import StreamBody
+
+# Optional encoders, used only when their packages are installed
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+COMPRESSIBLE_TYPES = (
+    'text/',
+    'application/json',
+    'application/javascript',
+    'image/svg+xml'
+)
+
+PRECOMPRESSED_EXTENSIONS = ('.html', '.css', '.js', '.json', '.svg')
+
+
+def available_encodings():
+    """Encodings this server can produce, most preferred first"""
+    encodings = []
+    if brotli is not None:
+        encodings.append('br')
+    if zstandard is not None:
+        encodings.append('zstd')
+    encodings.append('gzip')
+    return encodings
+
+
+def parse_accept_encoding(header):
+    """Parse an Accept-Encoding header into {coding: q}"""
+    accepted = {}
+    for item in (header or '').split(','):
+        parts = item.strip().split(';')
+        coding = parts[0].strip().lower()
+        if not coding:
+            continue
+
+        q = 1.0
+        for param in parts[1:]:
+            name, _, value = param.strip().partition('=')
+            if name == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        accepted[coding] = q
+    return accepted
+
+
+def accepts_encoding(header, encoding):
+    accepted = parse_accept_encoding(header)
+    q = accepted.get(encoding, accepted.get('*', 0.0))
+    return q > 0
+
+
+def negotiate(header, encodings=None):
+    """Pick the best encoding the client accepts, or None for identity"""
+    accepted = parse_accept_encoding(header)
+    if not accepted:
+        return None
+
+    best = None
+    best_q = 0.0
+    for encoding in encodings or available_encodings():
+        q = accepted.get(encoding, accepted.get('*', 0.0))
+        # Ties keep the server's preference order
+        if q > best_q:
+            best = encoding
+            best_q = q
+    return best
+
+
+def compress(body, encoding, level=None):
+    if encoding == 'gzip':
+        return gzip.compress(body, compresslevel=level or 6, mtime=0)
+    if encoding == 'br':
+        return brotli.compress(body, quality=level or 5)
+    if encoding == 'zstd':
+        return zstandard.ZstdCompressor(level=level or 3).compress(body)
+    raise ValueError(f"Unsupported encoding: {encoding}")
+
+
+class GzipStream:
+    """
+    Iterator gzip-compressing a StreamBody's chunks as they are produced
+
+    The output is one gzip member written incrementally, so a streamed body
+    is compressed in constant memory. close() closes the wrapped body, so
+    the connection behind a streamed query is still given back.
+    """
+
+    def __init__(self, body, level=6):
+        self.body = body
+        # wbits=31 writes a gzip header and trailer around the deflate stream
+        self.compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        while self.compressor is not None:
+            chunk = self.body.next_chunk()
+            if chunk is None:
+                data = self.compressor.flush()
+                self.compressor = None
+                return data
+            # The compressor buffers small chunks until it has a block worth sending
+            data = self.compressor.compress(chunk)
+            if data:
+                return data
+        raise StopIteration
+
+    def close(self):
+        self.body.close()
+
+
+def encoded_etag(etag, encoding):
+    """
+    ETag for a response compressed on the fly, derived from its identity ETag
+    Each encoding is a different representation, so it needs its own validator
+    """
+    weak = etag.startswith('W/')
+    tag = etag[2:] if weak else etag
+    return f'{"W/" if weak else ""}{tag[:-1]}-{encoding}"'
+
+
+def is_compressible(content_type):
+    content_type = (content_type or '').lower()
+    return any(content_type.startswith(prefix) for prefix in COMPRESSIBLE_TYPES)
+
+
+def compress_response(headers, body, accept_encoding, min_size=1024):
+    """
+    Compress a rendered response body when the client and content allow it
+
+    headers is the (name, value) list from render_result and is updated in
+    place with Content-Encoding and Vary, and an ETag is replaced with one
+    naming the encoded representation. Returns the body to send.
+    Streamed bodies have no size up front, so they are gzipped as they are
+    produced whenever the client accepts gzip.
+    """
+    streamed = isinstance(body, StreamBody)
+    if not isinstance(body, bytes) and not streamed:
+        return body
+
+    content_type = None
+    has_vary = False
+    etag_index = None
+    for index, (name, value) in enumerate(headers):
+        lowered = name.lower()
+        if lowered == 'content-encoding':
+            return body
+        if lowered == 'content-type':
+            content_type = value
+        elif lowered == 'vary':
+            has_vary = True
+        elif lowered == 'etag':
+            etag_index = index
+
+    if not is_compressible(content_type):
+        return body
+
+    if not has_vary:
+        headers.append(('Vary', 'Accept-Encoding'))
+
+    if streamed:
+        if negotiate(accept_encoding, ['gzip']) is None:
+            return body
+        _set_encoding(headers, 'gzip', etag_index)
+        return StreamBody(GzipStream(body))
+
+    if len(body) < min_size:
+        return body
+
+    encoding = negotiate(accept_encoding)
+    if encoding is None:
+        return body
+
+    compressed = compress(body, encoding)
+    if len(compressed) >= len(body):
+        return body
+
+    _set_encoding(headers, encoding, etag_index)
+    return compressed
+
+
+def _set_encoding(headers, encoding, etag_index):
+    headers.append(('Content-Encoding', encoding))
+    if etag_index is not None:
+        name, etag = headers[etag_index]
+        headers[etag_index] = (name, encoded_etag(etag, encoding))
+
+
+def precompress_directory(root, min_size=1024):
+    """Write .gz siblings for text assets under root that are missing or stale"""
+    written = 0
+    for directory, _, files in os.walk(root):
+        for name in files:
+            if not name.endswith(PRECOMPRESSED_EXTENSIONS):
+                continue
+
+            source = os.path.join(directory, name)
+            target = source + '.gz'
+            stat = os.stat(source)
+            if stat.st_size < min_size:
+                continue
+            if os.path.exists(target) and os.stat(target).st_mtime_ns >= stat.st_mtime_ns:
+                continue
+
+            with open(source, 'rb') as file:
+                data = gzip.compress(file.read(), compresslevel=9, mtime=0)
+            temp_target = target + '.tmp'
+            with open(temp_target, 'wb') as file:
+                file.write(data)
+            os.replace(temp_target, target)
+            written += 1
+    return written
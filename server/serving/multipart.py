@@ -0,0 +1,164 @@
+import tempfile
+from email.parser import HeaderParser
+
+
+class MultipartError(ValueError):
+    """Raised when a multipart/form-data body is malformed or over a limit"""
+
+
+def get_boundary(content_type):
+    """Extract the boundary parameter from a multipart Content-Type header"""
+    message = HeaderParser().parsestr(f"Content-Type: {content_type}\r\n\r\n")
+    boundary = message.get_param('boundary')
+    if not boundary:
+        raise MultipartError("Missing multipart boundary")
+    return boundary.encode('latin-1')
+
+
+class MultipartParser:
+    """
+    Incremental multipart/form-data parser
+
+    The body is read in chunk_size pieces and never held in memory as a
+    whole. File parts are written to a SpooledTemporaryFile that moves to
+    disk once it grows past spool_size. Plain fields are decoded to str and
+    may not exceed max_field_size.
+    """
+
+    def __init__(self, rfile, boundary, spool_size=1024 * 1024,
+                 max_field_size=1024 * 1024, max_header_size=16384, chunk_size=65536):
+        self.rfile = rfile
+        self.delimiter = b'--' + boundary
+        self.separator = b'\r\n' + self.delimiter
+        self.spool_size = spool_size
+        self.max_field_size = max_field_size
+        self.max_header_size = max_header_size
+        self.chunk_size = chunk_size
+        self.buffer = bytearray()
+        self.eof = False
+
+    def _fill(self):
+        if self.eof:
+            return False
+        chunk = self.rfile.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buffer += chunk
+        return True
+
+    def _require(self, size):
+        while len(self.buffer) < size:
+            if not self._fill():
+                raise MultipartError("Unexpected end of multipart body")
+
+    def parse(self):
+        """Return {name: str or uploaded file dict}; uploads carry filename, content_type, file and size"""
+        fields = {}
+        try:
+            self._skip_preamble()
+            while self._next_part_follows():
+                name, filename, content_type = self._read_part_headers()
+                if filename is not None:
+                    fields[name] = self._read_file(filename, content_type)
+                else:
+                    fields[name] = self._read_field()
+        except Exception:
+            close_uploads(fields)
+            raise
+        return fields
+
+    def _skip_preamble(self):
+        while True:
+            index = self.buffer.find(self.delimiter)
+            if index != -1:
+                del self.buffer[:index + len(self.delimiter)]
+                return
+            # Keep enough bytes to catch a delimiter split across reads
+            keep = len(self.delimiter) - 1
+            if len(self.buffer) > keep:
+                del self.buffer[:len(self.buffer) - keep]
+            if not self._fill():
+                raise MultipartError("Multipart boundary not found")
+
+    def _next_part_follows(self):
+        """After a delimiter: True if another part follows, False at the closing delimiter"""
+        self._require(2)
+        marker = bytes(self.buffer[:2])
+        if marker == b'--':
+            return False
+        if marker != b'\r\n':
+            raise MultipartError("Malformed multipart delimiter")
+        del self.buffer[:2]
+        return True
+
+    def _read_part_headers(self):
+        while True:
+            index = self.buffer.find(b'\r\n\r\n')
+            if index != -1:
+                break
+            if len(self.buffer) > self.max_header_size:
+                raise MultipartError("Multipart part headers too large")
+            if not self._fill():
+                raise MultipartError("Unexpected end of multipart headers")
+
+        raw_headers = bytes(self.buffer[:index]).decode('utf-8', 'replace')
+        del self.buffer[:index + 4]
+
+        headers = HeaderParser().parsestr(raw_headers + '\r\n\r\n')
+        name = headers.get_param('name', header='content-disposition')
+        if not name:
+            raise MultipartError("Multipart part without a field name")
+        filename = headers.get_param('filename', header='content-disposition')
+        return name, filename, headers.get_content_type()
+
+    def _copy_part(self, write, limit=None):
+        """Stream the current part's data to write() up to the next delimiter"""
+        size = 0
+        while True:
+            index = self.buffer.find(self.separator)
+            if index != -1:
+                size += index
+                if limit is not None and size > limit:
+                    raise MultipartError("Multipart field too large")
+                write(bytes(self.buffer[:index]))
+                del self.buffer[:index + len(self.separator)]
+                return size
+
+            safe = len(self.buffer) - len(self.separator) + 1
+            if safe > 0:
+                size += safe
+                if limit is not None and size > limit:
+                    raise MultipartError("Multipart field too large")
+                write(bytes(self.buffer[:safe]))
+                del self.buffer[:safe]
+
+            if not self._fill():
+                raise MultipartError("Unexpected end of multipart body")
+
+    def _read_file(self, filename, content_type):
+        spool = tempfile.SpooledTemporaryFile(max_size=self.spool_size)
+        try:
+            size = self._copy_part(spool.write)
+        except Exception:
+            spool.close()
+            raise
+        spool.seek(0)
+        return {
+            'filename': filename,
+            'content_type': content_type,
+            'file': spool,
+            'size': size
+        }
+
+    def _read_field(self):
+        parts = []
+        self._copy_part(parts.append, limit=self.max_field_size)
+        return b''.join(parts).decode('utf-8', 'replace')
+
+
+def close_uploads(fields):
+    """Close the temporary files behind any uploaded parts"""
+    for value in fields.values():
+        if isinstance(value, dict) and 'file' in value:
+            value['file'].close()
@@ -0,0 +1,148 @@
+import os
+import signal
+import socket
+import threading
+import time
+
+
+class PreforkSupervisor:
+    """
+    Run several worker processes that accept on the same listening address
+
+    By default the supervisor binds the socket once and every forked worker
+    inherits the file descriptor. With reuse_port=True each worker binds its
+    own SO_REUSEPORT socket instead and the kernel balances new connections
+    between them. Workers that die are restarted; on shutdown every worker is
+    asked to stop accepting and finish the requests it already has.
+    """
+
+    def __init__(self, server_factory, address, processes=None, backlog=128,
+                 reuse_port=False, shutdown_timeout=30):
+        if not hasattr(os, 'fork'):
+            raise RuntimeError("Pre-fork mode requires os.fork()")
+        if reuse_port and not hasattr(socket, 'SO_REUSEPORT'):
+            raise RuntimeError("SO_REUSEPORT is not supported on this platform")
+
+        # server_factory(bind_and_activate) must return an unstarted socketserver
+        self.server_factory = server_factory
+        self.address = address
+        self.processes = processes or os.cpu_count() or 1
+        self.backlog = backlog
+        self.reuse_port = reuse_port
+        self.shutdown_timeout = shutdown_timeout
+        self.listen_socket = None
+        self.children = {}
+        self.stopping = False
+
+    def run(self):
+        """Start the workers and supervise them until SIGINT/SIGTERM"""
+        if not self.reuse_port:
+            self.listen_socket = self._bind_socket()
+
+        signal.signal(signal.SIGTERM, self._request_stop)
+        signal.signal(signal.SIGINT, self._request_stop)
+
+        try:
+            for _ in range(self.processes):
+                self._spawn()
+
+            while not self.stopping:
+                self._reap(restart=True)
+                time.sleep(0.5)
+        finally:
+            self._stop_children()
+            if self.listen_socket:
+                self.listen_socket.close()
+
+    def _request_stop(self, signum, frame):
+        self.stopping = True
+
+    def _bind_socket(self):
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind(self.address)
+        sock.listen(self.backlog)
+        return sock
+
+    def _spawn(self):
+        pid = os.fork()
+        if pid == 0:
+            exit_code = 0
+            try:
+                self._run_worker()
+            except Exception as e:
+                print(f"Worker {os.getpid()} crashed: {e}")
+                exit_code = 1
+            finally:
+                # Never fall back into the supervisor loop in the child
+                os._exit(exit_code)
+
+        self.children[pid] = time.monotonic()
+        print(f"Started worker {pid}")
+
+    def _reap(self, restart):
+        while self.children:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                self.children.clear()
+                return
+
+            if pid == 0:
+                return
+
+            started_at = self.children.pop(pid, None)
+            if started_at is None:
+                continue
+
+            print(f"Worker {pid} exited with status {os.waitstatus_to_exitcode(status)}")
+            if restart and not self.stopping:
+                # Back off a little if a worker keeps dying right after start
+                if time.monotonic() - started_at < 1:
+                    time.sleep(1)
+                self._spawn()
+
+    def _stop_children(self):
+        for pid in list(self.children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+        deadline = time.monotonic() + self.shutdown_timeout
+        while self.children and time.monotonic() < deadline:
+            self._reap(restart=False)
+            time.sleep(0.1)
+
+        for pid in list(self.children):
+            print(f"Worker {pid} did not drain in time, killing it")
+            try:
+                os.kill(pid, signal.SIGKILL)
+                os.waitpid(pid, 0)
+            except (ProcessLookupError, ChildProcessError):
+                pass
+        self.children.clear()
+
+    def _run_worker(self):
+        # The supervisor owns Ctrl-C; workers only react to SIGTERM
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+        server = self.server_factory(bind_and_activate=False)
+        if self.reuse_port:
+            server.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+            server.server_bind()
+            server.server_activate()
+        else:
+            server.socket.close()
+            server.socket = self.listen_socket
+
+        def drain(signum, frame):
+            # shutdown() waits for serve_forever to return, so call it off the main thread
+            threading.Thread(target=server.shutdown, daemon=True).start()
+
+        signal.signal(signal.SIGTERM, drain)
+
+        try:
+            server.serve_forever()
+        finally:
+            server.server_close()
@@ -0,0 +1,57 @@
+import datetime
+import decimal
+import json
+
+# orjson is optional; the stdlib encoder is used when it is not installed
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def default(obj):
+    """Convert values MySQL returns that JSON has no type for"""
+    if isinstance(obj, (datetime.datetime, datetime.date, datetime.time)):
+        return obj.isoformat()
+    if isinstance(obj, datetime.timedelta):
+        # TIME columns come back as timedelta
+        return str(obj)
+    if isinstance(obj, decimal.Decimal):
+        return float(obj)
+    if isinstance(obj, (bytes, bytearray)):
+        return obj.decode('utf-8', 'replace')
+    if isinstance(obj, set):
+        return list(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _stdlib_dumps(obj):
+    return json.dumps(obj, default=default, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def _orjson_dumps(obj):
+    # orjson encodes datetime/date itself; default only sees Decimal and friends
+    return orjson.dumps(obj, default=default, option=orjson.OPT_NON_STR_KEYS)
+
+
+ENCODERS = {'stdlib': _stdlib_dumps}
+if orjson is not None:
+    ENCODERS['orjson'] = _orjson_dumps
+
+_encoder = ENCODERS.get('orjson', _stdlib_dumps)
+
+
+def set_encoder(name):
+    """Select the JSON encoder: 'orjson', 'stdlib' or 'auto' (orjson when installed)"""
+    global _encoder
+    if name == 'auto':
+        _encoder = ENCODERS.get('orjson', _stdlib_dumps)
+    elif name in ENCODERS:
+        _encoder = ENCODERS[name]
+    else:
+        raise ValueError(f"JSON encoder '{name}' is not available")
+
+
+def dumps(obj):
+    """Encode obj as UTF-8 JSON bytes in a single pass"""
+    return _encoder(obj)
@@ -0,0 +1,197 @@
+import hashlib
+import os
+import stat as stat_module
+import threading
+from email.utils import formatdate, parsedate_to_datetime
+from serving.compression import accepts_encoding, available_encodings, encoded_etag, is_compressible
+
+
+CONTENT_TYPES = {
+    '.html': 'text/html',
+    '.css': 'text/css',
+    '.js': 'application/javascript',
+    '.json': 'application/json',
+    '.jpg': 'image/jpeg',
+    '.jpeg': 'image/jpeg',
+    '.png': 'image/png',
+    '.gif': 'image/gif',
+    '.svg': 'image/svg+xml',
+    '.ico': 'image/x-icon',
+    '.woff': 'font/woff',
+    '.woff2': 'font/woff2'
+}
+
+
+class FileBody:
+    """Response body that the serving engine streams from disk with sendfile"""
+
+    __slots__ = ('path', 'size')
+
+    def __init__(self, path, size):
+        self.path = path
+        self.size = size
+
+    def __len__(self):
+        return self.size
+
+
+class StaticEntry:
+    __slots__ = ('path', 'mtime_ns', 'size', 'etag', 'last_modified', 'content_type', 'content')
+
+    def __init__(self, path, mtime_ns, size, etag, last_modified, content_type, content):
+        self.path = path
+        self.mtime_ns = mtime_ns
+        self.size = size
+        self.etag = etag
+        self.last_modified = last_modified
+        self.content_type = content_type
+        self.content = content
+
+
+class StaticFileCache:
+    """
+    In-memory cache of files under a directory
+
+    Each lookup costs one stat() call. A file is read and hashed again only
+    when its mtime or size changes. Files bigger than max_file_size, or that
+    would push the cache past max_total_size, are not kept in memory and are
+    sent with sendfile instead. With precompressed=True a fresh .gz
+    sibling is served to clients that accept gzip.
+    """
+
+    def __init__(self, root, cache_control, max_file_size=1024 * 1024,
+                 max_total_size=64 * 1024 * 1024, precompressed=True):
+        self.root = os.path.realpath(root)
+        self.cache_control = cache_control
+        self.precompressed = precompressed
+        self.max_file_size = max_file_size
+        self.max_total_size = max_total_size
+        self.entries = {}
+        self.total_size = 0
+        self.lock = threading.Lock()
+
+    def resolve(self, relative_path):
+        """Map a URL path to a file under root, refusing anything that escapes it"""
+        full_path = os.path.normpath(os.path.join(self.root, relative_path.lstrip('/')))
+        if full_path != self.root and not full_path.startswith(self.root + os.sep):
+            return None
+        return full_path
+
+    def get(self, relative_path):
+        """Return a fresh StaticEntry for the file, or None if it does not exist"""
+        full_path = self.resolve(relative_path)
+        if full_path is None:
+            return None
+
+        try:
+            stat = os.stat(full_path)
+        except OSError:
+            return None
+        if not stat_module.S_ISREG(stat.st_mode):
+            return None
+
+        entry = self.entries.get(full_path)
+        if entry and entry.mtime_ns == stat.st_mtime_ns and entry.size == stat.st_size:
+            return entry
+
+        return self._load(full_path, stat)
+
+    def _load(self, full_path, stat):
+        _, ext = os.path.splitext(full_path)
+        content_type = CONTENT_TYPES.get(ext.lower(), 'application/octet-stream')
+
+        digest = hashlib.sha1()
+        content = None
+        with open(full_path, 'rb') as file:
+            if stat.st_size <= self.max_file_size:
+                content = file.read()
+                digest.update(content)
+            else:
+                for chunk in iter(lambda: file.read(65536), b''):
+                    digest.update(chunk)
+
+        entry = StaticEntry(
+            path=full_path,
+            mtime_ns=stat.st_mtime_ns,
+            size=stat.st_size,
+            etag=f'"{stat.st_size:x}-{digest.hexdigest()}"',
+            last_modified=formatdate(stat.st_mtime, usegmt=True),
+            content_type=content_type,
+            content=content
+        )
+
+        with self.lock:
+            previous = self.entries.get(full_path)
+            if previous and previous.content is not None:
+                self.total_size -= previous.size
+            if content is not None and self.total_size + entry.size > self.max_total_size:
+                entry.content = None
+            if entry.content is not None:
+                self.total_size += entry.size
+            self.entries[full_path] = entry
+
+        return entry
+
+    def not_modified_etag(self, entry, headers):
+        """
+        Check If-None-Match / If-Modified-Since against the entry
+        Returns the ETag a 304 should carry, or None when the client's copy is out of date.
+        Copies that compress_response encoded on the fly match by their per-encoding ETag
+        """
+        if_none_match = headers.get('If-None-Match')
+        if if_none_match:
+            tags = [tag.strip() for tag in if_none_match.split(',')]
+            if '*' in tags:
+                return entry.etag
+            for etag in [entry.etag] + [encoded_etag(entry.etag, encoding) for encoding in available_encodings()]:
+                if etag in tags or f'W/{etag}' in tags:
+                    return etag
+            return None
+
+        if_modified_since = headers.get('If-Modified-Since')
+        if if_modified_since:
+            try:
+                since = parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError):
+                return None
+            if entry.mtime_ns // 1_000_000_000 <= since:
+                return entry.etag
+
+        return None
+
+    def respond(self, relative_path, headers):
+        """Build a handler-style result dict for the file, or None if it does not exist"""
+        entry = self.get(relative_path)
+        if entry is None:
+            return None
+
+        encoded = None
+        if self.precompressed and accepts_encoding(headers.get('Accept-Encoding'), 'gzip'):
+            encoded = self.get(relative_path + '.gz')
+            if encoded and encoded.mtime_ns < entry.mtime_ns:
+                # Source changed after the .gz was built
+                encoded = None
+        served = encoded or entry
+
+        response_headers = {
+            'ETag': served.etag,
+            'Last-Modified': entry.last_modified,
+            'Cache-Control': self.cache_control
+        }
+        if is_compressible(entry.content_type):
+            response_headers['Vary'] = 'Accept-Encoding'
+        if encoded:
+            response_headers['Content-Encoding'] = 'gzip'
+
+        etag = self.not_modified_etag(served, headers)
+        if etag is not None:
+            response_headers['ETag'] = etag
+            return {'status': 304, 'headers': response_headers, 'body': b''}
+
+        body = served.content if served.content is not None else FileBody(served.path, served.size)
+        return {
+            'status': 200,
+            'content_type': entry.content_type,
+            'headers': response_headers,
+            'body': body
+        }
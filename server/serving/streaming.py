@@ -0,0 +1,36 @@
+class StreamBody:
+    """
+    Response body produced piece by piece from an iterable of str or bytes
+
+    The serving engines send it with chunked transfer encoding (or by
+    closing the connection for HTTP/1.0 clients) and always call close(),
+    so a generator holding a database connection gives it back even when
+    the client goes away mid-response.
+    """
+
+    __slots__ = ('chunks', 'iterator')
+
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.iterator = None
+
+    def next_chunk(self):
+        """Return the next non-empty chunk as bytes, or None at the end"""
+        if self.iterator is None:
+            self.iterator = iter(self.chunks)
+        for chunk in self.iterator:
+            if isinstance(chunk, str):
+                chunk = chunk.encode('utf-8')
+            if chunk:
+                return chunk
+        return None
+
+    def close(self):
+        close = getattr(self.iterator or self.chunks, 'close', None)
+        if close is not None:
+            close()
+
+
+def encode_chunk(data):
+    """Frame data as one HTTP/1.1 chunk; an empty chunk ends the body"""
+    return b'%x\r\n%s\r\n' % (len(data), data)
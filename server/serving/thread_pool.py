@@ -0,0 +1,213 @@
+import queue
+import selectors
+import socket
+import socketserver
+import threading
+import time
+from collections import OrderedDict
+
+
+class ThreadPoolHTTPServer(socketserver.TCPServer):
+    """
+    TCP server that hands connections to a fixed pool of worker threads
+
+    A connection only takes a worker once it has bytes to read. New
+    connections, and keep-alive connections between requests, are watched by
+    one idle thread with a selector; when a request starts to arrive the
+    connection moves to a bounded queue until a worker is free. Idle clients
+    therefore hold a socket but never a worker, and connections idle for
+    keepalive_timeout seconds are closed. When the queue is full the
+    connection is answered with a 503 instead of piling up unbounded threads.
+
+    Handlers hand a connection back by setting their idle attribute; see
+    park().
+    """
+
+    allow_reuse_address = True
+
+    def __init__(self, server_address, RequestHandlerClass, workers=16,
+                 queue_size=128, backlog=128, keepalive_timeout=15, bind_and_activate=True):
+        # listen() uses request_queue_size as the accept backlog
+        self.request_queue_size = backlog
+        self.workers = workers
+        self.keepalive_timeout = keepalive_timeout
+        self.pending = queue.Queue(maxsize=queue_size)
+        self.rejected = 0
+        self.idle_closed = 0
+        self._threads = []
+
+        super().__init__(server_address, RequestHandlerClass, bind_and_activate)
+
+        # Connections waiting for a request, oldest first; only the idle thread touches these
+        self._selector = selectors.DefaultSelector()
+        self._idle = OrderedDict()
+        # Connections handed over by other threads, registered by the idle thread
+        self._parking = []
+        self._parking_lock = threading.Lock()
+        self._closing = False
+        self._wakeup_recv, self._wakeup_send = socket.socketpair()
+        self._wakeup_recv.setblocking(False)
+        self._wakeup_send.setblocking(False)
+        self._selector.register(self._wakeup_recv, selectors.EVENT_READ)
+
+        for index in range(workers):
+            thread = threading.Thread(
+                target=self._worker,
+                name=f"http-worker-{index}",
+                daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+
+        self._idle_thread = threading.Thread(target=self._watch_idle, name="http-idle", daemon=True)
+        self._idle_thread.start()
+
+    def process_request(self, request, client_address):
+        """Watch a new connection until its first request arrives"""
+        if not self.park(request, client_address):
+            self.shutdown_request(request)
+
+    def park(self, request, client_address):
+        """
+        Hand a connection with no request in progress to the idle thread
+        Returns False once the server is closing; the caller then closes it
+        """
+        with self._parking_lock:
+            if self._closing:
+                return False
+            self._parking.append((request, client_address))
+        self._wake()
+        return True
+
+    def _wake(self):
+        try:
+            self._wakeup_send.send(b'\0')
+        except OSError:
+            # A full buffer means a wakeup is already pending
+            pass
+
+    def _dispatch(self, request, client_address):
+        """Queue a connection whose request is arriving, or reject it if the queue is full"""
+        try:
+            self.pending.put_nowait((request, client_address))
+        except queue.Full:
+            self.rejected += 1
+            self.reject_request(request)
+            self.shutdown_request(request)
+
+    def reject_request(self, request):
+        """Send a minimal 503 response to a connection we cannot serve"""
+        body = b"Server busy, please retry"
+        response = (
+            b"HTTP/1.1 503 Service Unavailable\r\n"
+            b"Content-Type: text/plain\r\n"
+            b"Content-Length: " + str(len(body)).encode('ascii') + b"\r\n"
+            b"Retry-After: 1\r\n"
+            b"Connection: close\r\n"
+            b"\r\n" + body
+        )
+        try:
+            request.sendall(response)
+        except OSError:
+            pass
+
+    def _watch_idle(self):
+        while True:
+            timeout = None
+            if self._idle:
+                _, parked_at = next(iter(self._idle.values()))
+                timeout = max(0, parked_at + self.keepalive_timeout - time.monotonic())
+
+            for key, _ in self._selector.select(timeout):
+                if key.fileobj is self._wakeup_recv:
+                    self._drain_wakeups()
+                    continue
+                self._selector.unregister(key.fileobj)
+                client_address, _ = self._idle.pop(key.fileobj)
+                self._dispatch(key.fileobj, client_address)
+
+            with self._parking_lock:
+                parking, self._parking = self._parking, []
+                closing = self._closing
+
+            now = time.monotonic()
+            for request, client_address in parking:
+                try:
+                    self._selector.register(request, selectors.EVENT_READ)
+                except (ValueError, OSError):
+                    self.shutdown_request(request)
+                    continue
+                self._idle[request] = (client_address, now)
+
+            if closing:
+                # Idle connections have no request in flight, so there is nothing to drain
+                for request in self._idle:
+                    self._selector.unregister(request)
+                    self.shutdown_request(request)
+                self._idle.clear()
+                return
+
+            # Oldest first, so stop at the first connection still inside its timeout
+            while self._idle:
+                request, (_, parked_at) = next(iter(self._idle.items()))
+                if now - parked_at < self.keepalive_timeout:
+                    break
+                del self._idle[request]
+                self.idle_closed += 1
+                self._selector.unregister(request)
+                self.shutdown_request(request)
+
+    def _drain_wakeups(self):
+        try:
+            while self._wakeup_recv.recv(4096):
+                pass
+        except OSError:
+            pass
+
+    def _worker(self):
+        while True:
+            item = self.pending.get()
+            if item is None:
+                break
+
+            request, client_address = item
+            parked = False
+            try:
+                handler = self.RequestHandlerClass(request, client_address, self)
+                # A keep-alive connection with no request waiting goes back to the idle thread
+                parked = getattr(handler, 'idle', False) and self.park(request, client_address)
+            except Exception:
+                self.handle_error(request, client_address)
+            finally:
+                if not parked:
+                    self.shutdown_request(request)
+
+    def stats(self):
+        """Return a snapshot of the pool state"""
+        return {
+            'workers': self.workers,
+            'queued': self.pending.qsize(),
+            'queue_size': self.pending.maxsize,
+            'idle_connections': len(self._idle),
+            'idle_closed': self.idle_closed,
+            'rejected': self.rejected
+        }
+
+    def server_close(self):
+        super().server_close()
+
+        # Close idle connections now instead of waiting out their keep-alive timeout
+        with self._parking_lock:
+            self._closing = True
+        self._wake()
+        self._idle_thread.join()
+
+        # Let the workers finish what is already queued, then stop them
+        for _ in self._threads:
+            self.pending.put(None)
+        for thread in self._threads:
+            thread.join()
+
+        self._selector.close()
+        self._wakeup_recv.close()
+        self._wakeup_send.close()
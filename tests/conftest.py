@@ -0,0 +1,7 @@
+import os
+import sys
+
+# The server's modules import each other from the server directory, as when it is run
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'server'))
+os.chdir(ROOT)
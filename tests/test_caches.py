@@ -0,0 +1,107 @@
+"""
+A write committed in one worker process retires every process's cached results
+
+Prefork workers are forked from the process that imported the caches, so
+the tests fork a child to stand in for another worker.
+"""
+import os
+import pytest
+
+pytest.importorskip('mysql.connector')
+pytest.importorskip('dotenv')
+
+if not hasattr(os, 'fork'):
+    pytest.skip("needs os.fork()", allow_module_level=True)
+
+from services import query_cache as query_cache_module
+from services.count_service import CountService
+from services.entity_cache import EntityCache
+from services.query_cache import QueryCache
+
+
+def in_other_worker(write):
+    """Run write() in a forked child, as another prefork worker would"""
+    pid = os.fork()
+    if pid == 0:
+        try:
+            write()
+        finally:
+            os._exit(0)
+    os.waitpid(pid, 0)
+
+
+def test_entity_cache_sees_other_workers_writes():
+    cache = EntityCache('artists', max_entries=10, ttl=300)
+    loads = []
+
+    def load(artist_id):
+        loads.append(artist_id)
+        return {'id': artist_id, 'name': f'Version {len(loads)}'}
+
+    assert cache.get(1, load)['name'] == 'Version 1'
+    assert cache.get(1, load)['name'] == 'Version 1'
+    in_other_worker(lambda: cache.invalidate(1))
+    assert cache.get(1, load)['name'] == 'Version 2'
+    assert cache.stats()['stale'] == 1
+
+
+def test_query_cache_sees_other_workers_writes(monkeypatch):
+    cache = QueryCache(ttl=300)
+    queries = []
+
+    def execute_query(query, params=None, fetchall=False):
+        queries.append(query)
+        return [{'id': 1, 'run': len(queries)}]
+
+    monkeypatch.setattr(query_cache_module, 'execute_query', execute_query)
+    query = "SELECT * FROM music JOIN artists ON artists.id = music.artist_id"
+    assert cache.fetchall(query, (), ('music', 'artists')) == [{'id': 1, 'run': 1}]
+    assert cache.fetchall(query, (), ('music', 'artists')) == [{'id': 1, 'run': 1}]
+    in_other_worker(lambda: cache.invalidate('artists'))
+    assert cache.fetchall(query, (), ('music', 'artists')) == [{'id': 1, 'run': 2}]
+
+
+def test_count_cache_sees_other_workers_writes(monkeypatch):
+    from services import count_service
+    counts = CountService(ttl=300)
+    rows = [10]
+    monkeypatch.setattr(count_service, 'execute_query', lambda query, params=None, fetchone=False: {'count': rows[0]})
+
+    assert counts.count('users') == 10
+    rows[0] = 11
+    assert counts.count('users') == 10
+    in_other_worker(lambda: counts.invalidate('users'))
+    assert counts.count('users') == 11
+
+
+def test_counters_see_other_workers_writes(monkeypatch):
+    from services import counters as counters_module
+    counters = counters_module.AggregateCounters(reconcile_interval=0)
+    rows = [[{'name': 'jazz', 'count': 3}]]
+    monkeypatch.setattr(counters_module, 'execute_query', lambda query, params=None, fetchall=False: rows[0])
+
+    assert counters.get('genre', 'jazz') == 3
+    rows[0] = [{'name': 'jazz', 'count': 4}]
+    assert counters.get('genre', 'jazz') == 3
+    in_other_worker(lambda: query_cache_module.query_cache.invalidate('music'))
+    assert counters.get('genre', 'jazz') == 4
+
+
+def test_counts_inside_a_transaction_are_not_cached(monkeypatch):
+    from services import count_service
+    counts = CountService(ttl=300)
+    rows = [10]
+    written = set()
+    monkeypatch.setattr(count_service, 'execute_query', lambda query, params=None, fetchone=False: {'count': rows[0]})
+    monkeypatch.setattr(count_service, 'current_unit_of_work', lambda: object())
+    monkeypatch.setattr(count_service, 'has_written', lambda table: table in written)
+
+    # The unit of work may still roll back, so what it read is not kept
+    assert counts.count('users') == 10
+    assert counts.stats()['entries'] == 0
+
+    # Its own uncommitted writes are counted, not served from the cache
+    written.add('users')
+    rows[0] = 11
+    assert counts.count('users') == 11
+    assert counts.stats()['entries'] == 0
@@ -0,0 +1,72 @@
+"""
+Streamed responses are gzipped as they are produced
+"""
+import gzip
+
+from serving.compression import compress_response
+from serving.static_files import StaticFileCache
+from serving.streaming import StreamBody
+
+
+def csv_rows(closed, count=5000):
+    try:
+        for index in range(count):
+            yield f"{index},Artist {index},1990-01-01\n"
+    finally:
+        closed.append(True)
+
+
+def test_streamed_body_is_gzipped_incrementally():
+    closed = []
+    headers = [('Content-type', 'text/csv')]
+    body = compress_response(headers, StreamBody(csv_rows(closed)), 'gzip, deflate')
+
+    assert isinstance(body, StreamBody)
+    assert ('Content-Encoding', 'gzip') in headers
+    assert ('Vary', 'Accept-Encoding') in headers
+
+    chunks = []
+    while (chunk := body.next_chunk()) is not None:
+        chunks.append(chunk)
+    body.close()
+
+    assert len(chunks) > 1
+    expected = ''.join(f"{index},Artist {index},1990-01-01\n" for index in range(5000))
+    assert gzip.decompress(b''.join(chunks)).decode() == expected
+    assert closed == [True]
+
+
+def test_closing_a_gzipped_stream_closes_the_source():
+    closed = []
+    body = compress_response([('Content-type', 'text/csv')], StreamBody(csv_rows(closed)), 'gzip')
+    body.next_chunk()
+    # As when the client goes away mid-response
+    body.close()
+    assert closed == [True]
+
+
+def test_streamed_body_is_left_alone_without_gzip():
+    headers = [('Content-type', 'text/csv')]
+    stream = StreamBody(['a,b\n'])
+    assert compress_response(headers, stream, 'identity') is stream
+    assert headers == [('Content-type', 'text/csv'), ('Vary', 'Accept-Encoding')]
+
+
+def test_compressed_static_file_gets_its_own_etag(tmp_path):
+    (tmp_path / 'app.js').write_text('console.log("hello");\n' * 200)
+    files = StaticFileCache(str(tmp_path), cache_control='no-cache', precompressed=False)
+
+    result = files.respond('app.js', {'Accept-Encoding': 'gzip'})
+    identity_etag = result['headers']['ETag']
+    headers = [('Content-type', result['content_type'])] + list(result['headers'].items())
+    body = compress_response(headers, result['body'], 'gzip')
+    response_headers = dict(headers)
+
+    assert response_headers['Content-Encoding'] == 'gzip'
+    assert response_headers['ETag'] != identity_etag
+    assert gzip.decompress(body) == (tmp_path / 'app.js').read_bytes()
+
+    # Revalidating the gzipped copy answers 304 with that copy's ETag
+    revalidated = files.respond('app.js', {'Accept-Encoding': 'gzip', 'If-None-Match': response_headers['ETag']})
+    assert revalidated['status'] == 304
+    assert revalidated['headers']['ETag'] == response_headers['ETag']
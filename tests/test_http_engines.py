@@ -0,0 +1,75 @@
+"""
+Both serving engines frame HEAD responses and reject malformed requests the same way
+"""
+import http.client
+import socket
+import threading
+import time
+import pytest
+
+pytest.importorskip('mysql.connector')
+pytest.importorskip('bcrypt')
+pytest.importorskip('dotenv')
+
+import server
+from serving.async_engine import AsyncHTTPServer
+from serving.thread_pool import ThreadPoolHTTPServer
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture(params=['threaded', 'async'])
+def address(request):
+    if request.param == 'threaded':
+        httpd = ThreadPoolHTTPServer(('127.0.0.1', 0), server.RequestHandler, workers=2)
+        threading.Thread(target=httpd.serve_forever, daemon=True).start()
+        yield httpd.server_address
+        httpd.shutdown()
+        httpd.server_close()
+        return
+
+    port = free_port()
+    engine = AsyncHTTPServer(server.process_request, '127.0.0.1', port, executor_workers=2)
+    threading.Thread(target=engine.serve_forever, daemon=True).start()
+    for _ in range(50):
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=1).close()
+            break
+        except OSError:
+            time.sleep(0.05)
+    yield ('127.0.0.1', port)
+
+
+def raw_request(address, data):
+    with socket.create_connection(address, timeout=5) as sock:
+        sock.sendall(data)
+        return sock.recv(65536)
+
+
+def test_head_sends_headers_only(address):
+    connection = http.client.HTTPConnection(*address, timeout=5)
+    connection.request('HEAD', '/login.html')
+    head = connection.getresponse()
+    head.read()
+    assert head.status == 200
+    assert int(head.getheader('Content-Length')) > 0
+
+    # Any body after the HEAD headers would be read as the start of this response
+    connection.request('GET', '/missing')
+    response = connection.getresponse()
+    response.read()
+    assert response.status == 404
+
+
+def test_bad_content_length_is_rejected(address):
+    response = raw_request(address, b"POST /api/login HTTP/1.1\r\nHost: x\r\nContent-Length: abc\r\n\r\n")
+    assert response.startswith(b"HTTP/1.1 400") or response.startswith(b"HTTP/1.0 400")
+
+
+def test_unsupported_method_is_not_implemented(address):
+    response = raw_request(address, b"PATCH /api/artists/1 HTTP/1.1\r\nHost: x\r\n\r\n")
+    assert response.split(b' ', 2)[1] == b'501'
@@ -0,0 +1,68 @@
+"""
+The index advisor explains writes from the SQL the models build, without running them
+
+The database is replaced with a fake connection that logs every statement.
+"""
+import pytest
+
+pytest.importorskip('mysql.connector')
+pytest.importorskip('bcrypt')
+pytest.importorskip('dotenv')
+
+from database import db_connection
+from services import index_advisor
+
+
+class FakeCursor:
+    def __init__(self, log):
+        self.log = log
+        self.rows = []
+        self.rowcount = 0
+        self.lastrowid = 0
+
+    def execute(self, query, params=None):
+        self.log.append(' '.join(query.split()))
+        self.rows = []
+
+    def fetchone(self):
+        return None
+
+    def fetchall(self):
+        return []
+
+    def fetchmany(self, size=1):
+        return []
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self):
+        self.log = []
+
+    def start_transaction(self):
+        self.log.append('BEGIN')
+
+    def cursor(self, **kwargs):
+        return FakeCursor(self.log)
+
+    def commit(self):
+        self.log.append('COMMIT')
+
+    def rollback(self):
+        self.log.append('ROLLBACK')
+
+
+def test_writes_are_explained_but_never_run(monkeypatch):
+    connection = FakeConnection()
+    monkeypatch.setattr(db_connection, 'get_connection', lambda: connection)
+    monkeypatch.setattr(db_connection, 'release_connection', lambda conn, discard=False: None)
+
+    collected = index_advisor.collect_queries()
+
+    labels = {label for label, _, _, _ in collected}
+    assert {'User.update', 'Music.update', 'Artist.update', 'Music.delete', 'Artist.delete', 'User.delete'} <= labels
+    assert any(query.startswith('DELETE FROM artists') for _, query, _, _ in collected)
+    assert any(query.startswith('UPDATE users SET role') for _, query, _, _ in collected)
+    assert not [query for query in connection.log if query.split()[0] in ('UPDATE', 'DELETE', 'INSERT')]
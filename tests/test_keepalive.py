@@ -0,0 +1,88 @@
+"""
+Idle keep-alive connections do not hold the worker pool's threads
+"""
+import http.client
+import socket
+import threading
+import time
+import pytest
+
+pytest.importorskip('mysql.connector')
+pytest.importorskip('bcrypt')
+pytest.importorskip('dotenv')
+
+import server
+from serving.thread_pool import ThreadPoolHTTPServer
+
+
+@pytest.fixture
+def start_server():
+    servers = []
+
+    def start(workers=2, keepalive_timeout=15):
+        httpd = ThreadPoolHTTPServer(
+            ('127.0.0.1', 0), server.RequestHandler,
+            workers=workers, keepalive_timeout=keepalive_timeout
+        )
+        threading.Thread(target=httpd.serve_forever, daemon=True).start()
+        servers.append(httpd)
+        return httpd
+
+    yield start
+    for httpd in servers:
+        httpd.shutdown()
+        httpd.server_close()
+
+
+def get(connection, path='/missing'):
+    connection.request('GET', path)
+    response = connection.getresponse()
+    response.read()
+    return response
+
+
+def test_idle_connections_leave_workers_free(start_server):
+    httpd = start_server(workers=2)
+    host, port = httpd.server_address
+
+    # As many idle browser connections as there are workers
+    idle = [http.client.HTTPConnection(host, port, timeout=5) for _ in range(2)]
+    for connection in idle:
+        assert get(connection).status == 404
+
+    started = time.monotonic()
+    third = http.client.HTTPConnection(host, port, timeout=5)
+    assert get(third).status == 404
+    assert time.monotonic() - started < 1
+
+    # The parked connections still serve their next request
+    for connection in idle + [third]:
+        assert get(connection).status == 404
+        connection.close()
+
+
+def test_connection_opened_without_a_request_holds_no_worker(start_server):
+    httpd = start_server(workers=1)
+    host, port = httpd.server_address
+
+    # A speculative connection that never sends anything
+    with socket.create_connection((host, port), timeout=5):
+        connection = http.client.HTTPConnection(host, port, timeout=2)
+        assert get(connection).status == 404
+        connection.close()
+
+
+def test_idle_connection_is_closed_after_timeout(start_server):
+    httpd = start_server(workers=1, keepalive_timeout=0.5)
+    host, port = httpd.server_address
+
+    with socket.create_connection((host, port), timeout=5) as sock:
+        sock.sendall(b"GET /missing HTTP/1.1\r\nHost: test\r\n\r\n")
+        data = b''
+        while True:
+            chunk = sock.recv(65536)
+            if not chunk:
+                break
+            data += chunk
+    assert data.startswith(b'HTTP/1.1 404')
+    assert httpd.stats()['idle_closed'] == 1
@@ -0,0 +1,10 @@
+"""
+Clients cannot ask for unbounded pages
+"""
+from routing.pagination import MAX_PER_PAGE, encode_cursor, get_page_params
+
+
+def test_page_size_is_capped():
+    assert get_page_params({'limit': '1000000000', 'after': encode_cursor(5)}) == (1, MAX_PER_PAGE, 5)
+    assert get_page_params({'per_page': '500', 'page': '2'}) == (2, MAX_PER_PAGE, None)
+    assert get_page_params({'per_page': '25'}) == (1, 25, None)
@@ -0,0 +1,73 @@
+"""
+Search indexes stay in step with a table through refresh() without needless rebuilds
+
+MySQL is replaced with an in-memory SQLite table.
+"""
+import sqlite3
+import pytest
+
+pytest.importorskip('mysql.connector')
+pytest.importorskip('dotenv')
+
+from services import search_index
+from services.search_index import PrefixIndex
+
+
+@pytest.fixture
+def music(monkeypatch):
+    db = sqlite3.connect(':memory:')
+    db.row_factory = sqlite3.Row
+    db.executescript("""
+        CREATE TABLE music (id INTEGER PRIMARY KEY, title TEXT, album_name TEXT, updated_at TEXT);
+        INSERT INTO music VALUES
+          (1, 'One', 'First Album', '2024-01-01'),
+          (2, 'Two', NULL, '2024-01-01'),
+          (3, 'Three', '', '2024-01-01'),
+          (4, 'Four', 'Second Album', '2024-01-01');
+    """)
+
+    def execute_query(query, params=None, fetchone=False, fetchall=False):
+        rows = [dict(row) for row in db.execute(query.replace('%s', '?'), params or ())]
+        return rows[0] if fetchone else rows
+
+    monkeypatch.setattr(search_index, 'execute_query', execute_query)
+    monkeypatch.setattr(search_index, 'stream_query', lambda query, params=None: iter(execute_query(query, params)))
+    return db
+
+
+def test_rows_without_a_value_do_not_force_rebuilds(music):
+    index = PrefixIndex('albums', 'music', 'album_name', distinct=True)
+    index.build()
+    for _ in range(3):
+        index.refresh()
+
+    assert index.builds == 1
+    assert index.refreshes == 3
+    assert [result['text'] for result in index.complete('al')] == ['First Album', 'Second Album']
+
+
+def test_value_cleared_elsewhere_is_dropped(music):
+    index = PrefixIndex('albums', 'music', 'album_name', distinct=True)
+    index.build()
+    music.execute("UPDATE music SET album_name = NULL, updated_at = '2024-02-01' WHERE id = 1")
+    index.refresh()
+
+    assert index.builds == 1
+    assert [result['text'] for result in index.complete('al')] == ['Second Album']
+
+
+def test_batch_upsert_queues_one_callback_per_index(music, monkeypatch):
+    callbacks = []
+    monkeypatch.setattr(search_index, 'on_commit', callbacks.append)
+    for index in (search_index.music_index, search_index.SUGGEST_INDEXES['songs'], search_index.SUGGEST_INDEXES['albums']):
+        monkeypatch.setattr(index, 'data', index._empty())
+        monkeypatch.setattr(index, 'ready', True)
+
+    search_index.index_songs((music_id, f'Song {music_id}', f'Album {music_id % 3}') for music_id in range(10, 210))
+    assert len(callbacks) == 3
+
+    for callback in callbacks:
+        callback()
+    albums = search_index.SUGGEST_INDEXES['albums']
+    assert [result['text'] for result in albums.complete('album')] == ['Album 0', 'Album 1', 'Album 2']
+    assert search_index.SUGGEST_INDEXES['songs'].complete('song 20')[0]['text'] == 'Song 20'
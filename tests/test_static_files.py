@@ -0,0 +1,72 @@
+"""
+Large static files are sent whole over a real socket
+
+Files above the in-memory limit go out with sendfile on a connection that
+has a timeout. A client that reads slowly fills the socket's send buffer,
+which the server has to wait out rather than give up on.
+"""
+import os
+import socket
+import threading
+import time
+import pytest
+
+pytest.importorskip('mysql.connector')
+pytest.importorskip('bcrypt')
+pytest.importorskip('dotenv')
+
+import server
+from serving.static_files import StaticFileCache
+from serving.thread_pool import ThreadPoolHTTPServer
+
+# Well past the kernel's socket buffers, so sendfile cannot finish in one call
+FILE_SIZE = 16 * 1024 * 1024
+
+
+@pytest.fixture
+def http_server(tmp_path, monkeypatch):
+    content = os.urandom(1024 * 1024) * (FILE_SIZE // (1024 * 1024))
+    (tmp_path / 'big.bin').write_bytes(content)
+    monkeypatch.setattr(server, 'static_files', StaticFileCache(
+        str(tmp_path), cache_control='no-cache', max_file_size=0, precompressed=False
+    ))
+
+    httpd = ThreadPoolHTTPServer(('127.0.0.1', 0), server.RequestHandler, workers=1)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd.server_address, content
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def read_response(sock):
+    data = b''
+    while b'\r\n\r\n' not in data:
+        chunk = sock.recv(65536)
+        assert chunk, "connection closed before the headers"
+        data += chunk
+    head, _, body = data.partition(b'\r\n\r\n')
+    lines = head.decode('latin-1').split('\r\n')
+    headers = dict(line.split(': ', 1) for line in lines[1:])
+    length = int(headers['Content-Length'])
+    while len(body) < length:
+        chunk = sock.recv(1024 * 1024)
+        if not chunk:
+            break
+        body += chunk
+    return lines[0], headers, body
+
+
+def test_file_larger_than_socket_buffer_is_sent_whole(http_server):
+    address, content = http_server
+    with socket.create_connection(address, timeout=10) as sock:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 64 * 1024)
+        sock.sendall(b"GET /static/big.bin HTTP/1.1\r\nHost: test\r\nConnection: close\r\n\r\n")
+        # Let the server fill its send buffer before anything is read
+        time.sleep(0.5)
+        status, headers, body = read_response(sock)
+
+    assert status == 'HTTP/1.1 200 OK'
+    assert int(headers['Content-Length']) == FILE_SIZE
+    assert len(body) == FILE_SIZE
+    assert body == content
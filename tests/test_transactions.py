@@ -0,0 +1,121 @@
+"""
+A mutating request whose unit of work does not commit must not report success
+
+The database is replaced with a fake connection that logs the statements
+it sees and fails the ones a test asks it to.
+"""
+import io
+import json
+import pytest
+
+mysql_connector = pytest.importorskip('mysql.connector')
+pytest.importorskip('bcrypt')
+pytest.importorskip('dotenv')
+
+import server
+from database import db_connection
+from serving.body import BodyReader
+
+
+class FakeCursor:
+    def __init__(self, connection):
+        self.connection = connection
+        self.lastrowid = 0
+        self.rowcount = 0
+        self.rows = []
+
+    def execute(self, query, params=None):
+        statement = query.split()[0].upper()
+        self.connection.log.append(statement)
+        if statement in self.connection.fail:
+            raise mysql_connector.Error(f"simulated {statement} failure")
+        if statement == 'SELECT':
+            self.rows = [{'id': 1, 'name': 'Artist', 'no_of_albums_released': 2}]
+        elif statement == 'INSERT':
+            self.lastrowid = 42
+            self.rowcount = 1
+        else:
+            self.rowcount = 1
+
+    def fetchone(self):
+        return self.rows[0] if self.rows else None
+
+    def fetchall(self):
+        return list(self.rows)
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self, fail=()):
+        self.fail = set(fail)
+        self.log = []
+        self.in_transaction = False
+
+    def start_transaction(self):
+        self.log.append('BEGIN')
+        self.in_transaction = True
+
+    def cursor(self, **kwargs):
+        return FakeCursor(self)
+
+    def commit(self):
+        self.log.append('COMMIT')
+        self.in_transaction = False
+        if 'COMMIT' in self.fail:
+            raise mysql_connector.Error("simulated COMMIT failure")
+
+    def rollback(self):
+        self.log.append('ROLLBACK')
+        self.in_transaction = False
+
+
+@pytest.fixture
+def database(monkeypatch):
+    def install(fail=()):
+        connection = FakeConnection(fail)
+        monkeypatch.setattr(db_connection, 'get_connection', lambda: connection)
+        monkeypatch.setattr(db_connection, 'release_connection', lambda conn, discard=False: None)
+        return connection
+    return install
+
+
+@pytest.fixture
+def artist_user(monkeypatch):
+    user = {'id': 7, 'email': 'artist@example.com', 'first_name': 'Art', 'last_name': 'Ist', 'role': 'artist'}
+    monkeypatch.setattr(server, 'get_user_from_session', lambda session_id: user)
+    return user
+
+
+def create_song():
+    """POST a song with an album, which inserts the song and updates the artist in one transaction"""
+    body = json.dumps({'title': 'Song', 'album_name': 'Album', 'genre': 'jazz'}).encode('utf-8')
+    headers = {
+        'Content-Type': 'application/json',
+        'Content-Length': str(len(body)),
+        'Cookie': 'session_id=test'
+    }
+    reader = BodyReader(io.BytesIO(body), len(body))
+    return server.process_request('POST', '/api/artists/1/music', headers, reader)
+
+
+def test_committed_write_returns_created(database, artist_user):
+    connection = database()
+    status, _, _ = create_song()
+    assert status == 201
+    assert connection.log == ['BEGIN', 'SELECT', 'INSERT', 'UPDATE', 'COMMIT']
+
+
+def test_failed_query_returns_500_and_rolls_back(database, artist_user):
+    connection = database(fail={'UPDATE'})
+    status, _, _ = create_song()
+    assert status == 500
+    assert connection.log == ['BEGIN', 'SELECT', 'INSERT', 'UPDATE', 'ROLLBACK']
+
+
+def test_failed_commit_returns_500(database, artist_user):
+    connection = database(fail={'COMMIT'})
+    status, _, _ = create_song()
+    assert status == 500
+    assert connection.log[-2:] == ['COMMIT', 'ROLLBACK']